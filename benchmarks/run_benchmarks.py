@@ -0,0 +1,389 @@
+"""
+Benchmark suite of the library design: every public stage of core.data_function,
+models.library.Library and models.locus.Locus, and the whole design (design_process) for both
+design types, on synthetic chromosome files of increasing size (see synthetic_bed.py).
+
+The best time of several runs of each benchmark is saved in a json file, which can be compared
+with the results of a previous run (baseline) to detect performance regressions.
+
+Usage:
+    python benchmarks/run_benchmarks.py --rows 10000 100000 1000000 --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+"""
+
+import contextlib
+import copy
+import datetime as dt
+import io
+import json
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).absolute().parents[1].joinpath("src")))
+
+import core.data_function as df
+from core.design_process import design_process
+from core.locus_design import add_primers, add_readouts, select_loci
+from models.library import Library
+from models.locus import Locus
+from models.probe_set import ProbeSet
+from synthetic_bed import generate_bed
+
+BENCHMARKS_FOLDER = Path(__file__).absolute().parent
+START_LIB = 100_000
+RESOLUTION = 10_000
+NBR_PROBE_BY_LOCUS = 100
+PRIMER = ["BB297.Fw", "GACTGGTACTCGCGTGACTTG", "BB299.Rev", "CCAGTCCAGAGGTGTCCCTAC"]
+
+
+def measure(
+    run: Callable[..., Any], repeat: int, setup: Callable[[], tuple] = None
+) -> float:
+    """Best time of several runs of a benchmark (in seconds)
+
+    Args:
+        run (Callable[..., Any]):
+            function to time, called with the arguments returned by setup
+        repeat (int):
+            number of runs
+        setup (Callable[[], tuple]):
+            function preparing the arguments of each run (not timed). Defaults to None.
+
+    Returns:
+        float: best time (in seconds)
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        # the stages print their results, which is not what is measured
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run(*args)
+            times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def consume(iterator) -> None:
+    deque(iterator, maxlen=0)
+
+
+def input_parameters(
+    bed_path: Path, bcd_path: Path, design_type: str, nbr_loci_total: int
+) -> dict[str, str | int | Path]:
+    """Parameters of a library covering the synthetic chromosome file"""
+    parameters = df.format_parameters(
+        {
+            "chromosome_file": bed_path.name,
+            "chromosome_folder": str(bed_path.parent),
+            "design_type": design_type,
+            "resolution": RESOLUTION,
+            "start_lib": START_LIB,
+            "nbr_loci_total": nbr_loci_total,
+            "nbr_probe_by_locus": NBR_PROBE_BY_LOCUS,
+            "nbr_bcd_rt_by_probe": 3,
+            "primer_univ": "primer1",
+            "bcd_rt_file": bcd_path.name,
+            "max_diff_percent": 0,
+            "seed": 1,
+        }
+    )
+    # barcodes of the benchmark (one for each locus), not those of the resources folder
+    parameters["bcd_rt_path"] = bcd_path
+    return parameters
+
+
+def benchmark_size(
+    nbr_rows: int, work_folder: Path, repeat: int, seed: int
+) -> dict[str, float]:
+    """Runs all the benchmarks on a synthetic chromosome file of nbr_rows probes
+
+    Returns:
+        dict[str, float]: best time of each benchmark (in seconds)
+    """
+    bed_path = work_folder.joinpath(f"synthetic_{nbr_rows}_{seed}.bed")
+    last_end = generate_bed(bed_path, nbr_rows, seed=seed, start=START_LIB)
+    nbr_loci = {
+        "locus_length": max(1, (last_end - START_LIB) // RESOLUTION),
+        "nbr_probes": max(1, nbr_rows // NBR_PROBE_BY_LOCUS),
+    }
+    bcd_path = work_folder.joinpath("barcodes.csv")
+    bcd_rt_list = [
+        [f"Bcd_{i}", "GCTATCGTTCGTTCGAGGCC"] for i in range(max(nbr_loci.values()))
+    ]
+    with open(bcd_path, mode="w", encoding="UTF-8") as file:
+        file.writelines(f"{name},{seq}\n" for name, seq in bcd_rt_list)
+    results = {}
+
+    # ---------------------------------------------------------------------------------------------
+    #                                   core.data_function
+    # ---------------------------------------------------------------------------------------------
+    results["data_function.iter_bed_records"] = measure(
+        lambda: consume(df.iter_bed_records(bed_path)), repeat
+    )
+    results["data_function.seq_genomic_format"] = measure(
+        lambda: df.seq_genomic_format(bed_path), repeat
+    )
+    results["data_function.seq_genomic_window"] = measure(
+        lambda: consume(
+            df.seq_genomic_window(
+                bed_path, START_LIB, (START_LIB + last_end) // 2, "locus_length"
+            )
+        ),
+        repeat,
+    )
+    results["data_function.bcd_rt_format"] = measure(
+        lambda: df.bcd_rt_format(bcd_path), repeat
+    )
+    primer_path = BENCHMARKS_FOLDER.parent.joinpath(
+        "src", "resources", "Primer_univ.csv"
+    )
+    results["data_function.universal_primer_format"] = measure(
+        lambda: df.universal_primer_format(primer_path), repeat
+    )
+    probe_set = ProbeSet.from_list(df.iter_bed_records(bed_path))
+
+    for design_type in ("locus_length", "nbr_probes"):
+        parameters = input_parameters(
+            bed_path, bcd_path, design_type, nbr_loci[design_type]
+        )
+        library = Library(parameters)
+        size = {"resolution": RESOLUTION, "nbr_probe_by_locus": NBR_PROBE_BY_LOCUS}
+
+        # -----------------------------------------------------------------------------------------
+        #                                   models.library.Library
+        # -----------------------------------------------------------------------------------------
+        results[f"Library.reduce_list_seq[{design_type}]"] = measure(
+            lambda: library.reduce_list_seq(probe_set, **size), repeat
+        )
+        reduced = library.reduce_list_seq(probe_set, **size)
+        results[f"Library.partition_loci[{design_type}]"] = measure(
+            lambda: library.partition_loci(reduced, **size), repeat
+        )
+        results[f"Library.iter_loci[{design_type}]"] = measure(
+            lambda: consume(library.iter_loci(iter(reduced), **size)), repeat
+        )
+        results[f"Library.loci_length_info[{design_type}]"] = measure(
+            lambda: library.loci_length_info(probe_set, **size), repeat
+        )
+        loci_probes = library.partition_loci(reduced, **size)
+        loci = select_loci(parameters, loci_probes, 1, library.seed)
+
+        def readouts_setup() -> tuple:
+            library.loci_list = [copy.copy(locus) for locus in loci]
+            return ()
+
+        results[f"Library.add_rt_bcd_to_primary_seq[{design_type}]"] = measure(
+            lambda: library.add_rt_bcd_to_primary_seq(bcd_rt_list, parameters),
+            repeat,
+            readouts_setup,
+        )
+        with_readouts = add_readouts(parameters, loci, bcd_rt_list)
+
+        def primers_setup() -> tuple:
+            library.loci_list = add_readouts(parameters, loci, bcd_rt_list)
+            for locus in library.loci_list:
+                locus.primers_univ = PRIMER
+            return ()
+
+        results[f"Library.add_univ_primer_each_side[{design_type}]"] = measure(
+            library.add_univ_primer_each_side, repeat, primers_setup
+        )
+        with_primers = add_primers(parameters, with_readouts, PRIMER)
+        library.loci_list = with_primers
+        results[f"Library.check_length_seq_diff[{design_type}]"] = measure(
+            library.check_length_seq_diff, repeat
+        )
+        _, max_length, _, diff_percentage = library.check_length_seq_diff()
+
+        def completion_setup() -> tuple:
+            library.loci_list = add_primers(parameters, with_readouts, PRIMER)
+            return diff_percentage, max_length
+
+        results[f"Library.completion[{design_type}]"] = measure(
+            library.completion, repeat, completion_setup
+        )
+
+        # -----------------------------------------------------------------------------------------
+        #                                   models.locus.Locus
+        # -----------------------------------------------------------------------------------------
+        def fill_loci() -> None:
+            for i, (probes, start, end) in enumerate(loci_probes, start=1):
+                locus = Locus(
+                    None,
+                    locus_n=i,
+                    resolution=RESOLUTION,
+                    nbr_probe_by_locus=NBR_PROBE_BY_LOCUS,
+                    design_type=design_type,
+                )
+                locus.fill_genomic_seq(probes, start, end, seed=library.seed)
+
+        results[f"Locus.fill_genomic_seq[{design_type}]"] = measure(fill_loci, repeat)
+
+        def recover_loci() -> None:
+            for i in range(1, len(loci_probes) + 1):
+                locus = Locus(
+                    None,
+                    locus_n=i,
+                    resolution=RESOLUTION,
+                    nbr_probe_by_locus=NBR_PROBE_BY_LOCUS,
+                    design_type=design_type,
+                )
+                locus.recover_genomic_seq(
+                    i, len(loci_probes), START_LIB, reduced, seed=library.seed
+                )
+
+        results[f"Locus.recover_genomic_seq[{design_type}]"] = measure(
+            recover_loci, repeat
+        )
+        checker = Locus(None, locus_n=1, nbr_probe_by_locus=NBR_PROBE_BY_LOCUS)
+        results[f"Locus.check_nbr_probes[{design_type}]"] = measure(
+            lambda: [
+                checker.check_nbr_probes(probes, library.seed)
+                for probes, _, _ in loci_probes
+            ],
+            repeat,
+        )
+
+        # -----------------------------------------------------------------------------------------
+        #                       core.data_function result files writers
+        # -----------------------------------------------------------------------------------------
+        library.loci_list = with_primers
+        writers_folder = work_folder.joinpath("writers")
+        writers_folder.mkdir(exist_ok=True)
+        for writer in (
+            df.result_details_file,
+            df.full_sequences_file,
+            df.library_summary_file,
+        ):
+            results[f"data_function.{writer.__name__}[{design_type}]"] = measure(
+                lambda: writer(writers_folder, library), repeat
+            )
+
+        # -----------------------------------------------------------------------------------------
+        #                                   whole design
+        # -----------------------------------------------------------------------------------------
+        def design_setup() -> tuple:
+            # one output folder by run (results folders are named after the second they are
+            # created in)
+            design_folder = work_folder.joinpath(
+                f"design_{design_type}", dt.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            )
+            design_folder.mkdir(parents=True)
+            parameters = input_parameters(
+                bed_path, bcd_path, design_type, nbr_loci[design_type]
+            )
+            return design_folder, None, parameters
+
+        results[f"design_process[{design_type}]"] = measure(
+            design_process, repeat, design_setup
+        )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Prints the ratio of the times of the results to the times of the baseline
+
+    Args:
+        results (dict):
+            results of the benchmarks (see main)
+        baseline (dict):
+            results of a previous run of the benchmarks
+        threshold (float):
+            ratio above which a benchmark is reported as a regression
+
+    Returns:
+        list[str]: benchmarks slower than the baseline by more than the threshold
+    """
+    regressions = []
+    print(
+        f"{'benchmark':<55}{'rows':>10}{'baseline (s)':>14}{'current (s)':>14}{'ratio':>8}"
+    )
+    for rows, times in results["results"].items():
+        for name, seconds in times.items():
+            reference = baseline["results"].get(rows, {}).get(name)
+            if reference is None:
+                continue
+            ratio = seconds / reference if reference else float("inf")
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} ({rows} rows)")
+            print(
+                f"{name:<55}{rows:>10}{reference:>14.6f}{seconds:>14.6f}{ratio:>8.2f}{flag}"
+            )
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description="Benchmarks of the library design")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="Numbers of probes of the synthetic chromosome files (10k to 10M)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each benchmark")
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the synthetic files"
+    )
+    parser.add_argument(
+        "--work",
+        type=Path,
+        default=BENCHMARKS_FOLDER.joinpath("work"),
+        help="Folder of the synthetic files and of the results of the designs",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=BENCHMARKS_FOLDER.joinpath("results.json"),
+        help="Path of the results json file",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        metavar="BASELINE",
+        help="Results json file of a previous run to compare with",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Ratio to the baseline time above which a benchmark is a regression",
+    )
+    args = parser.parse_args()
+    args.work.mkdir(parents=True, exist_ok=True)
+
+    results = {
+        "date": dt.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": {},
+    }
+    for nbr_rows in args.rows:
+        print(f"Benchmarks on {nbr_rows} probes...")
+        results["results"][str(nbr_rows)] = benchmark_size(
+            nbr_rows, args.work, args.repeat, args.seed
+        )
+    with open(args.output, mode="w", encoding="UTF-8") as file:
+        json.dump(results, file, indent=4)
+    print(f"Results saved in {args.output}")
+
+    if args.compare:
+        with open(args.compare, mode="r", encoding="UTF-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            raise SystemExit(f"Performance regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
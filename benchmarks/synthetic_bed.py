@@ -0,0 +1,126 @@
+"""
+Deterministic generator of synthetic OligoMiner chromosome files (.bed) for the benchmarks.
+
+The probes are non-overlapping and sorted by coordinates, as in the OligoMiner files:
+chr3L	8880042	8880076	GGGCGTGCGCCAGCATAAAAGTTCCAAATGCTGAC	46.22
+The same arguments always give the same file.
+
+Usage: python benchmarks/synthetic_bed.py OUTPUT.bed --rows 1000000
+"""
+
+import random
+from argparse import ArgumentParser
+from pathlib import Path
+
+# sequences are slices of a random pool (drawing each base would dominate the generation time)
+POOL_SIZE = 1 << 20
+LINES_BY_WRITE = 100_000
+
+
+def generate_bed(
+    path: Path,
+    nbr_rows: int,
+    chromosome: str = "chr3L",
+    seed: int = 0,
+    start: int = 100_000,
+    min_length: int = 30,
+    max_length: int = 40,
+    spacing_max: int = 40,
+    gap_probability: float = 0.001,
+    gap_length: int = 50_000,
+) -> int:
+    """Writes a synthetic chromosome file
+
+    Args:
+        path (Path):
+            File path of the chromosome file
+        nbr_rows (int):
+            number of probes
+        chromosome (str):
+            chromosome name. Defaults to "chr3L".
+        seed (int):
+            seed of the random draws. Defaults to 0.
+        start (int):
+            start coordinate of the first probe. Defaults to 100_000.
+        min_length (int):
+            minimal length of the probe sequences. Defaults to 30.
+        max_length (int):
+            maximal length of the probe sequences. Defaults to 40.
+        spacing_max (int):
+            maximal number of bases between two consecutive probes. Defaults to 40.
+        gap_probability (float):
+            probability of a region without probes after a probe (density gaps, as in
+            repeated regions). Defaults to 0.001.
+        gap_length (int):
+            length of the regions without probes (in bp). Defaults to 50_000.
+
+    Returns:
+        int: end coordinate of the last probe
+    """
+    rng = random.Random(seed)
+    pool = "".join(rng.choices("ACGT", k=POOL_SIZE))
+    position = start
+    end = start
+    with open(path, mode="w", encoding="UTF-8") as file:
+        lines = []
+        for _ in range(nbr_rows):
+            length = rng.randint(min_length, max_length)
+            offset = rng.randrange(POOL_SIZE - length)
+            end = position + length - 1
+            tm = rng.uniform(37, 52)
+            lines.append(
+                f"{chromosome}\t{position}\t{end}\t{pool[offset:offset + length]}\t{tm:.2f}\n"
+            )
+            position = end + 1 + rng.randint(0, spacing_max)
+            if rng.random() < gap_probability:
+                position += gap_length
+            if len(lines) == LINES_BY_WRITE:
+                file.writelines(lines)
+                lines.clear()
+        file.writelines(lines)
+    return end
+
+
+def main():
+    parser = ArgumentParser(description="Synthetic OligoMiner chromosome file")
+    parser.add_argument("output", type=Path, help="Path of the .bed file to create")
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of probes")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random draws")
+    parser.add_argument("--chromosome", default="chr3L", help="Chromosome name")
+    parser.add_argument("--min_length", type=int, default=30)
+    parser.add_argument("--max_length", type=int, default=40)
+    parser.add_argument(
+        "--spacing_max",
+        type=int,
+        default=40,
+        help="Maximal number of bases between two probes",
+    )
+    parser.add_argument(
+        "--gap_probability",
+        type=float,
+        default=0.001,
+        help="Probability of a region without probes after a probe",
+    )
+    parser.add_argument(
+        "--gap_length",
+        type=int,
+        default=50_000,
+        help="Length of the regions without probes",
+    )
+    args = parser.parse_args()
+    last_end = generate_bed(
+        args.output,
+        args.rows,
+        chromosome=args.chromosome,
+        seed=args.seed,
+        min_length=args.min_length,
+        max_length=args.max_length,
+        spacing_max=args.spacing_max,
+        gap_probability=args.gap_probability,
+        gap_length=args.gap_length,
+    )
+    print(f"{args.rows} probes written in {args.output} (last probe end: {last_end})")
+
+
+if __name__ == "__main__":
+    main()
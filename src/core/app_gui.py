@@ -480,7 +480,7 @@ def main_gui():
     spinbox_nbr_rt_bcd = my_gui.create_spinbox(
         master=labelframe_param,
         from_=1,
-        to=5,
+        to=10,
         textvariable=nbr_rt_bcd,
         column=2,
         row=6,
@@ -570,6 +570,25 @@ def main_gui():
         text="Start Libray Design",
         x=200,
         y=465,
+    )
+
+    # progress of the design (run in background, the Parameters tab stays usable)
+    label_design_status = my_gui.create_label_place(
+        master=tab_param, text="", x=460, y=440
+    )
+    progress_design = my_gui.create_progressbar_place(
+        master=tab_param, x=460, y=470, length=380
+    )
+    button_cancel_design = my_gui.create_button_place(
+        master=tab_param,
+        text="Cancel",
+        x=360,
+        y=465,
+        command=partial(gf.cancel_design, label_design_status),
+    )
+    button_cancel_design.config(state=tk.DISABLED)
+
+    button_start_design.config(
         command=partial(
             gf.start_design,
             parameters=input_parameters,
@@ -580,6 +599,10 @@ def main_gui():
             frame_board=frame_summary,
             treeview=treeview_summary,
             tree_scroll=tree_scrollbar,
+            progress_bar=progress_design,
+            status_label=label_design_status,
+            button_start=button_start_design,
+            button_cancel=button_cancel_design,
         ),
     )
 
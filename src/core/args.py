@@ -12,6 +12,28 @@ def check_args(arguments: argparse.Namespace) -> None:
         raise SystemExit(
             f"Input parameters file (input_parameters.json): FILE NOT FOUND."
         )
+    if arguments.build_database and not arguments.build_database.is_dir():
+        raise SystemExit(
+            f"Genome folder ({arguments.build_database.as_posix()}): INVALID FOLDER."
+        )
+    if arguments.workers < 1:
+        raise SystemExit(
+            f"Number of workers ({arguments.workers}): must be at least 1."
+        )
+    if arguments.batch and not arguments.batch.exists():
+        raise SystemExit(
+            f"Batch manifest ({arguments.batch.as_posix()}): FILE OR FOLDER NOT FOUND."
+        )
+    if arguments.sweep and not arguments.sweep.is_file():
+        raise SystemExit(f"Sweep file ({arguments.sweep.as_posix()}): FILE NOT FOUND.")
+    if arguments.stage_cache and (arguments.stream or arguments.workers > 1):
+        raise SystemExit(
+            "Stage cache (--stage_cache): not available with --stream or several workers."
+        )
+    if arguments.stream and arguments.workers > 1 and not arguments.batch:
+        raise SystemExit(
+            "Streaming design (--stream): not available with several workers."
+        )
     if not arguments.output.exists():
         raise SystemExit(
             f"Output folder ({arguments.output.as_posix()}): INVALID FOLDER."
@@ -45,4 +67,66 @@ def parse_arguments(command_line=None) -> argparse.Namespace:
         default=Path.cwd(),
         help="Path folder to save results files.\nDEFAULT: current working directory",
     )
+    parser.add_argument(
+        "-b",
+        "--build_cache",
+        action="store_true",
+        help="Convert the chromosome file into a binary cache, used transparently by the next designs",
+    )
+    parser.add_argument(
+        "-d",
+        "--build_database",
+        type=Path,
+        metavar="GENOME_FOLDER",
+        help="Ingest all the chromosome files of an OligoMiner genome folder into a probe database\
+ (probes.sqlite, in the genome folder), to be used with the 'probe_database' parameter",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Build the loci in N processes (large libraries).\nDEFAULT: 1",
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="Streaming design: the loci are built and written one at a time (bounded memory)",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Design the library again even if the same design (same parameters, input files and\
+ seed) was already done in the output folder",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Measure the wall time, CPU time, peak memory and number of items of each stage of the\
+ design, saved in 5_Run_profile.json with the results (slower design)",
+    )
+    parser.add_argument(
+        "--stage_cache",
+        type=Path,
+        metavar="CACHE_FOLDER",
+        help="Keep the result of each design stage in CACHE_FOLDER: the next designs only recompute\
+ the stages downstream of the parameters or input files that changed",
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        metavar="MANIFEST",
+        help="Run several designs in one process: MANIFEST is a folder of parameters .json files\
+ or a .csv file with one design by row. With --workers, N designs are run at the same time",
+    )
+    parser.add_argument(
+        "--sweep",
+        type=Path,
+        metavar="SWEEP_FILE",
+        help="Evaluate the number of probes per locus (or locus sizes) for ranges of start_lib,\
+ resolution and nbr_probe_by_locus given in a .json file, without designing the libraries",
+    )
     return parser.parse_args(command_line)
@@ -0,0 +1,210 @@
+import csv
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from json import JSONDecodeError
+from pathlib import Path
+
+import core.data_function as df
+from core.design_process import design_process
+from core.resource_cache import ResourceCache
+
+BATCH_SUMMARY = "batch_summary.csv"
+BATCH_SUMMARY_HEADER = [
+    "Design",
+    "Status",
+    "Duration (s)",
+    "Nbr_Loci",
+    "Nbr_Probes",
+    "Result_Folder",
+    "Error",
+]
+
+# input files parsed once by process, shared by all the designs the process runs; only the last
+# chromosome used is kept in memory (designs of the same chromosome are better grouped in the
+# manifest)
+RESOURCES = ResourceCache(max_chromosomes=1)
+
+
+def manifest_value(value: str) -> str | int | float | bool | None:
+    """Value of a parameter in a CSV manifest, written as in a json file (10000, true, null...)
+    or as a plain string (chr3L.bed)"""
+    try:
+        return json.loads(value)
+    except JSONDecodeError:
+        return value
+
+
+def design_name(name: str) -> str:
+    """Name of a design usable as a folder name: characters other than letters, digits, '-', '_'
+    and '.' replaced by '_' (no path separator, no hidden or parent folder)"""
+    return re.sub(r"[^\w.-]", "_", name.strip()).lstrip(".")
+
+
+def load_manifest(
+    manifest_path: Path,
+) -> list[tuple[str, Path | dict[str, str | int | float | bool | None]]]:
+    """Reads the designs of a batch: a folder of parameter json files (one design by file, named
+    after the file), or a CSV file with one design by row (parameter names in the header, design
+    names in an optional 'design' column).
+
+    The parameters are only read by each design (see design_parameters), so that an invalid entry
+    fails its design without stopping the batch.
+
+    Args:
+        manifest_path (Path):
+            Folder of json files or CSV file
+
+    Raises:
+        ValueError: several designs have the same name (once cleaned, see design_name)
+
+    Returns:
+        list[tuple[str, Path | dict[str, str | int | float | bool | None]]]:
+            name of each design, with its json file or its parameters as written in the CSV file
+    """
+    if manifest_path.is_dir():
+        designs = [
+            (json_path.stem, json_path)
+            for json_path in sorted(manifest_path.glob("*.json"))
+        ]
+    else:
+        designs = []
+        with open(manifest_path, mode="r", encoding="UTF-8", newline="") as file:
+            for i, row in enumerate(csv.DictReader(file), start=1):
+                name = row.pop("design", None) or f"design_{i}"
+                parameters = {key: manifest_value(value) for key, value in row.items()}
+                designs.append((name, parameters))
+    designs = [
+        (design_name(name) or f"design_{i}", entry)
+        for i, (name, entry) in enumerate(designs, start=1)
+    ]
+    names = [name for name, _ in designs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(
+            f"Batch manifest ({manifest_path.as_posix()}): several designs named "
+            f"{', '.join(duplicates)}."
+        )
+    return designs
+
+
+def design_parameters(
+    entry: Path | dict[str, str | int | float | bool | None],
+) -> dict[str, str | int | Path]:
+    """Parameters of a design of the batch, from its json file or its row of the CSV manifest"""
+    if isinstance(entry, Path):
+        return df.load_parameters(entry)
+    return df.format_parameters(dict(entry))
+
+
+def run_design(
+    name: str,
+    entry: Path | dict[str, str | int | float | bool | None],
+    output_folder: Path,
+    stream: bool,
+    force: bool = False,
+) -> list[str | int]:
+    """Runs one design of a batch in its own folder (output_folder/name). A failing design
+    (including invalid parameters) is reported in the batch summary without stopping the batch.
+
+    Returns:
+        list[str | int]: row of the design in the batch summary
+    """
+    start = time.perf_counter()
+    try:
+        parameters = design_parameters(entry)
+        design_folder = output_folder.joinpath(name)
+        design_folder.mkdir(exist_ok=True)
+        path_result_folder = design_process(
+            design_folder,
+            inputs_parameters=parameters,
+            stream=stream,
+            resources=RESOURCES,
+            force=force,
+        )
+    except Exception as error:
+        duration = f"{time.perf_counter() - start:.2f}"
+        return [
+            name,
+            "failed",
+            duration,
+            "",
+            "",
+            "",
+            f"{type(error).__name__}: {error}",
+        ]
+    duration = f"{time.perf_counter() - start:.2f}"
+    _, loci = df.recover_summary(path_result_folder.joinpath("3_Library_summary.csv"))
+    nbr_probes = sum(int(locus[-1]) for locus in loci)
+    return [
+        name,
+        "done",
+        duration,
+        len(loci),
+        nbr_probes,
+        path_result_folder.as_posix(),
+        "",
+    ]
+
+
+def run_batch(
+    manifest_path: Path,
+    output_folder: Path,
+    workers: int = 1,
+    stream: bool = False,
+    force: bool = False,
+) -> Path:
+    """Runs all the designs of a manifest in a single process (or in a pool of worker processes),
+    the chromosome files, barcodes/RTs and universal primers being parsed once by process.
+
+    Args:
+        manifest_path (Path):
+            Folder of json files or CSV file (see load_manifest)
+        output_folder (Path):
+            Folder of the results: one folder by design and the batch summary
+        workers (int):
+            number of designs run at the same time. Defaults to 1.
+        stream (bool):
+            streaming design of each library (see design_process). Defaults to False.
+        force (bool):
+            design again the libraries already designed (see design_process). Defaults to False.
+
+    Returns:
+        Path: File path of the batch summary
+    """
+    designs = load_manifest(manifest_path)
+    names = [name for name, _ in designs]
+    entries = [entry for _, entry in designs]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(
+                executor.map(
+                    run_design,
+                    names,
+                    entries,
+                    repeat(output_folder),
+                    repeat(stream),
+                    repeat(force),
+                )
+            )
+    else:
+        rows = list(
+            map(
+                run_design,
+                names,
+                entries,
+                repeat(output_folder),
+                repeat(stream),
+                repeat(force),
+            )
+        )
+
+    summary_path = output_folder.joinpath(BATCH_SUMMARY)
+    with open(summary_path, mode="w", encoding="UTF-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(BATCH_SUMMARY_HEADER)
+        writer.writerows(rows)
+    print(f"{len(rows)} designs, summary saved in {summary_path.as_posix()}")
+    return summary_path
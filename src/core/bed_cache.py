@@ -0,0 +1,141 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+
+from core.data_function import iter_bed_records
+from models.probe_set import ProbeSet
+from models.sequence_buffer import SequenceBuffer
+
+# Layout of a cache file (all integers in native byte order):
+#   header : magic, byte order check, number of probes, source size, source mtime, source sha256
+#   body   : starts (q * n), ends (q * n), sequence offsets (q * (n + 1)), sequences blob (ascii)
+CACHE_SUFFIX = ".ldcache"
+CACHE_MAGIC = b"LDTBED01"
+BYTE_ORDER_CHECK = 0x0102030405060708
+HEADER = struct.Struct("=8sqqqq32s")
+
+
+def cache_path_for(bed_path: Path) -> Path:
+    """Returns the path of the binary cache associated with a chromosome file"""
+    return bed_path.with_name(bed_path.name + CACHE_SUFFIX)
+
+
+def file_sha256(path: Path) -> bytes:
+    """Computes the sha256 digest of a file, reading it by blocks"""
+    digest = hashlib.sha256()
+    with open(path, mode="rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def build_bed_cache(bed_path: Path, cache_path: Path = None) -> Path:
+    """One-time conversion of an OligoMiner BED file into a binary cache
+    (coordinates arrays + packed sequences blob), reused by load_bed_cache.
+
+    Args:
+        bed_path (Path):
+            File path of genomic sequences
+        cache_path (Path):
+            File path of the cache. Defaults to the BED path with the '.ldcache' suffix.
+
+    Returns:
+        Path: File path of the cache created
+    """
+    cache_path = cache_path if cache_path else cache_path_for(bed_path)
+    stat = os.stat(bed_path)
+    starts = array("q")
+    ends = array("q")
+    offsets = array("q", [0])
+    blob = bytearray()
+    for start, end, seq in iter_bed_records(bed_path):
+        starts.append(start)
+        ends.append(end)
+        blob += seq.encode("ascii")
+        offsets.append(len(blob))
+
+    header = HEADER.pack(
+        CACHE_MAGIC,
+        BYTE_ORDER_CHECK,
+        len(starts),
+        stat.st_size,
+        stat.st_mtime_ns,
+        file_sha256(bed_path),
+    )
+    # write in a temporary file first so that an interrupted conversion never leaves a broken cache
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, mode="wb") as file:
+        file.write(header)
+        starts.tofile(file)
+        ends.tofile(file)
+        offsets.tofile(file)
+        file.write(blob)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def load_bed_cache(bed_path: Path, cache_path: Path = None) -> ProbeSet | None:
+    """Opens the binary cache of a chromosome file with mmap.
+
+    The cache is only used if it matches the current BED file: same size, and same modification
+    time or, if the file has been touched/copied, same sha256 digest. In the latter case the new
+    modification time is written in the cache header, so that the file is only hashed once.
+
+    Args:
+        bed_path (Path):
+            File path of genomic sequences
+        cache_path (Path):
+            File path of the cache. Defaults to the BED path with the '.ldcache' suffix.
+
+    Returns:
+        ProbeSet | None: probes read from the cache, None if there is no valid cache
+    """
+    cache_path = cache_path if cache_path else cache_path_for(bed_path)
+    if not cache_path.is_file() or not Path(bed_path).is_file():
+        return None
+
+    with open(cache_path, mode="rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return None
+    if len(buffer) < HEADER.size:
+        return None
+    magic, order_check, nbr_probes, src_size, src_mtime, src_sha = HEADER.unpack_from(
+        buffer
+    )
+    if magic != CACHE_MAGIC or order_check != BYTE_ORDER_CHECK:
+        return None
+
+    stat = os.stat(bed_path)
+    if stat.st_size != src_size:
+        return None
+    if stat.st_mtime_ns != src_mtime:
+        if file_sha256(bed_path) != src_sha:
+            return None
+        header = HEADER.pack(
+            magic, order_check, nbr_probes, src_size, stat.st_mtime_ns, src_sha
+        )
+        try:
+            with open(cache_path, mode="r+b") as file:
+                file.write(header)
+        except OSError:
+            # read-only cache: the digest is checked again on the next run
+            pass
+
+    view = memoryview(buffer)
+    item_size = array("q").itemsize
+    starts_pos = HEADER.size
+    ends_pos = starts_pos + nbr_probes * item_size
+    offsets_pos = ends_pos + nbr_probes * item_size
+    blob_pos = offsets_pos + (nbr_probes + 1) * item_size
+    starts = view[starts_pos:ends_pos].cast("q")
+    ends = view[ends_pos:offsets_pos].cast("q")
+    offsets = view[offsets_pos:blob_pos].cast("q")
+    if len(buffer) != blob_pos + offsets[-1]:
+        return None
+    return ProbeSet(starts, ends, SequenceBuffer(view[blob_pos:], offsets))
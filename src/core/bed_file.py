@@ -0,0 +1,41 @@
+import gzip
+from collections.abc import Iterator
+from pathlib import Path
+
+from core import bgzf
+
+
+def supports_random_access(path: Path) -> bool:
+    """Returns True if lines of the chromosome file can be reached directly with an offset
+    (uncompressed BED file or block gzip compressed BED file)"""
+    return not bgzf.is_gzip(path) or bgzf.is_bgzf(path)
+
+
+def iter_bed_lines(path: Path, offset: int = 0) -> Iterator[tuple[int, bytes]]:
+    """Reads the lines of a chromosome file, uncompressed (.bed) or compressed (.bed.gz).
+
+    Offsets are byte offsets for an uncompressed file and virtual offsets for a block gzip
+    compressed file (bgzip). A plain gzip file can only be read from the start.
+
+    Args:
+        path (Path): File path of genomic sequences
+        offset (int): offset of the first line to read. Defaults to 0.
+
+    Yields:
+        tuple[int, bytes]: offset and content of each line
+    """
+    if not bgzf.is_gzip(path):
+        with open(path, mode="rb") as file:
+            file.seek(offset)
+            for line in file:
+                yield offset, line
+                offset += len(line)
+    elif bgzf.is_bgzf(path):
+        yield from bgzf.iter_lines(path, offset)
+    else:
+        if offset:
+            raise ValueError(f"{path} is not block gzip compressed (bgzip)")
+        with gzip.open(path, mode="rb") as file:
+            for line in file:
+                yield offset, line
+                offset += len(line)
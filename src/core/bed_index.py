@@ -0,0 +1,166 @@
+import hashlib
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from core.bed_file import iter_bed_lines
+
+# Layout of an index file (all integers in native byte order):
+#   header : magic, byte order check, source size, source mtime, step, number of entries
+#   body   : start coordinates (q * n), offsets (q * n) of every step-th record
+INDEX_SUFFIX = ".ldidx"
+INDEX_MAGIC = b"LDTIDX01"
+INDEX_STEP = 1024
+BYTE_ORDER_CHECK = 0x0102030405060708
+HEADER = struct.Struct("=8sqqqqq")
+# chromosome files of the package (not written to), their indexes are kept in the user cache folder
+RESOURCES_FOLDER = Path(__file__).absolute().parents[1].joinpath("resources")
+
+
+class BedIndex:
+    """Start coordinate and offset of every Nth record of a chromosome file.
+    Offsets are byte offsets, or virtual offsets for a block gzip compressed file.
+
+    Args:
+        starts (array): start coordinates of the indexed records (sorted)
+        offsets (array): offsets of the indexed records in the chromosome file
+    """
+
+    __slots__ = ("starts", "offsets")
+
+    def __init__(self, starts: array, offsets: array) -> None:
+        self.starts = starts
+        self.offsets = offsets
+
+    def offset_before(self, start: int) -> int:
+        """Returns the offset from which all records starting at `start` or after are read
+
+        Args:
+            start (int): coordinate (in bp)
+
+        Returns:
+            int: offset of the last indexed record starting strictly before `start`
+        """
+        position = bisect_left(self.starts, start) - 1
+        return self.offsets[position] if position >= 0 else 0
+
+
+def index_cache_folder() -> Path:
+    """Returns the user cache folder of the indexes ($XDG_CACHE_HOME or ~/.cache)"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home().joinpath(".cache")
+    return Path(cache_home).joinpath("library_design", "bed_index")
+
+
+def index_path_for(bed_path: Path) -> Path:
+    """Returns the path of the index associated with a chromosome file: a sidecar file next to
+    the chromosome file, or a file of the user cache folder (named after the chromosome file path)
+    when the chromosome folder is read-only or is the resources folder of the package"""
+    bed_path = Path(bed_path).absolute()
+    folder = bed_path.parent
+    if folder.resolve() != RESOURCES_FOLDER.resolve() and os.access(folder, os.W_OK):
+        return bed_path.with_name(bed_path.name + INDEX_SUFFIX)
+    path_key = hashlib.sha256(bed_path.as_posix().encode("UTF-8")).hexdigest()[:16]
+    return index_cache_folder().joinpath(f"{bed_path.name}.{path_key}{INDEX_SUFFIX}")
+
+
+def build_bed_index(bed_path: Path, step: int = INDEX_STEP) -> BedIndex:
+    """Records the start coordinate and the offset of every `step`-th record of a chromosome file
+
+    Args:
+        bed_path (Path): File path of genomic sequences
+        step (int): number of records between two indexed records
+
+    Returns:
+        BedIndex: index of the chromosome file
+    """
+    starts = array("q")
+    offsets = array("q")
+    for line_n, (offset, line) in enumerate(iter_bed_lines(bed_path)):
+        if line_n % step == 0:
+            starts.append(int(line.split(b"\t", 2)[1]))
+            offsets.append(offset)
+    return BedIndex(starts, offsets)
+
+
+def save_bed_index(bed_path: Path, index: BedIndex, step: int = INDEX_STEP) -> None:
+    """Writes the index next to the chromosome file, or in the user cache folder (see
+    index_path_for)"""
+    stat = os.stat(bed_path)
+    index_path = index_path_for(bed_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, mode="wb") as file:
+        file.write(
+            HEADER.pack(
+                INDEX_MAGIC,
+                BYTE_ORDER_CHECK,
+                stat.st_size,
+                stat.st_mtime_ns,
+                step,
+                len(index.starts),
+            )
+        )
+        index.starts.tofile(file)
+        index.offsets.tofile(file)
+    os.replace(tmp_path, index_path)
+
+
+def load_bed_index(bed_path: Path) -> BedIndex | None:
+    """Reads the sidecar index of a chromosome file
+
+    Args:
+        bed_path (Path): File path of genomic sequences
+
+    Returns:
+        BedIndex | None: the index, None if there is no index up to date with the chromosome file
+    """
+    index_path = index_path_for(bed_path)
+    if not index_path.is_file():
+        return None
+    stat = os.stat(bed_path)
+    with open(index_path, mode="rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, order_check, src_size, src_mtime, step, nbr_entries = HEADER.unpack(
+            header
+        )
+        if (
+            magic != INDEX_MAGIC
+            or order_check != BYTE_ORDER_CHECK
+            or src_size != stat.st_size
+            or src_mtime != stat.st_mtime_ns
+        ):
+            return None
+        starts = array("q")
+        offsets = array("q")
+        try:
+            starts.fromfile(file, nbr_entries)
+            offsets.fromfile(file, nbr_entries)
+        except EOFError:
+            return None
+    return BedIndex(starts, offsets)
+
+
+def get_bed_index(bed_path: Path) -> BedIndex:
+    """Returns the index of a chromosome file, building it on first use.
+    The index is saved next to the chromosome file, or in the user cache folder for a read-only
+    folder or the resources folder of the package (see index_path_for). If it cannot be saved, it
+    is only kept for the current run.
+
+    Args:
+        bed_path (Path): File path of genomic sequences
+
+    Returns:
+        BedIndex: index of the chromosome file
+    """
+    index = load_bed_index(bed_path)
+    if index is None:
+        index = build_bed_index(bed_path)
+        try:
+            save_bed_index(bed_path, index)
+        except OSError:
+            pass
+    return index
@@ -0,0 +1,130 @@
+import struct
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+# BGZF (block gzip, as produced by bgzip) is a series of gzip members of at most 64 KB of data, with
+# the compressed size of each block stored in a 'BC' extra subfield. A position in the uncompressed
+# data is given by a virtual offset: (block offset in the file << 16) | offset within the block.
+GZIP_MAGIC = b"\x1f\x8b"
+FLAG_EXTRA = 4
+GZIP_HEADER = struct.Struct("<4BI2BH")
+BLOCK_MAX_DATA = 0xFF00
+EOF_BLOCK = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+
+def is_gzip(path: Path) -> bool:
+    """Returns True if the file is gzip compressed (plain gzip or BGZF)"""
+    with open(path, mode="rb") as file:
+        return file.read(2) == GZIP_MAGIC
+
+
+def is_bgzf(path: Path) -> bool:
+    """Returns True if the file is block gzip compressed (bgzip), allowing random access"""
+    with open(path, mode="rb") as file:
+        return read_block_size(file) is not None
+
+
+def read_block_size(file: BinaryIO) -> int | None:
+    """Reads the header of a BGZF block at the current position of the file
+
+    Returns:
+        int | None: total size of the block (in bytes), None if it is not a BGZF block
+    """
+    header = file.read(GZIP_HEADER.size)
+    if len(header) < GZIP_HEADER.size or header[:2] != GZIP_MAGIC:
+        return None
+    _, _, _, flags, _, _, _, extra_length = GZIP_HEADER.unpack(header)
+    if not flags & FLAG_EXTRA:
+        return None
+    extra = file.read(extra_length)
+    position = 0
+    while position + 4 <= len(extra):
+        sub_id = extra[position : position + 2]
+        (sub_length,) = struct.unpack_from("<H", extra, position + 2)
+        if sub_id == b"BC" and sub_length == 2:
+            return struct.unpack_from("<H", extra, position + 4)[0] + 1
+        position += 4 + sub_length
+    return None
+
+
+def read_block(file: BinaryIO) -> bytes | None:
+    """Reads and inflates the BGZF block at the current position of the file
+
+    Returns:
+        bytes | None: uncompressed data of the block, None at the end of the file
+    """
+    block_start = file.tell()
+    block_size = read_block_size(file)
+    if block_size is None:
+        return None
+    header_size = file.tell() - block_start
+    compressed = file.read(block_size - header_size)
+    # the last 8 bytes of the block are the crc32 and the size of the uncompressed data
+    return zlib.decompress(compressed[:-8], wbits=-15)
+
+
+def iter_lines(path: Path, virtual_offset: int = 0) -> Iterator[tuple[int, bytes]]:
+    """Reads the lines of a BGZF file from a virtual offset, inflating only the blocks read.
+
+    Args:
+        path (Path): File path of the BGZF file
+        virtual_offset (int): virtual offset of the first line to read. Defaults to 0.
+
+    Yields:
+        tuple[int, bytes]: virtual offset and content of each line
+    """
+    block_offset = virtual_offset >> 16
+    position = virtual_offset & 0xFFFF
+    pending = b""
+    pending_offset = None
+    with open(path, mode="rb") as file:
+        file.seek(block_offset)
+        while True:
+            block_offset = file.tell()
+            data = read_block(file)
+            if data is None:
+                break
+            while position < len(data):
+                line_end = data.find(b"\n", position)
+                if line_end == -1:
+                    # the line continues in the next block
+                    if not pending:
+                        pending_offset = (block_offset << 16) | position
+                    pending += data[position:]
+                    break
+                line = data[position : line_end + 1]
+                if pending:
+                    yield pending_offset, pending + line
+                    pending = b""
+                else:
+                    yield (block_offset << 16) | position, line
+                position = line_end + 1
+            position = 0
+    if pending:
+        yield pending_offset, pending
+
+
+def compress_file(source_path: Path, bgzf_path: Path) -> Path:
+    """Compresses a file in BGZF format (equivalent to 'bgzip -c source > dest')
+
+    Args:
+        source_path (Path): File path of the uncompressed file
+        bgzf_path (Path): File path of the compressed file
+
+    Returns:
+        Path: File path of the compressed file
+    """
+    with open(source_path, mode="rb") as source, open(bgzf_path, mode="wb") as dest:
+        for data in iter(lambda: source.read(BLOCK_MAX_DATA), b""):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+            dest.write(
+                GZIP_HEADER.pack(0x1F, 0x8B, 8, FLAG_EXTRA, 0, 0, 0xFF, 6)
+                + struct.pack("<2sHH", b"BC", 2, len(compressed) + 25)
+                + compressed
+                + struct.pack("<II", zlib.crc32(data), len(data))
+            )
+        dest.write(EOF_BLOCK)
+    return bgzf_path
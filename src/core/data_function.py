@@ -1,8 +1,19 @@
 import json
+from collections.abc import Iterator
+from contextlib import contextmanager
 from json import JSONDecodeError
 from pathlib import Path
+from typing import TextIO
 
+from core.bed_file import iter_bed_lines, supports_random_access
+from core.bed_index import get_bed_index
 from models.library import Library
+from models.locus import Locus
+from models.probe import as_batch
+
+SUMMARY_HEADER = (
+    "Chromosome,Locus_N°,Start,End,Region size, Barcode,PU.Fw,PU.Rev,Nbr_Probes\n"
+)
 
 
 def load_parameters(json_path: Path) -> dict[str, str | int | Path]:
@@ -15,39 +26,59 @@ def load_parameters(json_path: Path) -> dict[str, str | int | Path]:
     Returns:
         dict[str, str | int | Path]: dictionary containing parameters for library design
     """
-    primer_univ_file = "Primer_univ.csv"
-    src_folder = Path(__file__).absolute().parents[1]
-
     with open(json_path, mode="r", encoding="UTF-8") as file:
         try:
             input_param = json.load(file)
         except JSONDecodeError:
             print("The parameter file is not a Json file")
+            raise
+        return format_parameters(input_param)
+
+
+def format_parameters(
+    input_param: dict[str, str | int],
+) -> dict[str, str | int | Path]:
+    """Completes the parameters read from a parameter file (json file or batch manifest row) with
+    the paths of the files used by the design
+
+    Args:
+        input_param (dict[str, str | int]):
+            parameters as written in the parameter file
+
+    Returns:
+        dict[str, str | int | Path]: dictionary containing parameters for library design
+    """
+    primer_univ_file = "Primer_univ.csv"
+    src_folder = Path(__file__).absolute().parents[1]
 
-        input_param["end_lib"] = input_param["start_lib"] + (
-            input_param["nbr_loci_total"] * input_param["resolution"]
-        )
-        input_param["resources_path"] = src_folder.joinpath("resources")
-
-        #Adds a default path for the chromosome folder when this is not specified in input_parameters.json
-        #(when using the script for a test)
-        if input_param["chromosome_folder"]:
-            input_param["chromosome_folder"] = Path(input_param["chromosome_folder"])
-            input_param["genomic_path"] = input_param["chromosome_folder"].joinpath(
-                input_param["chromosome_file"])
-        else:
-            input_param["chromosome_folder"] = input_param["resources_path"]
-            input_param["genomic_path"] = input_param["chromosome_folder"].joinpath(
-                input_param["chromosome_file"])
-
-        input_param["bcd_rt_path"] = input_param["resources_path"].joinpath(
-            input_param["bcd_rt_file"]
-        )
-        input_param["primer_univ_file"] = primer_univ_file
-        input_param["primer_univ_path"] = input_param["resources_path"].joinpath(
-            input_param["primer_univ_file"]
-        )
-        return input_param
+    input_param["end_lib"] = input_param["start_lib"] + (
+        input_param["nbr_loci_total"] * input_param["resolution"]
+    )
+    input_param["resources_path"] = src_folder.joinpath("resources")
+
+    #Adds a default path for the chromosome folder when this is not specified in input_parameters.json
+    #(when using the script for a test)
+    if input_param["chromosome_folder"]:
+        input_param["chromosome_folder"] = Path(input_param["chromosome_folder"])
+        input_param["genomic_path"] = input_param["chromosome_folder"].joinpath(
+            input_param["chromosome_file"])
+    else:
+        input_param["chromosome_folder"] = input_param["resources_path"]
+        input_param["genomic_path"] = input_param["chromosome_folder"].joinpath(
+            input_param["chromosome_file"])
+
+    # Optional probe database built from a whole genome folder (see probe_database.py)
+    if input_param.get("probe_database"):
+        input_param["probe_database"] = Path(input_param["probe_database"])
+
+    input_param["bcd_rt_path"] = input_param["resources_path"].joinpath(
+        input_param["bcd_rt_file"]
+    )
+    input_param["primer_univ_file"] = primer_univ_file
+    input_param["primer_univ_path"] = input_param["resources_path"].joinpath(
+        input_param["primer_univ_file"]
+    )
+    return input_param
 
 
 def universal_primer_format(path: Path) -> dict[str, list[str]]:
@@ -94,12 +125,126 @@ def seq_genomic_format(path: Path) -> list[int, int, str]:
     Returns:
         list[int, int, str]: sequence of genomic DNA with coordinates
     """
-    seq_genomic_list = []
-    with open(path, mode="r", encoding="UTF-8") as file:
-        for line in file:
-            data = line.split("\t")
-            seq_genomic_list.append([int(data[1]), int(data[2]), data[3]])
-    return seq_genomic_list
+    return [list(record) for record in iter_bed_records(path)]
+
+
+def iter_bed_records(path: Path, offset: int = 0) -> Iterator[tuple[int, int, str]]:
+    """Reads the genomic sequences of a chromosome file line by line.
+
+    Args:
+        path (Path): File path of genomic sequences (.bed or .bed.gz)
+        offset (int): offset of the first line to read (see bed_file.iter_bed_lines). Defaults to 0.
+
+    Yields:
+        tuple[int, int, str]: start, end and sequence of each genomic probe
+    """
+    for _, line in iter_bed_lines(path, offset):
+        data = line.split(b"\t")
+        yield int(data[1]), int(data[2]), data[3].decode("UTF-8")
+
+
+def iter_bed_bases(path: Path) -> Iterator[tuple[int, int, bytes]]:
+    """Reads the genomic sequences of a chromosome file line by line, without decoding the bases
+
+    Args:
+        path (Path): File path of genomic sequences (.bed or .bed.gz)
+
+    Yields:
+        tuple[int, int, bytes]: start, end and bases (ascii) of each genomic probe
+    """
+    for _, line in iter_bed_lines(path):
+        data = line.split(b"\t")
+        yield int(data[1]), int(data[2]), data[3]
+
+
+def chromosome_range(path: Path) -> tuple[int, int] | None:
+    """Coordinates covered by the genomic sequences of a chromosome file
+
+    Args:
+        path (Path): File path of genomic sequences (.bed or .bed.gz, sorted by coordinates)
+
+    Returns:
+        tuple[int, int] | None: start of the first sequence and end of the last one, None if the
+        file has no sequence
+    """
+    first_start = last_end = None
+    for start, end, _ in iter_bed_records(path):
+        if first_start is None:
+            first_start = start
+        last_end = end
+    return None if first_start is None else (first_start, last_end)
+
+
+def seq_genomic_window(
+    path: Path,
+    start_lib: int,
+    end_lib: int,
+    design_type: str,
+    nbr_probes_max: int = None,
+    use_index: bool = True,
+) -> Iterator[list[int, int, str]]:
+    """Streams the genomic sequences of the library window only, instead of loading the whole
+    chromosome file: sequences located before start_lib are skipped and reading stops as soon as
+    the library end is passed (end_lib for a design by locus length, nbr_probes_max sequences
+    for a design by number of probes).
+
+    Args:
+        path (Path):
+            File path of genomic sequences (.bed or .bed.gz, sorted by coordinates)
+        start_lib (int):
+            Start coordinate of the library
+        end_lib (int):
+            End coordinate of the library (design by locus length)
+        design_type (str):
+            'locus_length' or 'nbr_probes'
+        nbr_probes_max (int):
+            Number of sequences of the library (design by number of probes)
+        use_index (bool):
+            Seek directly close to start_lib with the sidecar index of the chromosome file
+            (built on first use). For a block gzip compressed file, only the blocks of the
+            library window are inflated. Ignored for a plain gzip file. Defaults to True.
+
+    Yields:
+        list[int, int, str]: sequence of genomic DNA with coordinates
+    """
+    offset = 0
+    if use_index and supports_random_access(path):
+        offset = get_bed_index(path).offset_before(start_lib)
+    nbr_probes = 0
+    for start, end, seq in iter_bed_records(path, offset):
+        if start < start_lib:
+            continue
+        if design_type == "locus_length":
+            if start > end_lib:
+                return
+            if end <= end_lib:
+                yield [start, end, seq]
+        elif design_type == "nbr_probes":
+            if nbr_probes >= nbr_probes_max:
+                return
+            nbr_probes += 1
+            yield [start, end, seq]
+
+
+def write_locus_details(file: TextIO, locus: Locus) -> None:
+    """Writes the information and the primary probes (parts separated by spaces) of a locus"""
+    file.write(f"Chromosome: {locus.chr_name} Locus_N°{locus.locus_n}\
+Start:{locus.start_seq} End:{locus.end_seq} Bcd_locus:{locus.bcd_locus}\n")
+    for probe in as_batch(locus.seq_probe).spaced():
+        file.write(f"{probe}\n")
+
+
+def write_locus_sequences(file: TextIO, locus: Locus) -> None:
+    """Writes the raw sequences of the primary probes of a locus"""
+    for probe in as_batch(locus.seq_probe).raw():
+        file.write(f"{probe}\n")
+
+
+def write_locus_summary(file: TextIO, locus: Locus) -> None:
+    """Writes the summary line of a locus"""
+    file.write(f"{locus.chr_name},{locus.locus_n},{locus.start_seq},\
+{locus.end_seq},{locus.end_seq - locus.start_seq},{locus.bcd_locus},{locus.primers_univ[0]},\
+{locus.primers_univ[2]},{len(locus.seq_probe)}\n")
 
 
 def result_details_file(path_result_folder: Path, library: Library) -> None:
@@ -114,12 +259,7 @@ def result_details_file(path_result_folder: Path, library: Library) -> None:
     result_details = path_result_folder.joinpath("1_Library_details.txt")
     with open(result_details, mode="w", encoding="UTF-8") as file:
         for locus in library.loci_list:
-            file.write(
-                f"Chromosome: {locus.chr_name} Locus_N°{locus.locus_n}\
-Start:{locus.start_seq} End:{locus.end_seq} Bcd_locus:{locus.bcd_locus}\n"
-            )
-            for seq in locus.seq_probe:
-                file.write(seq + "\n")
+            write_locus_details(file, locus)
 
 
 def full_sequences_file(path_result_folder: Path, library: Library) -> None:
@@ -134,8 +274,7 @@ def full_sequences_file(path_result_folder: Path, library: Library) -> None:
     full_sequence = path_result_folder.joinpath("2_Full_sequence_Only.txt")
     with open(full_sequence, mode="w", encoding="UTF-8") as file:
         for locus in library.loci_list:
-            for seq in locus.seq_probe:
-                file.write(seq.replace(" ", "") + "\n")
+            write_locus_sequences(file, locus)
 
 
 def library_summary_file(path_result_folder: Path, library: Library) -> None:
@@ -151,15 +290,34 @@ def library_summary_file(path_result_folder: Path, library: Library) -> None:
 
     summary = path_result_folder.joinpath("3_Library_summary.csv")
     with open(summary, mode="w", encoding="UTF-8") as file:
-        file.write(
-            "Chromosome,Locus_N°,Start,End,Region size, Barcode,PU.Fw,PU.Rev,Nbr_Probes\n"
-        )
+        file.write(SUMMARY_HEADER)
         for locus in library.loci_list:
-            file.write(
-                f"{locus.chr_name},{locus.locus_n},{locus.start_seq},\
-{locus.end_seq},{locus.end_seq - locus.start_seq},{locus.bcd_locus},{locus.primers_univ[0]},\
-{locus.primers_univ[2]},{len(locus.seq_probe)}\n"
-            )
+            write_locus_summary(file, locus)
+
+
+@contextmanager
+def open_result_files(
+    path_result_folder: Path,
+) -> Iterator[tuple[TextIO, TextIO, TextIO]]:
+    """Opens the details, full sequences and summary result files together, so that the loci can
+    be appended one at a time (streaming design, see write_locus_details, write_locus_sequences
+    and write_locus_summary).
+
+    Args:
+        path_result_folder (Path):
+            Folder path for results files
+
+    Yields:
+        tuple[TextIO, TextIO, TextIO]: details file, full sequences file, summary file
+    """
+    details_path = path_result_folder.joinpath("1_Library_details.txt")
+    sequences_path = path_result_folder.joinpath("2_Full_sequence_Only.txt")
+    summary_path = path_result_folder.joinpath("3_Library_summary.csv")
+    with open(details_path, mode="w", encoding="UTF-8") as details:
+        with open(sequences_path, mode="w", encoding="UTF-8") as sequences:
+            with open(summary_path, mode="w", encoding="UTF-8") as summary:
+                summary.write(SUMMARY_HEADER)
+                yield details, sequences, summary
 
 
 def save_parameters(
@@ -175,15 +333,9 @@ def save_parameters(
     """
     parameters_file_path = path_result_folder.joinpath("4-OutputParameters.json")
     # Convert all Path  object in str (Object of type PosixPath is not JSON serializable)
-    out_parameters["genomic_path"] = out_parameters["genomic_path"].as_posix()
-    out_parameters["resources_path"] = out_parameters["resources_path"].as_posix()
-    out_parameters["bcd_rt_path"] = out_parameters["bcd_rt_path"].as_posix()
-    out_parameters["primer_univ_path"] = out_parameters["primer_univ_path"].as_posix()
-    out_parameters["output_folder"] = out_parameters["output_folder"].as_posix()
-    out_parameters["path_result_folder"] = out_parameters[
-        "path_result_folder"
-    ].as_posix()
-    out_parameters["chromosome_folder"] = out_parameters["chromosome_folder"].as_posix()
+    for name, value in out_parameters.items():
+        if isinstance(value, Path):
+            out_parameters[name] = value.as_posix()
 
     path_str = path_result_folder.as_posix()
     with open(parameters_file_path, mode="w", encoding="UTF-8") as file:
@@ -0,0 +1,183 @@
+import shutil
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from core.run_profile import RunProfile
+from models.designCancelledException import DesignCancelledException
+from models.locus import Locus
+
+STAGE_STARTED = "stage_started"
+STAGE_FINISHED = "stage_finished"
+LOCUS_DONE = "locus_done"
+FILE_WRITTEN = "file_written"
+
+
+class DesignEvent:
+    """Progress of a design, sent to the event callback of design_process
+
+    Attributes:
+    -----------
+        kind (str):
+            STAGE_STARTED, STAGE_FINISHED, LOCUS_DONE or FILE_WRITTEN
+        stage (str):
+            name of the stage of the design
+        current (int):
+            number of the locus processed (LOCUS_DONE). Defaults to None.
+        total (int):
+            number of loci of the library (LOCUS_DONE), or number of items processed by the
+            stage (STAGE_FINISHED). Defaults to None.
+        path (Path):
+            File path of the file written (FILE_WRITTEN). Defaults to None.
+        nbr_bytes (int):
+            size of the file written (FILE_WRITTEN). Defaults to None.
+    """
+
+    __slots__ = ("kind", "stage", "current", "total", "path", "nbr_bytes")
+
+    def __init__(
+        self,
+        kind: str,
+        stage: str,
+        current: int = None,
+        total: int = None,
+        path: Path = None,
+        nbr_bytes: int = None,
+    ) -> None:
+        self.kind = kind
+        self.stage = stage
+        self.current = current
+        self.total = total
+        self.path = path
+        self.nbr_bytes = nbr_bytes
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self.__slots__
+            if getattr(self, name) is not None
+        )
+        return f"DesignEvent({values})"
+
+
+class CancellationToken:
+    """Request of cancellation of a design, set from another thread (GUI, batch runner...) and
+    checked by the design between two stages or two loci
+
+    Attributes:
+    -----------
+        event (threading.Event):
+            set when the cancellation is requested
+    """
+
+    __slots__ = ("event",)
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+
+    def cancel(self) -> None:
+        """Requests the cancellation of the design"""
+        self.event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+
+class DesignMonitor:
+    """Observation of a running design: measures of the stages (RunProfile), events sent to a
+    callback and cancellation checked between the stages and between the loci.
+
+    A cancelled design raises DesignCancelledException, after removing the results folder of the
+    design if it was already created (no partial results are left).
+
+    Attributes:
+    -----------
+        profile (RunProfile):
+            measures of the stages of the design
+        on_event (Callable[[DesignEvent], None]):
+            function called with each event of the design (None if the events are not followed)
+        cancel_token (CancellationToken):
+            cancellation request of the design (None if the design cannot be cancelled)
+        nbr_loci (int):
+            number of loci of the library
+        stage_name (str):
+            name of the running stage
+    """
+
+    __slots__ = ("profile", "on_event", "cancel_token", "nbr_loci", "stage_name")
+
+    def __init__(
+        self,
+        profile: RunProfile,
+        on_event: Callable[[DesignEvent], None] = None,
+        cancel_token: CancellationToken = None,
+        nbr_loci: int = None,
+    ) -> None:
+        self.profile = profile
+        self.on_event = on_event
+        self.cancel_token = cancel_token
+        self.nbr_loci = nbr_loci
+        self.stage_name = None
+
+    def emit(self, event: DesignEvent) -> None:
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def check_cancelled(self) -> None:
+        """Raises DesignCancelledException if the cancellation of the design was requested"""
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise DesignCancelledException(self.stage_name)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict[str, str | int | float]]:
+        """Stage of the design: cancellation checked before the stage, events sent at the start
+        and at the end of the stage, and stage measured (see RunProfile.stage)
+
+        Args:
+            name (str): name of the stage
+
+        Yields:
+            dict[str, str | int | float]:
+                measures of the stage, where the number of items processed can be set ('items')
+        """
+        self.stage_name = name
+        self.check_cancelled()
+        self.emit(DesignEvent(STAGE_STARTED, name))
+        with self.profile.stage(name) as record:
+            yield record
+        self.emit(DesignEvent(STAGE_FINISHED, name, total=record.get("items")))
+
+    def locus_done(self, locus: Locus) -> None:
+        """A locus was processed by the running stage: event sent and cancellation checked"""
+        self.emit(
+            DesignEvent(
+                LOCUS_DONE, self.stage_name, current=locus.locus_n, total=self.nbr_loci
+            )
+        )
+        self.check_cancelled()
+
+    def track(self, loci: Iterable[Locus]) -> Iterator[Locus]:
+        """Loci of a streaming stage, a LOCUS_DONE event being sent once each locus is processed"""
+        for locus in loci:
+            yield locus
+            self.locus_done(locus)
+
+    def file_written(self, path: Path) -> None:
+        """A result file of the design was written"""
+        self.emit(
+            DesignEvent(
+                FILE_WRITTEN, self.stage_name, path=path, nbr_bytes=path.stat().st_size
+            )
+        )
+
+    @contextmanager
+    def results(self, path_result_folder: Path) -> Iterator[None]:
+        """Writing of the results of the design: the results folder is removed if the design is
+        cancelled"""
+        try:
+            yield
+        except DesignCancelledException:
+            shutil.rmtree(path_result_folder, ignore_errors=True)
+            raise
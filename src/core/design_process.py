@@ -1,17 +1,57 @@
 import copy
 import datetime as dt
+from collections.abc import Callable, Iterable
+from functools import partial
+from itertools import islice
 from pathlib import Path
 
 import core.data_function as df
+from core.bed_cache import load_bed_cache
+from core.probe_database import (
+    chromosome_range_database,
+    database_chromosome,
+    seq_genomic_database,
+)
+from core.resource_cache import ResourceCache
+from core.result_index import (
+    FILE_DIGESTS,
+    design_digest,
+    file_digest,
+    find_result,
+    load_file_digests,
+    record_result,
+    save_file_digests,
+)
+from core.design_events import CancellationToken, DesignEvent, DesignMonitor
+from core.run_profile import RunProfile
 from core.function import print_sample, print_dashline, graph_locus_info
-from models.locus import check_locus_rt_bcd
-from models.locus import Locus
+from core.locus_design import (
+    add_primers,
+    add_readouts,
+    design_loci,
+    design_loci_parallel,
+    iter_design_loci,
+    select_loci,
+)
+from core.stage_cache import StageCache
+from models.locus import Locus, check_locus_rt_bcd
 from models.library import Library
+from models.probe_set import ProbeSet
 
 
 def design_process(
-    output_folder: Path, json_path: Path = None, inputs_parameters=None
-) -> None:
+    output_folder: Path,
+    json_path: Path = None,
+    inputs_parameters=None,
+    workers: int = 1,
+    stream: bool = False,
+    resources: ResourceCache = None,
+    stage_cache: StageCache = None,
+    force: bool = False,
+    profile: bool = False,
+    on_event: Callable[[DesignEvent], None] = None,
+    cancel_token: CancellationToken = None,
+) -> Path:
     """All process to design a librairy from parameters
 
     Args:
@@ -21,6 +61,32 @@ def design_process(
             input_parameters.json path
         inputs_parameters(dict[str, str | int | Path]):
             dictionary containing parameters
+        workers (int):
+            number of processes building the loci. Defaults to 1 (no worker process).
+        stream (bool):
+            streaming design, the loci are built, completed and written one at a time instead of
+            holding the whole library in memory. Defaults to False.
+        resources (ResourceCache):
+            input files already parsed, shared with other designs (batch mode). Defaults to None.
+        stage_cache (StageCache):
+            results of the stages of the previous designs: only the stages whose inputs changed
+            are computed again (in-memory design only). Defaults to None.
+        force (bool):
+            design the library even if the same design (same parameters, input files and seed)
+            was already done in the output folder. Defaults to False.
+        profile (bool):
+            measure the wall time, CPU time, peak memory and number of items of each stage, saved
+            in the 5_Run_profile.json file of the results. Defaults to False.
+        on_event (Callable[[DesignEvent], None]):
+            function called with the progress of the design: stages started and finished, loci
+            processed, files written (see DesignEvent). Defaults to None.
+        cancel_token (CancellationToken):
+            cancellation request of the design, checked between two stages or two loci: a
+            cancelled design raises DesignCancelledException and leaves no results folder.
+            Defaults to None.
+
+    Returns:
+        Path: folder of the results files
 
     """
     src_folder_path = Path(__file__).absolute().parents[1]
@@ -38,21 +104,133 @@ def design_process(
     if not result_folder.exists():
         result_folder.mkdir()
 
+    # ---------------------------------------------------------------------------------------------
+    #               Results of a previous identical design (same seed given) reused
+    # ---------------------------------------------------------------------------------------------
+    # only a design with a given seed can be reused, the input files are not read to identify a
+    # design without seed (digest of the whole chromosome file or probe database). Digests of the
+    # input files saved by the previous designs of the results folder: unchanged input files are
+    # not read again to identify the design
+    digests = stage_cache.digests if stage_cache is not None else FILE_DIGESTS
+    if parameters.get("seed") is not None:
+        load_file_digests(result_folder, digests)
+    digest = partial(file_digest, digests=digests)
+    if parameters.get("seed") is not None and not force:
+        path_result_folder = find_result(
+            result_folder, design_digest(parameters, parameters["seed"], digest)
+        )
+        save_file_digests(result_folder, digests)
+        if path_result_folder is not None:
+            print(
+                f"Same design as {path_result_folder}: results reused (--force to design again)"
+            )
+            parameters["path_result_folder"] = path_result_folder
+            if profile:
+                print("Run profile : not measured, no stage of the design was run")
+            return path_result_folder
+    monitor = DesignMonitor(
+        RunProfile(enabled=profile),
+        on_event,
+        cancel_token,
+        nbr_loci=parameters["nbr_loci_total"],
+    )
+    try:
+        return design_library(
+            parameters,
+            result_folder,
+            workers,
+            stream,
+            resources,
+            stage_cache,
+            digests,
+            monitor,
+        )
+    finally:
+        # memory tracing stopped even if the design failed or was cancelled
+        monitor.profile.close()
+
+
+def design_library(
+    parameters: dict[str, str | int | Path],
+    result_folder: Path,
+    workers: int,
+    stream: bool,
+    resources: ResourceCache,
+    stage_cache: StageCache,
+    digests: dict[tuple[str, int, int], str],
+    monitor: DesignMonitor,
+) -> Path:
+    """Design of a library and writing of its results files (see design_process)
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        result_folder (Path):
+            folder of the results folders of the designs (Library_Design_Results)
+        workers (int):
+            number of processes building the loci
+        stream (bool):
+            streaming design
+        resources (ResourceCache):
+            input files already parsed, shared with other designs (None if not shared)
+        stage_cache (StageCache):
+            results of the stages of the previous designs (None if not cached)
+        digests (dict[tuple[str, int, int], str]):
+            digests of the input files, to record the design in the results index (see
+            file_digest)
+        monitor (DesignMonitor):
+            measures, events and cancellation of the design
+
+    Returns:
+        Path: folder of the results files
+    """
+
     # ---------------------------------------------------------------------------------------------
     #                           Formatting and storage of sequences
     #               (primers, TRs, barcodes, genomics) in corresponding variables
     # ---------------------------------------------------------------------------------------------
 
     # Opening and formatting barcodes or RTs in the bcd_RT variable:
-    bcd_rt_list = df.bcd_rt_format(parameters["bcd_rt_path"])
-
-    # Opening and formatting the coordinates and genomic sequences of in the list_seq_genomic variable :
-    list_seq_genomic = df.seq_genomic_format(parameters["genomic_path"])
+    with monitor.stage("barcodes/RTs load") as record:
+        if resources is not None:
+            bcd_rt_list = resources.get(parameters["bcd_rt_path"], df.bcd_rt_format)
+        else:
+            bcd_rt_list = df.bcd_rt_format(parameters["bcd_rt_path"])
+        record["items"] = len(bcd_rt_list)
+
+    with monitor.stage("genomic load") as record:
+        if stage_cache is not None and not stream:
+            # in-memory design stage by stage: the library window is the result of the 'load'
+            # stage
+            load_key, list_seq_genomic = load_stage(parameters, resources, stage_cache)
+            genomic_window = None
+        else:
+            list_seq_genomic, genomic_window = load_genomic(
+                parameters, resources, stream
+            )
+        if list_seq_genomic is not None:
+            record["items"] = len(list_seq_genomic)
 
     # Opening and formatting universal primers in the primer_univ variable :
-    primer_univ_list = df.universal_primer_format(parameters["primer_univ_path"])
+    with monitor.stage("universal primers load") as record:
+        if resources is not None:
+            primer_univ_list = resources.get(
+                parameters["primer_univ_path"], df.universal_primer_format
+            )
+        else:
+            primer_univ_list = df.universal_primer_format(
+                parameters["primer_univ_path"]
+            )
+        record["items"] = len(primer_univ_list)
 
-    print_sample(list_seq_genomic, bcd_rt_list, primer_univ_list)
+    # Create and fill Library object with the different parameters
+    library = Library(parameters)
+    check_library_window(parameters, library, list_seq_genomic, genomic_window)
+
+    if genomic_window is not None:
+        print_sample(list(islice(genomic_window(), 1)), bcd_rt_list, primer_univ_list)
+    else:
+        print_sample(list_seq_genomic, bcd_rt_list, primer_univ_list)
 
     # ---------------------------------------------------------------------------------------------
     #       Check the number of loci against the number of RTs or barcodes available
@@ -72,110 +250,614 @@ def design_process(
     ]
     primer = primer[0]
 
-    # Create and fill Library object with the different parameters
-    library = Library(parameters)
+    if stream:
+        if genomic_window is None:
+            # probe database or binary cache: sequences of the library window only
+            with monitor.stage("reduce") as record:
+                list_seq_genomic_reduced = library.reduce_list_seq(
+                    list_seq_genomic,
+                    resolution=parameters["resolution"],
+                    nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+                )
+                record["items"] = len(list_seq_genomic_reduced)
+            genomic_window = partial(iter, list_seq_genomic_reduced)
+        path_result_folder = create_result_folder(result_folder)
+        with monitor.results(path_result_folder):
+            list_info = design_streaming(
+                parameters,
+                primer,
+                bcd_rt_list,
+                genomic_window,
+                library,
+                path_result_folder,
+                monitor,
+            )
+    else:
+        if stage_cache is not None:
+            design_staged(
+                parameters,
+                primer,
+                bcd_rt_list,
+                load_key,
+                list_seq_genomic,
+                library,
+                stage_cache,
+                monitor,
+            )
+        else:
+            design_in_memory(
+                parameters,
+                primer,
+                bcd_rt_list,
+                list_seq_genomic,
+                library,
+                workers,
+                monitor,
+            )
+        path_result_folder = create_result_folder(result_folder)
+        list_info = library.recover_loci_probes_length_info()
+        nbr_probes = sum(len(locus.seq_probe) for locus in library.loci_list)
+
+        # -----------------------------------------------------------------------------------------
+        #                           Writing the various results files
+        # -----------------------------------------------------------------------------------------
+
+        with monitor.results(path_result_folder):
+            # writing the file with detailed information (information for each locus and
+            # sequence)
+            with monitor.stage("write 1_Library_details") as record:
+                df.result_details_file(path_result_folder, library)
+                record["items"] = nbr_probes
+                monitor.file_written(
+                    path_result_folder.joinpath("1_Library_details.txt")
+                )
+
+            # writing the file with all primary probe sequences for all locus (without spaces)
+            with monitor.stage("write 2_Full_sequence_Only") as record:
+                df.full_sequences_file(path_result_folder, library)
+                record["items"] = nbr_probes
+                monitor.file_written(
+                    path_result_folder.joinpath("2_Full_sequence_Only.txt")
+                )
+
+            # writing file with summary information (without sequence) in the form of a table
+            with monitor.stage("write 3_Library_summary") as record:
+                df.library_summary_file(path_result_folder, library)
+                record["items"] = len(library.loci_list)
+                monitor.file_written(
+                    path_result_folder.joinpath("3_Library_summary.csv")
+                )
+    parameters["path_result_folder"] = path_result_folder
 
-    # Reduce genomic sequence according to loci coordinates or probe number
-    list_seq_genomic_reduced = library.reduce_list_seq(
-        list_seq_genomic,
-        resolution=parameters["resolution"],
-        nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+    with monitor.results(path_result_folder):
+        # -----------------------------------------------------------------------------------------
+        #                           Display probes/length by locus
+        # -----------------------------------------------------------------------------------------
+        with monitor.stage("plot") as record:
+            graph_locus_info(
+                list_info,
+                path_result_folder,
+                parameters["design_type"],
+                parameters["resolution"],
+                parameters["nbr_probe_by_locus"],
+            )
+            record["items"] = len(list_info)
+            monitor.file_written(path_result_folder.joinpath("plot.png"))
+
+        # Retrieve the parameters used to design the library
+        output_parameters = copy.deepcopy(parameters)
+        output_parameters["Script_Name"] = "library_design.py"
+        # the seed of the random draws is saved to reproduce the design
+        output_parameters["seed"] = library.seed
+
+        # Write library parameters in the 4-OutputParameters.json file
+        with monitor.stage("write 4-OutputParameters"):
+            df.save_parameters(path_result_folder, output_parameters)
+            monitor.file_written(path_result_folder.joinpath("4-OutputParameters.json"))
+    profile_path = monitor.profile.save(path_result_folder)
+    if profile_path is not None:
+        monitor.file_written(profile_path)
+    if parameters.get("seed") is not None:
+        # recorded to be reused by the next designs with the same seed
+        digest_result = design_digest(
+            parameters, library.seed, partial(file_digest, digests=digests)
+        )
+        record_result(result_folder, digest_result, path_result_folder)
+        save_file_digests(result_folder, digests)
+    return path_result_folder
+
+
+def load_genomic(
+    parameters: dict[str, str | int | Path],
+    resources: ResourceCache,
+    stream: bool,
+) -> tuple[ProbeSet | None, Callable[[], Iterable[list[int, int, str]]] | None]:
+    """Genomic sequences with coordinates used by the design
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        resources (ResourceCache):
+            input files already parsed, shared with other designs (None if not shared)
+        stream (bool):
+            streaming design
+
+    Returns:
+        tuple[ProbeSet | None, Callable[[], Iterable[list[int, int, str]]] | None]:
+            the genomic sequences, or (streaming design of a BED file) a function returning a new
+            iterator on the genomic sequences of the library window at each call
+    """
+    # Opening the coordinates and genomic sequences in the list_seq_genomic variable, from the
+    # probe database if one is given, or from the binary cache of the chromosome file when a valid
+    # one exists, otherwise by streaming only the library window of the BED file :
+    window = {
+        "start_lib": parameters["start_lib"],
+        "end_lib": parameters["start_lib"]
+        + parameters["nbr_loci_total"] * parameters["resolution"],
+        "design_type": parameters["design_type"],
+        "nbr_probes_max": parameters["nbr_loci_total"]
+        * parameters["nbr_probe_by_locus"],
+    }
+    if parameters.get("probe_database"):
+        list_seq_genomic = seq_genomic_database(
+            parameters["probe_database"],
+            chromosome=database_chromosome(parameters["chromosome_file"]),
+            **window,
+        )
+    elif resources is not None:
+        # whole chromosome parsed once for all the designs sharing the resources
+        list_seq_genomic = resources.chromosome(
+            parameters["genomic_path"], pack=bool(parameters.get("pack_sequences"))
+        )
+    else:
+        list_seq_genomic = load_bed_cache(parameters["genomic_path"])
+    genomic_window = None
+    if list_seq_genomic is None and stream:
+        # streaming design: the library window of the BED file is read at each pass over the loci
+        genomic_window = partial(
+            df.seq_genomic_window, parameters["genomic_path"], **window
+        )
+    elif list_seq_genomic is None:
+        # stored column-wise (coordinates in typed arrays) as the window is read
+        list_seq_genomic = ProbeSet.from_list(
+            df.seq_genomic_window(parameters["genomic_path"], **window)
+        )
+        # Optional 2 bits per base storage of the probe pool, only the sequences selected in the
+        # loci are decoded (not needed with the binary cache, whose sequences stay on disk)
+        if parameters.get("pack_sequences"):
+            list_seq_genomic = list_seq_genomic.pack()
+    return list_seq_genomic, genomic_window
+
+
+def check_library_window(
+    parameters: dict[str, str | int | Path],
+    library: Library,
+    list_seq_genomic: ProbeSet | None,
+    genomic_window: Callable[[], Iterable[list[int, int, str]]] | None,
+) -> None:
+    """Checks that enough genomic sequences are located in the library window: at least one, and
+    one for each locus of a design by number of probes (see Library.min_nbr_sequences)
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        library (Library):
+            library designed
+        list_seq_genomic (ProbeSet | None):
+            genomic sequences (see load_genomic)
+        genomic_window (Callable[[], Iterable[list[int, int, str]]] | None):
+            function returning an iterator on the genomic sequences of the library window
+            (streaming design, see load_genomic)
+
+    Raises:
+        ValueError: not enough genomic sequences in the library window (start_lib beyond the end
+        of the chromosome, no probe in the library coordinates, or less probes than loci)
+    """
+    required = library.min_nbr_sequences(parameters["nbr_probe_by_locus"])
+    if genomic_window is not None:
+        nbr_seq = sum(1 for _ in islice(genomic_window(), required))
+    else:
+        nbr_seq = len(
+            library.reduce_list_seq(
+                list_seq_genomic,
+                resolution=parameters["resolution"],
+                nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+            )
+        )
+    if nbr_seq >= required:
+        return
+    # coordinates of the chromosome only read to report the error
+    if parameters.get("probe_database"):
+        coordinates = chromosome_range_database(
+            parameters["probe_database"], library.chromosome_name
+        )
+    else:
+        coordinates = df.chromosome_range(parameters["genomic_path"])
+    if coordinates is None:
+        chromosome_info = "has no genomic sequence"
+    else:
+        chromosome_info = f"covers coordinates {coordinates[0]} to {coordinates[1]}"
+    if nbr_seq == 0:
+        raise ValueError(
+            f"No genomic sequence in the library window starting at start_lib = "
+            f"{parameters['start_lib']}: {parameters['chromosome_file']} {chromosome_info}"
+        )
+    raise ValueError(
+        f"Not enough genomic sequences in the library window starting at start_lib = "
+        f"{parameters['start_lib']}: {nbr_seq} sequences for {library.nbr_loci_total} loci of "
+        f"{parameters['nbr_probe_by_locus']} probes (at least {required} needed), "
+        f"{parameters['chromosome_file']} {chromosome_info}"
     )
 
-    # Fill the Library object with all the Locus
-    for i in range(1, library.nbr_loci_total + 1):
-        locus = Locus(
-            primers_univ=primer,
-            locus_n=i,
-            chr_name=library.chromosome_name,
+
+def load_stage(
+    parameters: dict[str, str | int | Path],
+    resources: ResourceCache,
+    stage_cache: StageCache,
+) -> tuple[str, ProbeSet]:
+    """'load' stage of the design: genomic sequences of the library window (see
+    Library.reduce_list_seq), depending on the chromosome file (or probe database) content and on
+    the library coordinates
+
+    Returns:
+        tuple[str, ProbeSet]: key of the stage, genomic sequences of the library window
+    """
+    inputs = {
+        name: parameters[name]
+        for name in (
+            "chromosome_file",
+            "start_lib",
+            "nbr_loci_total",
+            "resolution",
+            "nbr_probe_by_locus",
+            "design_type",
+        )
+    }
+    if parameters.get("probe_database"):
+        inputs["probe_database"] = stage_cache.file_digest(parameters["probe_database"])
+    else:
+        inputs["genomic"] = stage_cache.file_digest(parameters["genomic_path"])
+
+    def load() -> ProbeSet:
+        list_seq_genomic, _ = load_genomic(parameters, resources, stream=False)
+        return Library(parameters).reduce_list_seq(
+            list_seq_genomic,
             resolution=parameters["resolution"],
             nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
-            design_type=parameters["design_type"],
         )
-        list_seq, start, end = locus.recover_genomic_seq(
-            i,
-            parameters["nbr_loci_total"],
-            parameters["start_lib"],
-            list_seq_genomic_reduced,
-        )
-        locus.start_seq = start
-        locus.end_seq = end
-        # locus.primers_univ=primer,
-        locus.seq_probe = list_seq
-        library.add_locus(locus)
 
-    # Display of a locus as an example
-    print_dashline()
-    print("Locus exemple :")
-    print(library.loci_list[0])
+    return stage_cache.run("load", inputs, load)
 
-    # Sequences for barcodes/RTs added to primary probes according to locus
-    library.add_rt_bcd_to_primary_seq(bcd_rt_list, parameters)
 
-    # Sequences for universal primers added to the primary probes at each end
-    library.add_univ_primer_each_side()
+def design_in_memory(
+    parameters: dict[str, str | int | Path],
+    primer: list[str],
+    bcd_rt_list: list[list[str]],
+    list_seq_genomic: ProbeSet,
+    library: Library,
+    workers: int,
+    monitor: DesignMonitor,
+) -> None:
+    """Designs all the loci of the library, held in memory in library.loci_list
+    (selection of the genomic sequences, assembly, length checking and completion).
 
-    # Display example of a final primary probe sequence
-    print_dashline()
-    print("example of a primary probe sequence :")
-    print_dashline()
-    print(library.loci_list[0].seq_probe[0])
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        primer (list[str]):
+            names and sequences of the universal primers
+        bcd_rt_list (list[list[str]]):
+            barcodes/RTs, in locus order
+        list_seq_genomic (ProbeSet):
+            genomic sequences with coordinates
+        library (Library):
+            the library to fill
+        workers (int):
+            number of processes building the loci
+        monitor (DesignMonitor):
+            measures, events and cancellation of the design
+    """
+    # Reduce genomic sequence according to loci coordinates or probe number
+    with monitor.stage("reduce") as record:
+        list_seq_genomic_reduced = library.reduce_list_seq(
+            list_seq_genomic,
+            resolution=parameters["resolution"],
+            nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+        )
+        record["items"] = len(list_seq_genomic_reduced)
+    # Distribute the genomic sequences between the loci in a single pass
+    with monitor.stage("locus fill") as record:
+        loci_probes = library.partition_loci(
+            list_seq_genomic_reduced,
+            resolution=parameters["resolution"],
+            nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+        )
+        if workers > 1:
+            # the worker processes also add the barcodes/RTs and universal primers
+            record["stage"] = "locus fill, readout assembly and primers (workers)"
+            loci = design_loci_parallel(
+                parameters,
+                primer,
+                bcd_rt_list,
+                loci_probes,
+                library.seed,
+                workers,
+                on_locus=monitor.locus_done,
+            )
+        else:
+            loci = select_loci(
+                parameters,
+                loci_probes,
+                1,
+                library.seed,
+                primer,
+                on_locus=monitor.locus_done,
+            )
+        for locus in loci:
+            library.add_locus(locus)
+        record["items"] = len(loci)
+
+    # Fill the Library object with all the Locus (barcodes/RTs and universal primers added)
+    if workers == 1:
+        nbr_probes = sum(len(locus.seq_probe) for locus in library.loci_list)
+        with monitor.stage("readout assembly") as record:
+            library.add_rt_bcd_to_primary_seq(bcd_rt_list, parameters)
+            record["items"] = nbr_probes
+        with monitor.stage("primers") as record:
+            library.add_univ_primer_each_side()
+            record["items"] = nbr_probes
+    print_locus_example(library.loci_list[0])
 
     # ---------------------------------------------------------------------------------------------
     #                               Checking and completion
     # ---------------------------------------------------------------------------------------------
 
     # Checking primary probes length for all Locus
-    min_length, max_length, diff_nbr, diff_percentage = library.check_length_seq_diff()
-    print_dashline()
-    print("Result of probes checking :")
-    print(f"minimum size for all probes combined : {min_length}")
-    print(f"maximum size for all probes combined : {max_length}")
-    print(f"difference in size : {diff_percentage:.1f}%")
+    with monitor.stage("length check") as record:
+        min_length, max_length, diff_nbr, diff_percentage = (
+            library.check_length_seq_diff()
+        )
+        record["items"] = len(library.loci_list)
+    print_length_check(min_length, max_length, diff_percentage)
 
     # If there is a significant difference in size between the primary probes of all the Locus,
     # completion primary probes too small to standardise the length of the oligo-pool
     # ATTENTION: 3' completion of the sequence
-    library.completion(diff_percentage, max_length)
+    with monitor.stage("completion") as record:
+        library.completion(diff_percentage, max_length)
+        record["items"] = len(library.loci_list)
+
+
+def design_staged(
+    parameters: dict[str, str | int | Path],
+    primer: list[str],
+    bcd_rt_list: list[list[str]],
+    load_key: str,
+    list_seq_genomic_reduced: ProbeSet,
+    library: Library,
+    stage_cache: StageCache,
+    monitor: DesignMonitor,
+) -> None:
+    """Same design as design_in_memory, stage by stage (select, readouts, primers, completion),
+    each stage being computed only if its inputs changed since a previous design (see StageCache).
+    A design reusing the selection of a previous design also reuses its seed.
 
-    # ---------------------------------------------------------------------------------------------
-    #                           Create result folder
-    # ---------------------------------------------------------------------------------------------
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        primer (list[str]):
+            names and sequences of the universal primers
+        bcd_rt_list (list[list[str]]):
+            barcodes/RTs, in locus order
+        load_key (str):
+            key of the 'load' stage (see load_stage)
+        list_seq_genomic_reduced (ProbeSet):
+            genomic sequences of the library window
+        library (Library):
+            the library to fill
+        stage_cache (StageCache):
+            results of the stages of the previous designs
+        monitor (DesignMonitor):
+            measures, events and cancellation of the design (stages reused included)
+    """
 
-    # Creation of a dated file to differentiate between the different libraries designed
-    date_now = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-    path_result_folder = result_folder.joinpath(date_now)
-    path_result_folder.mkdir()
-    parameters["path_result_folder"] = path_result_folder
+    # the progress of the loci is also reported when the selection of a previous design is reused
+    reused = True
 
-    # ---------------------------------------------------------------------------------------------
-    #                           Display probes/length by locus
-    # ---------------------------------------------------------------------------------------------
-    list_info = library.recover_loci_probes_length_info()
-    graph_locus_info(
-        list_info,
-        path_result_folder,
-        parameters["design_type"],
-        parameters["resolution"],
-        parameters["nbr_probe_by_locus"],
-    )
+    def select() -> tuple[int, list[Locus]]:
+        nonlocal reused
+        reused = False
+        loci_probes = library.partition_loci(
+            list_seq_genomic_reduced,
+            resolution=parameters["resolution"],
+            nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+        )
+        loci = select_loci(
+            parameters, loci_probes, 1, library.seed, on_locus=monitor.locus_done
+        )
+        return library.seed, loci
 
-    # ---------------------------------------------------------------------------------------------
-    #                           Writing the various results files
-    # ---------------------------------------------------------------------------------------------
+    with monitor.stage("locus fill") as record:
+        select_key, (seed, loci) = stage_cache.run(
+            "select", {"upstream": load_key, "seed": parameters.get("seed")}, select
+        )
+        if reused:
+            for locus in loci:
+                monitor.locus_done(locus)
+        record["items"] = len(loci)
+    library.seed = seed
+
+    with monitor.stage("readout assembly") as record:
+        readouts_key, loci = stage_cache.run(
+            "readouts",
+            {
+                "upstream": select_key,
+                "bcd_rt": stage_cache.file_digest(parameters["bcd_rt_path"]),
+                "nbr_bcd_rt_by_probe": parameters["nbr_bcd_rt_by_probe"],
+            },
+            partial(add_readouts, parameters, loci, bcd_rt_list),
+        )
+        record["items"] = len(loci)
+
+    with monitor.stage("primers") as record:
+        primers_key, loci = stage_cache.run(
+            "primers",
+            {
+                "upstream": readouts_key,
+                "primer_univ_file": stage_cache.file_digest(
+                    parameters["primer_univ_path"]
+                ),
+                "primer_univ": parameters["primer_univ"],
+            },
+            partial(add_primers, parameters, loci, primer),
+        )
+        record["items"] = len(loci)
+    print_locus_example(loci[0])
+
+    # the length check and its display are not cached (the probe lengths are computed without
+    # rendering the sequences)
+    with monitor.stage("length check") as record:
+        min_length, max_length, diff_nbr, diff_percentage = (
+            library.check_length_seq_diff(loci)
+        )
+        record["items"] = len(loci)
+    print_length_check(min_length, max_length, diff_percentage)
+    completion = diff_percentage >= library.max_diff_percent
+
+    def complete() -> list[Locus]:
+        if not completion:
+            return list(loci)
+        completed = [copy.copy(locus) for locus in loci]
+        for locus in completed:
+            library.complete_locus(locus, max_length)
+        return completed
+
+    with monitor.stage("completion") as record:
+        _, loci = stage_cache.run(
+            "completion",
+            {
+                "upstream": primers_key,
+                "max_diff_percent": parameters["max_diff_percent"],
+            },
+            complete,
+        )
+        record["items"] = len(loci)
+    print_dashline()
+    print("Completion finished" if completion else "No completion required")
+    print_dashline()
+    library.loci_list = list(loci)
+
+
+def design_streaming(
+    parameters: dict[str, str | int | Path],
+    primer: list[str],
+    bcd_rt_list: list[list[str]],
+    genomic_window: Callable[[], Iterable[list[int, int, str]]],
+    library: Library,
+    path_result_folder: Path,
+    monitor: DesignMonitor,
+) -> list[int]:
+    """Streaming design: the loci flow one at a time through selection, assembly, completion and
+    writing of the results files, so that only one locus is held in memory. The maximal probe
+    length needed by the completion comes from a first pass over the probe lengths only.
 
-    # writing the file with detailed information (information for each locus and sequence)
-    df.result_details_file(path_result_folder, library)
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        primer (list[str]):
+            names and sequences of the universal primers
+        bcd_rt_list (list[list[str]]):
+            barcodes/RTs, in locus order
+        genomic_window (Callable[[], Iterable[list[int, int, str]]]):
+            returns a new iterator on the genomic sequences of the library window at each call
+        library (Library):
+            the library (parameters and seed, its loci are not stored)
+        path_result_folder (Path):
+            Folder path for results files
+        monitor (DesignMonitor):
+            measures, events and cancellation of the design (one stage by pass over the loci)
+
+    Returns:
+        list[int]: number of probes or size of each locus (see Library.locus_length_info)
+    """
+    # first pass: lengths of the primary probes (the loci are dropped once measured)
+    with monitor.stage("locus fill, readout assembly, primers and length check"):
+        loci = iter_design_loci(
+            parameters, primer, bcd_rt_list, genomic_window(), library.seed
+        )
+        min_length, max_length, diff_nbr, diff_percentage = (
+            library.check_length_seq_diff(monitor.track(loci))
+        )
+    print_length_check(min_length, max_length, diff_percentage)
+    completion = diff_percentage >= library.max_diff_percent
+
+    # second pass: the same loci (same seed) are completed and appended to the results files
+    list_info = []
+    with monitor.stage("locus fill to completion and writing") as record:
+        loci = iter_design_loci(
+            parameters, primer, bcd_rt_list, genomic_window(), library.seed
+        )
+        with df.open_result_files(path_result_folder) as (
+            details,
+            sequences,
+            summary,
+        ):
+            for locus in monitor.track(loci):
+                if locus.locus_n == 1:
+                    print_locus_example(locus)
+                if completion:
+                    library.complete_locus(locus, max_length)
+                df.write_locus_details(details, locus)
+                df.write_locus_sequences(sequences, locus)
+                df.write_locus_summary(summary, locus)
+                list_info.append(library.locus_length_info(locus))
+        record["items"] = len(list_info)
+        for name in (
+            "1_Library_details.txt",
+            "2_Full_sequence_Only.txt",
+            "3_Library_summary.csv",
+        ):
+            monitor.file_written(path_result_folder.joinpath(name))
+    print_dashline()
+    print("Completion finished" if completion else "No completion required")
+    print_dashline()
+    return list_info
 
-    # writing the file with all primary probe sequences for all locus (without spaces)
-    df.full_sequences_file(path_result_folder, library)
 
-    # writing file with summary information (without sequence) in the form of a table
-    df.library_summary_file(path_result_folder, library)
+def create_result_folder(result_folder: Path) -> Path:
+    """Creation of a dated folder to differentiate between the different libraries designed.
+    Designs reusing cached stages can end within the same second: a number is then added to the
+    folder name (20240101_120000_1, 20240101_120000_2...)"""
+    date_now = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+    path_result_folder = result_folder.joinpath(date_now)
+    suffix = 0
+    while True:
+        try:
+            path_result_folder.mkdir()
+            return path_result_folder
+        except FileExistsError:
+            suffix += 1
+            path_result_folder = result_folder.joinpath(f"{date_now}_{suffix}")
+
+
+def print_locus_example(locus: Locus) -> None:
+    """Display of a locus and of one of its primary probes as an example"""
+    print_dashline()
+    print("Locus exemple :")
+    print(locus)
+    print_dashline()
+    print("example of a primary probe sequence :")
+    print_dashline()
+    # a locus located in a gap of the chromosome file has no probe
+    print(locus.seq_probe[0] if len(locus.seq_probe) else "no probe in this locus")
 
-    # Retrieve the parameters used to design the library
-    output_parameters = copy.deepcopy(parameters)
-    output_parameters["Script_Name"] = "library_design.py"
 
-    # Write library parameters in the 4-OutputParameters.json file
-    df.save_parameters(path_result_folder, output_parameters)
+def print_length_check(
+    min_length: int, max_length: int, diff_percentage: float
+) -> None:
+    """Display of the result of the primary probes length checking"""
+    print_dashline()
+    print("Result of probes checking :")
+    print(f"minimum size for all probes combined : {min_length}")
+    print(f"maximum size for all probes combined : {max_length}")
+    print(f"difference in size : {diff_percentage:.1f}%")
@@ -0,0 +1,106 @@
+import queue
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from core.design_events import CancellationToken, DesignEvent
+from models.designCancelledException import DesignCancelledException
+
+
+class DesignWorker:
+    """Design run in a background thread, so that the GUI stays responsive during the design.
+
+    The events of the design are put in a queue, read from the Tk main thread with poll() (called
+    with after()), the widgets being only updated from the main thread.
+
+    Attributes:
+    -----------
+        events (queue.Queue[DesignEvent]):
+            events of the running design, not read yet
+        cancel_token (CancellationToken):
+            cancellation request of the running design
+        thread (threading.Thread):
+            thread of the design (None before the first design)
+        result_folder (Path):
+            Folder path of the results of the last design (None if the design did not finish)
+        error (Exception):
+            error of the last design (None if the design finished or was cancelled)
+        cancelled (bool):
+            True if the last design was cancelled
+    """
+
+    __slots__ = (
+        "events",
+        "cancel_token",
+        "thread",
+        "result_folder",
+        "error",
+        "cancelled",
+    )
+
+    def __init__(self) -> None:
+        self.events = queue.Queue()
+        self.cancel_token = CancellationToken()
+        self.thread = None
+        self.result_folder = None
+        self.error = None
+        self.cancelled = False
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, design: Callable[..., Path], **design_kwargs) -> None:
+        """Starts a design in a background thread
+
+        Args:
+            design (Callable[..., Path]):
+                design function (design_process), called with the design_kwargs, the on_event
+                callback and the cancel_token, and returning the results folder
+            **design_kwargs:
+                arguments of the design function
+        """
+        if self.running:
+            raise RuntimeError("A design is already running")
+        self.events = queue.Queue()
+        self.cancel_token = CancellationToken()
+        self.result_folder = None
+        self.error = None
+        self.cancelled = False
+        self.thread = threading.Thread(
+            target=self.run, args=(design, design_kwargs), daemon=True
+        )
+        self.thread.start()
+
+    def run(self, design: Callable[..., Path], design_kwargs: dict) -> None:
+        try:
+            self.result_folder = design(
+                on_event=self.events.put,
+                cancel_token=self.cancel_token,
+                **design_kwargs,
+            )
+        except DesignCancelledException:
+            self.cancelled = True
+        except Exception as error:
+            self.error = error
+
+    def cancel(self) -> None:
+        """Requests the cancellation of the running design"""
+        self.cancel_token.cancel()
+
+    def poll(self) -> tuple[list[DesignEvent], bool]:
+        """Events of the design since the last poll
+
+        Returns:
+            tuple[list[DesignEvent], bool]:
+                events of the design, and True if the design is over (finished, cancelled or
+                failed: result_folder, cancelled and error are then set)
+        """
+        # checked before reading the queue: all the events of a design over are read
+        over = self.thread is not None and not self.thread.is_alive()
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events, over
@@ -1,4 +1,4 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from pathlib import Path
 
 
@@ -39,10 +39,47 @@ def graph_locus_info(
 
     y_min = min(list_to_plot)
     y_max = max(list_to_plot)
-    plt.figure(figsize=(12, 6))
-    plt.bar(range(len(list_to_plot)), list_to_plot)
-    plt.xlabel("Locus")
-    plt.ylabel(y_label_title)
-    plt.title(titre)
-    plt.xticks(range(len(list_to_plot)), list(range(1, len(list_to_plot) + 1)))
-    plt.savefig(fname=folder.joinpath("plot.png"))
+    # Figure instead of pyplot: no global state nor GUI backend, so that the design can run in a
+    # background thread of the GUI (and several designs in the same process)
+    figure = Figure(figsize=(12, 6))
+    axes = figure.add_subplot()
+    axes.bar(range(len(list_to_plot)), list_to_plot)
+    axes.set_xlabel("Locus")
+    axes.set_ylabel(y_label_title)
+    axes.set_title(titre)
+    axes.set_xticks(range(len(list_to_plot)), list(range(1, len(list_to_plot) + 1)))
+    figure.savefig(fname=folder.joinpath("plot.png"))
+
+
+def graph_sweep(rows: list[dict], folder: Path, design_type: str) -> None:
+    """Plot of a parameter sweep: mean, minimum and maximum number of probes per locus (or locus
+    length) for each set of parameters (except those without loci, see sweep_point)"""
+    rows = [row for row in rows if row["nbr_loci"]]
+    if not rows:
+        return
+    if design_type == "locus_length":
+        titre = "Number of probes per locus (mean, min-max)"
+        y_label_title = "Number of probes"
+        scale = 1
+    else:
+        titre = "Length of locus (mean, min-max)"
+        y_label_title = "Length (Kb)"
+        scale = 1000
+    means = [row["mean"] / scale for row in rows]
+    errors = [
+        [(row["mean"] - row["min"]) / scale for row in rows],
+        [(row["max"] - row["mean"]) / scale for row in rows],
+    ]
+    labels = [
+        f"{row['start_lib']} | {row['resolution'] / 1000}Kb | {row['nbr_probe_by_locus']}"
+        for row in rows
+    ]
+    figure = Figure(figsize=(max(12, len(rows) * 0.4), 6))
+    axes = figure.add_subplot()
+    axes.bar(range(len(rows)), means, yerr=errors, capsize=3)
+    axes.set_xlabel("start_lib | resolution | nbr_probe_by_locus")
+    axes.set_ylabel(y_label_title)
+    axes.set_title(titre)
+    axes.set_xticks(range(len(rows)), labels, rotation=90)
+    figure.tight_layout()
+    figure.savefig(fname=folder.joinpath("sweep_plot.png"))
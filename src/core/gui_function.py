@@ -7,7 +7,21 @@ from tkinter import filedialog, messagebox, ttk
 
 from models.library import recover_chr_name
 import core.data_function as df
+from core.design_events import LOCUS_DONE, STAGE_STARTED, DesignEvent
 from core.design_process import design_process
+from core.design_worker import DesignWorker
+from core.resource_cache import ResourceCache
+from core.stage_cache import StageCache
+
+# results of the design stages, reused by the next designs of the session (the results of the
+# last designs only: 5 stages by design)
+STAGES = StageCache(max_entries=10)
+# input files parsed once by session (chromosome probe set, barcodes/RTs, universal primers),
+# parsed again only when modified; only the last chromosome used is kept in memory
+RESOURCES = ResourceCache(max_chromosomes=1)
+# designs run in a background thread, followed every POLL_DELAY_MS milliseconds
+WORKER = DesignWorker()
+POLL_DELAY_MS = 100
 
 
 def change_state_widget(entry: tk.Entry, var_radio_b: tk.StringVar) -> None:
@@ -54,7 +68,7 @@ def open_folder_dialog(entry: tk.Entry) -> None:
 
 
 def display_univ_primers_combobox(path: Path) -> list[str]:
-    univ_primer_dic = df.universal_primer_format(path)
+    univ_primer_dic = RESOURCES.get(path, df.universal_primer_format)
     univ_primer_display = []
     for key, values in univ_primer_dic.items():
         univ_primer_string = f"{key} - {values[0]} - {values[2]}"
@@ -223,6 +237,94 @@ def fill_csv_board(
     treeview.pack()
 
 
+def display_results(
+    path_result_folder: Path,
+    graphic_img_label: tk.Label,
+    summary_img_label: tk.Label,
+    frame_board: tk.Frame,
+    treeview: ttk.Treeview,
+    tree_scroll: tk.Scrollbar,
+) -> None:
+    # displays library information in graphical form
+    graphic_img = path_result_folder.joinpath("plot.png")
+    display_graphic(widget=graphic_img_label, img_path=graphic_img)
+
+    # recovery detailed information from the library (for board visualisation)
+    lib_summary_file_path = path_result_folder.joinpath("3_Library_summary.csv")
+    sum_columns, sum_values = df.recover_summary(summary_path=lib_summary_file_path)
+
+    # delete img_caution to place csv table where required
+    summary_img_label.pack_forget()
+
+    # displays library information in board form treeview_summary
+    id_columns = list(range(len(sum_columns)))
+    fill_csv_board(
+        master=frame_board,
+        treeview=treeview,
+        id_columns=id_columns,
+        column_names=sum_columns,
+        values=sum_values,
+        tree_scroll=tree_scroll,
+    )
+
+
+def show_progress(
+    progress_bar: ttk.Progressbar, status_label: tk.Label, event: DesignEvent
+) -> None:
+    if event.kind == STAGE_STARTED:
+        status_label.config(text=f"Design : {event.stage}")
+        # stage without progress by locus (loading of the files...)
+        progress_bar.config(mode="indeterminate")
+        progress_bar.start()
+    elif event.kind == LOCUS_DONE:
+        if progress_bar["mode"] == "indeterminate":
+            progress_bar.stop()
+            progress_bar.config(mode="determinate", maximum=event.total)
+        progress_bar.config(value=event.current)
+
+
+def follow_design(
+    progress_bar: ttk.Progressbar,
+    status_label: tk.Label,
+    design_buttons: tuple[tk.Button, tk.Button],
+    results_widgets: dict,
+) -> None:
+    events, over = WORKER.poll()
+    for event in events:
+        show_progress(progress_bar=progress_bar, status_label=status_label, event=event)
+    if not over:
+        progress_bar.after(
+            POLL_DELAY_MS,
+            follow_design,
+            progress_bar,
+            status_label,
+            design_buttons,
+            results_widgets,
+        )
+        return
+
+    progress_bar.stop()
+    progress_bar.config(mode="determinate", maximum=1, value=0)
+    button_start, button_cancel = design_buttons
+    button_start.config(state=tk.NORMAL)
+    button_cancel.config(state=tk.DISABLED)
+    if WORKER.cancelled:
+        status_label.config(text="Design cancelled")
+    elif WORKER.error is not None:
+        status_label.config(text="Design failed")
+        messagebox.showerror(title="Design error", message=str(WORKER.error))
+    else:
+        progress_bar.config(value=1)
+        status_label.config(text=f"Design saved in {WORKER.result_folder}")
+        display_results(path_result_folder=WORKER.result_folder, **results_widgets)
+
+
+def cancel_design(status_label: tk.Label) -> None:
+    if WORKER.running:
+        WORKER.cancel()
+        status_label.config(text="Cancelling the design...")
+
+
 def start_design(
     parameters: dict,
     entries_widgets: dict,
@@ -231,38 +333,40 @@ def start_design(
     summary_img_label: tk.Label,
     frame_board: tk.Frame,
     treeview: ttk.Treeview,
-    tree_scroll=tk.Scrollbar,
+    tree_scroll: tk.Scrollbar,
+    progress_bar: ttk.Progressbar,
+    status_label: tk.Label,
+    button_start: tk.Button,
+    button_cancel: tk.Button,
 ) -> None:
+    if WORKER.running:
+        return
     updated_parameters, valid_input = check_recover_settings(
         parameters=parameters, entries_widgets=entries_widgets, var_widgets=var_widgets
     )
     if valid_input:
-        design_process(
+        # the design runs in a background thread on a copy of the parameters, which can be
+        # modified in the Parameters tab during the design
+        WORKER.start(
+            design_process,
             output_folder=updated_parameters["output_folder"],
-            inputs_parameters=updated_parameters,
-        )
-        # displays library information in graphical form
-        graphic_img = updated_parameters["path_result_folder"].joinpath("plot.png")
-        display_graphic(widget=graphic_img_label, img_path=graphic_img)
-
-        # recovery detailed information from the library (for board visualisation)
-        lib_summary_file_path = updated_parameters["path_result_folder"].joinpath(
-            "3_Library_summary.csv"
+            inputs_parameters=dict(updated_parameters),
+            stage_cache=STAGES,
+            resources=RESOURCES,
         )
-        sum_columns, sum_values = df.recover_summary(summary_path=lib_summary_file_path)
-
-        # delete img_caution to place csv table where required
-        summary_img_label.pack_forget()
-
-        # displays library information in board form treeview_summary
-        id_columns = list(range(len(sum_columns)))
-        fill_csv_board(
-            master=frame_board,
-            treeview=treeview,
-            id_columns=id_columns,
-            column_names=sum_columns,
-            values=sum_values,
-            tree_scroll=tree_scroll,
+        button_start.config(state=tk.DISABLED)
+        button_cancel.config(state=tk.NORMAL)
+        follow_design(
+            progress_bar=progress_bar,
+            status_label=status_label,
+            design_buttons=(button_start, button_cancel),
+            results_widgets={
+                "graphic_img_label": graphic_img_label,
+                "summary_img_label": summary_img_label,
+                "frame_board": frame_board,
+                "treeview": treeview,
+                "tree_scroll": tree_scroll,
+            },
         )
     else:
         print(
@@ -0,0 +1,239 @@
+import copy
+import math
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from models.designCancelledException import DesignCancelledException
+from models.library import Library, recover_chr_name
+from models.locus import Locus
+from models.probe_set import ProbeSet
+
+
+def design_loci(
+    parameters: dict[str, str | int | Path],
+    primer: list[str],
+    bcd_rt_list: list[list[str]],
+    loci_probes: list[tuple[ProbeSet, int, int]],
+    first_locus_n: int,
+    seed: int,
+) -> list[Locus]:
+    """Builds consecutive loci of the library: selection of the genomic sequences, barcodes/RTs
+    and universal primers added to the primary probes.
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        primer (list[str]):
+            names and sequences of the universal primers
+        bcd_rt_list (list[list[str]]):
+            barcodes/RTs of the loci, in locus order
+        loci_probes (list[tuple[ProbeSet, int, int]]):
+            genomic sequences, start and end coordinates of the loci (see Library.partition_loci)
+        first_locus_n (int):
+            number of the first locus
+        seed (int):
+            seed of the library
+
+    Returns:
+        list[Locus]: the loci, in locus order
+    """
+    library = Library(parameters)
+    library.seed = seed
+    for locus in select_loci(parameters, loci_probes, first_locus_n, seed, primer):
+        library.add_locus(locus)
+    if library.loci_list is None:
+        return []
+
+    # Sequences for barcodes/RTs added to primary probes according to locus
+    library.add_rt_bcd_to_primary_seq(bcd_rt_list, parameters)
+
+    # Sequences for universal primers added to the primary probes at each end
+    library.add_univ_primer_each_side()
+    return library.loci_list
+
+
+def select_loci(
+    parameters: dict[str, str | int | Path],
+    loci_probes: list[tuple[ProbeSet, int, int]],
+    first_locus_n: int,
+    seed: int,
+    primer: list[str] = None,
+    on_locus: Callable[[Locus], None] = None,
+) -> list[Locus]:
+    """Builds consecutive loci of the library with their genomic sequences only (probes subsampled
+    in the locus_length design, no barcode/RT nor universal primer added yet).
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        loci_probes (list[tuple[ProbeSet, int, int]]):
+            genomic sequences, start and end coordinates of the loci (see Library.partition_loci)
+        first_locus_n (int):
+            number of the first locus
+        seed (int):
+            seed of the library
+        primer (list[str]):
+            names and sequences of the universal primers of the loci. Defaults to None.
+        on_locus (Callable[[Locus], None]):
+            function called with each locus once filled. Defaults to None.
+
+    Returns:
+        list[Locus]: the loci, in locus order
+    """
+    chr_name = recover_chr_name(parameters["chromosome_file"])
+    loci = []
+    for i, (probes, start, end) in enumerate(loci_probes, start=first_locus_n):
+        locus = Locus(
+            primers_univ=primer,
+            locus_n=i,
+            chr_name=chr_name,
+            resolution=parameters["resolution"],
+            nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+            design_type=parameters["design_type"],
+        )
+        locus.fill_genomic_seq(probes, start, end, seed=seed)
+        loci.append(locus)
+        if on_locus is not None:
+            on_locus(locus)
+    return loci
+
+
+def add_readouts(
+    parameters: dict[str, str | int | Path],
+    loci: list[Locus],
+    bcd_rt_list: list[list[str]],
+) -> list[Locus]:
+    """Copies of the loci with the barcodes/RTs added to their primary probes (the loci given are
+    not modified)
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        loci (list[Locus]):
+            the loci, in locus order
+        bcd_rt_list (list[list[str]]):
+            barcodes/RTs of the loci, in locus order
+
+    Returns:
+        list[Locus]: the loci with their barcodes/RTs
+    """
+    library = Library(parameters)
+    library.loci_list = [copy.copy(locus) for locus in loci]
+    library.add_rt_bcd_to_primary_seq(bcd_rt_list, parameters)
+    return library.loci_list
+
+
+def add_primers(
+    parameters: dict[str, str | int | Path], loci: list[Locus], primer: list[str]
+) -> list[Locus]:
+    """Copies of the loci with the universal primers added to their primary probes (the loci given
+    are not modified)
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        loci (list[Locus]):
+            the loci, in locus order
+        primer (list[str]):
+            names and sequences of the universal primers
+
+    Returns:
+        list[Locus]: the loci with their universal primers
+    """
+    library = Library(parameters)
+    library.loci_list = [copy.copy(locus) for locus in loci]
+    for locus in library.loci_list:
+        locus.primers_univ = primer
+    library.add_univ_primer_each_side()
+    return library.loci_list
+
+
+def design_loci_parallel(
+    parameters: dict[str, str | int | Path],
+    primer: list[str],
+    bcd_rt_list: list[list[str]],
+    loci_probes: list[tuple[ProbeSet, int, int]],
+    seed: int,
+    workers: int,
+    on_locus: Callable[[Locus], None] = None,
+) -> list[Locus]:
+    """Builds the loci of the library in worker processes (see design_loci). The loci are split
+    into runs of consecutive loci, each worker receiving only the genomic sequences of its loci.
+    The random draws of a locus depend only on the seed and the locus number, so the loci are the
+    same as when built in a single process.
+
+    Args:
+        workers (int):
+            number of worker processes
+        on_locus (Callable[[Locus], None]):
+            function called with each locus as the runs are received (in locus order). If it
+            raises DesignCancelledException, the runs not started yet are dropped. Defaults to None.
+
+    Returns:
+        list[Locus]: the loci, in locus order
+    """
+    # several runs by worker to balance the loci with more probes
+    run_size = max(1, math.ceil(len(loci_probes) / (workers * 4)))
+    firsts = range(0, len(loci_probes), run_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        runs = executor.map(
+            design_loci,
+            repeat(parameters),
+            repeat(primer),
+            [bcd_rt_list[first : first + run_size] for first in firsts],
+            [loci_probes[first : first + run_size] for first in firsts],
+            [first + 1 for first in firsts],
+            repeat(seed),
+        )
+        loci = []
+        try:
+            for run in runs:
+                for locus in run:
+                    loci.append(locus)
+                    if on_locus is not None:
+                        on_locus(locus)
+        except DesignCancelledException:
+            executor.shutdown(cancel_futures=True)
+            raise
+        return loci
+
+
+def iter_design_loci(
+    parameters: dict[str, str | int | Path],
+    primer: list[str],
+    bcd_rt_list: list[list[str]],
+    seq_iter: Iterable[list[int, int, str]],
+    seed: int,
+) -> Iterator[Locus]:
+    """Streaming version of design_loci: the loci are built one at a time, as the genomic
+    sequences of the library window are read.
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        primer (list[str]):
+            names and sequences of the universal primers
+        bcd_rt_list (list[list[str]]):
+            barcodes/RTs of the loci, in locus order
+        seq_iter (Iterable[list[int, int, str]]):
+            genomic sequences of the library window, sorted by coordinates
+        seed (int):
+            seed of the library
+
+    Yields:
+        Locus: the loci, in locus order
+    """
+    library = Library(parameters)
+    loci_probes = library.iter_loci(
+        seq_iter,
+        resolution=parameters["resolution"],
+        nbr_probe_by_locus=parameters["nbr_probe_by_locus"],
+    )
+    for locus_n, (locus_probes, bcd_rt) in enumerate(
+        zip(loci_probes, bcd_rt_list), start=1
+    ):
+        yield from design_loci(
+            parameters, primer, [bcd_rt], [locus_probes], locus_n, seed
+        )
@@ -0,0 +1,251 @@
+import os
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+
+from core.bed_file import iter_bed_lines
+from core.result_index import file_digest
+from models.library import recover_chr_name
+from models.probe_set import ProbeSet
+
+DATABASE_NAME = "probes.sqlite"
+BED_PATTERNS = ("*.bed", "*.bed.gz")
+
+
+def create_tables(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS probes "
+        "(chrom TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL, seq TEXT NOT NULL)"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS probes_chrom_start ON probes (chrom, start)"
+    )
+    # chromosome file of each chromosome, to detect a database older than its chromosome files
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS sources (chrom TEXT PRIMARY KEY, path TEXT NOT NULL, "
+        "size INTEGER NOT NULL, mtime INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+    )
+
+
+def iter_bed_rows(bed_path: Path) -> Iterator[tuple[str, int, int, str]]:
+    """Reads chromosome name, start, end and sequence of each line of a chromosome file"""
+    for _, line in iter_bed_lines(bed_path):
+        data = line.split(b"\t")
+        yield data[0].decode("UTF-8"), int(data[1]), int(data[2]), data[3].decode(
+            "UTF-8"
+        )
+
+
+def build_probe_database(genome_folder: Path, database_path: Path = None) -> Path:
+    """Ingests all the chromosome files (.bed, .bed.gz) of an OligoMiner genome folder into a local
+    SQLite database indexed by (chromosome, start). A chromosome already present in the database
+    is replaced. The size, modification time and digest of each chromosome file are recorded
+    (see check_chromosome).
+
+    Args:
+        genome_folder (Path):
+            Folder containing the chromosome files of a genome
+        database_path (Path):
+            File path of the database. Defaults to 'probes.sqlite' in the genome folder.
+
+    Returns:
+        Path: File path of the database
+    """
+    database_path = (
+        database_path if database_path else genome_folder.joinpath(DATABASE_NAME)
+    )
+    bed_paths = sorted(
+        path for pattern in BED_PATTERNS for path in genome_folder.glob(pattern)
+    )
+    connection = sqlite3.connect(database_path)
+    try:
+        create_tables(connection)
+        for bed_path in bed_paths:
+            stat = os.stat(bed_path)
+            rows = iter_bed_rows(bed_path)
+            first_row = next(rows, None)
+            if first_row is None:
+                continue
+            with connection:
+                connection.execute("DELETE FROM probes WHERE chrom = ?", first_row[:1])
+                connection.execute("INSERT INTO probes VALUES (?, ?, ?, ?)", first_row)
+                connection.executemany("INSERT INTO probes VALUES (?, ?, ?, ?)", rows)
+                connection.execute(
+                    "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                    (
+                        first_row[0],
+                        str(bed_path.absolute()),
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        file_digest(bed_path),
+                    ),
+                )
+            print(f"{bed_path.name} added to the probe database")
+    finally:
+        connection.close()
+    return database_path
+
+
+def open_probe_database(database_path: Path) -> sqlite3.Connection:
+    """Opens the probe database read-only"""
+    database_uri = f"{Path(database_path).absolute().as_uri()}?mode=ro"
+    return sqlite3.connect(database_uri, uri=True)
+
+
+def database_chromosome(chromosome_file: str | Path) -> str:
+    """Name of the chromosome of a chromosome file (ex: 'chr3L' for 'chr3L.bed'), under which its
+    probes are queried in the probe database
+
+    Raises:
+        ValueError: no chromosome name in the chromosome file name
+    """
+    chromosome = recover_chr_name(str(chromosome_file))
+    if chromosome is None:
+        raise ValueError(
+            f"No chromosome name in chromosome_file '{chromosome_file}' to query the probe "
+            "database (expected as 'chr<name>.bed' or 'chr<name>.bed.gz')"
+        )
+    return chromosome
+
+
+def check_chromosome(
+    connection: sqlite3.Connection, database_path: Path, chromosome: str
+) -> None:
+    """Checks that a chromosome is in the probe database, and that its chromosome file (if still
+    present) did not change since the database was built
+
+    Raises:
+        ValueError: chromosome not in the database, or database older than the chromosome file
+    """
+    tables = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sources'"
+    ).fetchall()
+    if not tables:
+        raise ValueError(
+            f"The probe database {database_path} was built by a previous version: build it "
+            "again with --build_database"
+        )
+    source = connection.execute(
+        "SELECT path, size, mtime, sha256 FROM sources WHERE chrom = ?", (chromosome,)
+    ).fetchone()
+    if source is None:
+        chromosomes = [
+            row[0]
+            for row in connection.execute("SELECT chrom FROM sources ORDER BY chrom")
+        ]
+        raise ValueError(
+            f"Chromosome {chromosome} is not in the probe database {database_path} "
+            f"(chromosomes: {', '.join(chromosomes)})"
+        )
+    path, size, mtime, sha256 = source
+    if not os.path.isfile(path):
+        # database used without the genome folder it was built from
+        return
+    stat = os.stat(path)
+    if stat.st_size != size or (
+        stat.st_mtime_ns != mtime and file_digest(path) != sha256
+    ):
+        raise ValueError(
+            f"{path} changed since the probe database {database_path} was built: build it "
+            "again with --build_database"
+        )
+
+
+def chromosome_range_database(
+    database_path: Path, chromosome: str
+) -> tuple[int, int] | None:
+    """Coordinates covered by the genomic sequences of a chromosome in the probe database
+
+    Args:
+        database_path (Path): File path of the probe database
+        chromosome (str): Chromosome name (ex: 'chr3L')
+
+    Returns:
+        tuple[int, int] | None: start of the first sequence and end of the last one, None if the
+        chromosome is not in the database
+    """
+    connection = open_probe_database(database_path)
+    try:
+        first_start, last_end = connection.execute(
+            "SELECT MIN(start), MAX(end) FROM probes WHERE chrom = ?", (chromosome,)
+        ).fetchone()
+    finally:
+        connection.close()
+    return None if first_start is None else (first_start, last_end)
+
+
+def seq_genomic_database(
+    database_path: Path,
+    chromosome: str,
+    start_lib: int,
+    end_lib: int,
+    design_type: str,
+    nbr_probes_max: int = None,
+) -> ProbeSet:
+    """Queries the genomic sequences of the library window in the probe database
+    (same selection as data_function.seq_genomic_window).
+
+    Args:
+        database_path (Path):
+            File path of the probe database
+        chromosome (str):
+            Chromosome name (ex: 'chr3L')
+        start_lib (int):
+            Start coordinate of the library
+        end_lib (int):
+            End coordinate of the library (design by locus length)
+        design_type (str):
+            'locus_length' or 'nbr_probes'
+        nbr_probes_max (int):
+            Number of sequences of the library (design by number of probes)
+
+    Returns:
+        ProbeSet: genomic sequences with coordinates, sorted by coordinates
+
+    Raises:
+        ValueError: chromosome not in the database, or database older than the chromosome file
+    """
+    if design_type == "locus_length":
+        query = (
+            "SELECT start, end, seq FROM probes WHERE chrom = ? AND start >= ? "
+            "AND start <= ? AND end <= ? ORDER BY start"
+        )
+        query_parameters = (chromosome, start_lib, end_lib, end_lib)
+    else:
+        query = (
+            "SELECT start, end, seq FROM probes WHERE chrom = ? AND start >= ? "
+            "ORDER BY start LIMIT ?"
+        )
+        query_parameters = (chromosome, start_lib, nbr_probes_max)
+    connection = open_probe_database(database_path)
+    try:
+        check_chromosome(connection, database_path, chromosome)
+        return ProbeSet.from_list(connection.execute(query, query_parameters))
+    finally:
+        connection.close()
+
+
+def load_chromosome_database(database_path: Path, chromosome: str) -> ProbeSet:
+    """All the genomic sequences of a chromosome in the probe database
+
+    Args:
+        database_path (Path): File path of the probe database
+        chromosome (str): Chromosome name (ex: 'chr3L')
+
+    Returns:
+        ProbeSet: genomic sequences with coordinates, sorted by coordinates
+
+    Raises:
+        ValueError: chromosome not in the database, or database older than the chromosome file
+    """
+    connection = open_probe_database(database_path)
+    try:
+        check_chromosome(connection, database_path, chromosome)
+        return ProbeSet.from_list(
+            connection.execute(
+                "SELECT start, end, seq FROM probes WHERE chrom = ? ORDER BY start",
+                (chromosome,),
+            )
+        )
+    finally:
+        connection.close()
@@ -0,0 +1,97 @@
+from array import array
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import core.data_function as df
+from core.bed_cache import load_bed_cache
+from models.packed_sequences import PackedSequences
+from models.probe_set import ProbeSet
+
+
+def load_chromosome(genomic_path: Path) -> ProbeSet:
+    """All the genomic sequences of a chromosome file, from its binary cache when a valid one
+    exists"""
+    probe_set = load_bed_cache(genomic_path)
+    if probe_set is None:
+        probe_set = ProbeSet.from_list(df.iter_bed_records(genomic_path))
+    return probe_set
+
+
+def load_chromosome_packed(genomic_path: Path) -> ProbeSet:
+    """All the genomic sequences of a chromosome file, with 2 bits per base.
+    The bases are packed by blocks as the file is read (no str per sequence)"""
+    starts = array("q")
+    ends = array("q")
+
+    def read_bases() -> Iterator[bytes]:
+        for start, end, bases in df.iter_bed_bases(genomic_path):
+            starts.append(start)
+            ends.append(end)
+            yield bases
+
+    sequences = PackedSequences.from_sequences(read_bases())
+    return ProbeSet(memoryview(starts), memoryview(ends), sequences)
+
+
+CHROMOSOME_LOADERS = (load_chromosome, load_chromosome_packed)
+
+
+class ResourceCache:
+    """Input files parsed once and shared by several designs run in the same process (batch mode,
+    GUI session): chromosome probe sets, barcodes/RTs lists, universal primer tables.
+
+    An entry is identified by the file path and the function loading it, and is loaded again when
+    the file is modified (size or modification time). The cached objects are shared: the designs
+    must not modify them.
+
+    Attributes:
+    -----------
+        entries (dict[tuple[Path, Callable], tuple[tuple[int, int], Any]]):
+            file signature (modification time, size) and loaded object, by file and loader
+        max_chromosomes (int):
+            number of chromosome probe sets kept (at least 1), the least recently used being
+            released first (None: all the chromosomes are kept)
+    """
+
+    __slots__ = ("entries", "max_chromosomes")
+
+    def __init__(self, max_chromosomes: int = None) -> None:
+        self.entries = {}
+        self.max_chromosomes = max_chromosomes
+
+    def get(self, path: Path, loader: Callable[[Path], Any]) -> Any:
+        """Returns the content of a file as loaded by `loader`, loading it only if it is not in the
+        cache or if the file was modified since
+
+        Args:
+            path (Path): File path
+            loader (Callable[[Path], Any]): function loading the file
+
+        Returns:
+            Any: the object returned by `loader` for this file
+        """
+        path = Path(path).absolute()
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get((path, loader))
+        if entry is None or entry[0] != signature:
+            entry = (signature, loader(path))
+            self.entries[(path, loader)] = entry
+        return entry[1]
+
+    def chromosome(self, genomic_path: Path, pack: bool = False) -> ProbeSet:
+        """All the genomic sequences of a chromosome file (see load_chromosome)"""
+        loader = load_chromosome_packed if pack else load_chromosome
+        probe_set = self.get(genomic_path, loader)
+        if self.max_chromosomes is not None:
+            # the entries are kept from the least to the most recently used chromosome
+            key = (Path(genomic_path).absolute(), loader)
+            self.entries[key] = self.entries.pop(key)
+            chromosomes = [key for key in self.entries if key[1] in CHROMOSOME_LOADERS]
+            for key in chromosomes[: -self.max_chromosomes]:
+                del self.entries[key]
+        return probe_set
+
+    def clear(self) -> None:
+        self.entries.clear()
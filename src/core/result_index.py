@@ -0,0 +1,151 @@
+import hashlib
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+from core.bed_cache import file_sha256
+
+RESULT_INDEX = "results_index.json"
+RESULT_FILES = (
+    "1_Library_details.txt",
+    "2_Full_sequence_Only.txt",
+    "3_Library_summary.csv",
+    "4-OutputParameters.json",
+    "plot.png",
+)
+# parameters without effect on the result files (paths are replaced by the digest of the files)
+IGNORED_PARAMETERS = ("output_folder", "path_result_folder", "pack_sequences")
+# digests of the input files, by file path, modification time and size: a file is read again to
+# compute its digest only when it is modified (computed once by process, and saved in the results
+# folder for the next runs). A file replaced by another one with the same size and modification
+# time keeps the digest of the first one (--force to design again).
+DIGESTS_FILE = "file_digests.json"
+FILE_DIGESTS = {}
+
+
+def file_digest(path: Path, digests: dict[tuple[str, int, int], str] = None) -> str:
+    """Content digest (sha256) of an input file, computed again only if the file was modified
+    (size or modification time). The content is not read when the size and modification time
+    match a digest already computed: a file replaced with the same size and modification time
+    keeps the digest of the previous file.
+
+    Args:
+        path (Path):
+            File path
+        digests (dict[tuple[str, int, int], str]):
+            digests already computed, by file path, modification time and size. Defaults to the
+            digests of the process (FILE_DIGESTS).
+
+    Returns:
+        str: hexadecimal digest of the file content
+    """
+    digests = FILE_DIGESTS if digests is None else digests
+    path = Path(path).absolute()
+    stat = path.stat()
+    signature = (path.as_posix(), stat.st_mtime_ns, stat.st_size)
+    if signature not in digests:
+        digests[signature] = file_sha256(path).hex()
+    return digests[signature]
+
+
+def load_file_digests(
+    result_folder: Path, digests: dict[tuple[str, int, int], str] = None
+) -> None:
+    """Adds the digests of the input files saved by the previous designs of a results folder to
+    the digests already computed (see file_digest)"""
+    digests = FILE_DIGESTS if digests is None else digests
+    digests_path = result_folder.joinpath(DIGESTS_FILE)
+    if not digests_path.exists():
+        return
+    with open(digests_path, mode="r", encoding="UTF-8") as file:
+        for path, (mtime_ns, size, digest) in json.load(file).items():
+            digests.setdefault((path, mtime_ns, size), digest)
+
+
+def save_file_digests(
+    result_folder: Path, digests: dict[tuple[str, int, int], str] = None
+) -> None:
+    """Saves the digests of the input files in a results folder (last version of each file)"""
+    digests = FILE_DIGESTS if digests is None else digests
+    files = {}
+    for (path, mtime_ns, size), digest in digests.items():
+        if path not in files or files[path][0] < mtime_ns:
+            files[path] = [mtime_ns, size, digest]
+    digests_path = result_folder.joinpath(DIGESTS_FILE)
+    temporary_path = digests_path.with_suffix(".tmp")
+    with open(temporary_path, mode="w", encoding="UTF-8") as file:
+        json.dump(files, file, indent=4)
+    temporary_path.replace(digests_path)
+
+
+def design_digest(
+    parameters: dict[str, str | int | Path],
+    seed: int,
+    digest: Callable[[Path], str] = file_digest,
+) -> str:
+    """Digest identifying the result of a design: parameter values, content of the input files
+    (chromosome file or probe database, barcodes/RTs, universal primers) and seed of the library
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            dictionary containing parameters
+        seed (int):
+            seed of the library
+        digest (Callable[[Path], str]):
+            content digest of a file. Defaults to file_digest.
+
+    Returns:
+        str: hexadecimal digest of the design
+    """
+    values = {
+        name: value
+        for name, value in parameters.items()
+        if name not in IGNORED_PARAMETERS and not isinstance(value, Path)
+    }
+    values["seed"] = seed
+    if parameters.get("probe_database"):
+        values["probe_database"] = digest(parameters["probe_database"])
+    else:
+        values["genomic"] = digest(parameters["genomic_path"])
+    values["bcd_rt"] = digest(parameters["bcd_rt_path"])
+    values["primer_univ_table"] = digest(parameters["primer_univ_path"])
+    text = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("UTF-8")).hexdigest()
+
+
+def load_index(result_folder: Path) -> dict[str, str]:
+    """Result folder name of the designs already done in a results folder, by design digest"""
+    index_path = result_folder.joinpath(RESULT_INDEX)
+    if not index_path.exists():
+        return {}
+    with open(index_path, mode="r", encoding="UTF-8") as file:
+        return json.load(file)
+
+
+def find_result(result_folder: Path, digest: str) -> Path | None:
+    """Result folder of a previous design with the same digest, if all its result files still exist
+
+    Args:
+        result_folder (Path):
+            folder of the designs results (Library_Design_Results)
+        digest (str):
+            digest of the design (see design_digest)
+
+    Returns:
+        Path | None: result folder of the previous design, None if there is none
+    """
+    name = load_index(result_folder).get(digest)
+    if name is None:
+        return None
+    path_result_folder = result_folder.joinpath(name)
+    if not all(path_result_folder.joinpath(file).exists() for file in RESULT_FILES):
+        return None
+    return path_result_folder
+
+
+def record_result(result_folder: Path, digest: str, path_result_folder: Path) -> None:
+    """Adds the result folder of a design to the index of the results folder"""
+    index = load_index(result_folder)
+    index[digest] = path_result_folder.name
+    with open(result_folder.joinpath(RESULT_INDEX), mode="w", encoding="UTF-8") as file:
+        json.dump(index, file, indent=4)
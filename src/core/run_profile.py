@@ -0,0 +1,96 @@
+import json
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_FILE = "5_Run_profile.json"
+
+
+class RunProfile:
+    """Wall time, CPU time, peak memory and number of items processed by each stage of a design.
+
+    The memory is measured with tracemalloc (memory allocated by Python in the main process,
+    started with the profile), which slows down the design: the profile is only enabled on request.
+    A disabled profile records nothing.
+
+    Attributes:
+    -----------
+        enabled (bool):
+            True if the stages are measured
+        stages (list[dict[str, str | int | float]]):
+            measures of each stage, in order
+        start (tuple[float, float]):
+            wall time and CPU time at the start of the profile
+        own_tracing (bool):
+            True if tracemalloc was started by the profile (and must be stopped by it)
+    """
+
+    __slots__ = ("enabled", "stages", "start", "own_tracing")
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.stages = []
+        self.own_tracing = enabled and not tracemalloc.is_tracing()
+        if self.own_tracing:
+            tracemalloc.start()
+        self.start = (time.perf_counter(), time.process_time())
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict[str, str | int | float]]:
+        """Measures a stage of the design (stages must not be nested)
+
+        Args:
+            name (str): name of the stage
+
+        Yields:
+            dict[str, str | int | float]:
+                measures of the stage, where the number of items processed can be set ('items')
+        """
+        record = {"stage": name}
+        if not self.enabled:
+            yield record
+            return
+        tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        yield record
+        record["wall_s"] = round(time.perf_counter() - wall, 6)
+        record["cpu_s"] = round(time.process_time() - cpu, 6)
+        record["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        self.stages.append(record)
+
+    def save(self, path_result_folder: Path) -> Path | None:
+        """Writes the measures in the 5_Run_profile.json file of the results folder
+
+        Args:
+            path_result_folder (Path):
+                Folder path for results files
+
+        Returns:
+            Path | None: File path of the profile (None if the profile is disabled)
+        """
+        if not self.enabled:
+            return None
+        profile = {
+            "total": {
+                "wall_s": round(time.perf_counter() - self.start[0], 6),
+                "cpu_s": round(time.process_time() - self.start[1], 6),
+                "peak_memory_mb": max(
+                    (record["peak_memory_mb"] for record in self.stages), default=0
+                ),
+            },
+            "stages": self.stages,
+        }
+        self.close()
+        profile_path = path_result_folder.joinpath(PROFILE_FILE)
+        with open(profile_path, mode="w", encoding="UTF-8") as file:
+            json.dump(profile, file, indent=4)
+        return profile_path
+
+    def close(self) -> None:
+        """Stops the memory tracing started by the profile, also when the design failed or was
+        cancelled before saving the profile (can be called several times)"""
+        if self.own_tracing:
+            tracemalloc.stop()
+            self.own_tracing = False
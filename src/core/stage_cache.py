@@ -0,0 +1,128 @@
+import hashlib
+import json
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from core.result_index import file_digest
+
+# part of the stage keys: to change when the results of the stages change of form, so that the
+# results pickled by a previous version are not reused
+CACHE_VERSION = 1
+# results kept in a stage cache folder (--stage_cache): about 20 designs (5 stages by design)
+FOLDER_MAX_ENTRIES = 100
+
+
+class StageCache:
+    """Results of the stages of a design (load, select, readouts, primers, completion), reused by
+    the next designs whose stage inputs are the same.
+
+    The key of a stage is a digest of its parameter values, of the content of its input files and
+    of the key of the stage it follows: a design only recomputes the stages downstream of the first
+    changed input. Results are kept in memory, and also pickled in a folder if one is given (to be
+    reused by the next runs of the script). The cached results are shared: the stages must not
+    modify the results of the previous stages.
+
+    When a maximal number of entries is given, the least recently used results are released from
+    memory, and their files removed from the folder, beyond this number.
+
+    Attributes:
+    -----------
+        folder (Path):
+            folder of the pickled results (None for a memory only cache)
+        entries (dict[str, Any]):
+            results of the stages, by key
+        digests (dict[tuple[str, int, int], str]):
+            content digests of the input files, by file, modification time and size
+        max_entries (int):
+            number of results kept in memory and in the folder (at least 1, None: no limit)
+    """
+
+    __slots__ = ("folder", "entries", "digests", "max_entries")
+
+    def __init__(self, folder: Path = None, max_entries: int = None) -> None:
+        self.folder = folder
+        self.entries = {}
+        self.digests = {}
+        self.max_entries = max_entries
+        if folder is not None:
+            folder.mkdir(parents=True, exist_ok=True)
+
+    def file_digest(self, path: Path) -> str:
+        """Content digest (sha256) of an input file, computed again only if the file was modified
+
+        Args:
+            path (Path): File path
+
+        Returns:
+            str: hexadecimal digest of the file content
+        """
+        return file_digest(path, self.digests)
+
+    def key(self, stage: str, inputs: dict[str, Any]) -> str:
+        """Key of a stage: digest of the stage name and of its inputs (json serializable values)"""
+        text = json.dumps(
+            {"stage": stage, "version": CACHE_VERSION, **inputs},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(text.encode("UTF-8")).hexdigest()
+
+    def run(
+        self, stage: str, inputs: dict[str, Any], compute: Callable[[], Any]
+    ) -> tuple[str, Any]:
+        """Returns the result of a stage, computed only if no result of the stage with the same
+        inputs is in the cache
+
+        Args:
+            stage (str):
+                name of the stage
+            inputs (dict[str, Any]):
+                parameter values, file digests and key of the previous stage
+            compute (Callable[[], Any]):
+                function computing the result of the stage
+
+        Returns:
+            tuple[str, Any]: key and result of the stage
+        """
+        key = self.key(stage, inputs)
+        path = self.folder.joinpath(f"{stage}_{key}.pickle") if self.folder else None
+        if key in self.entries:
+            print(f"{stage} : result of a previous design reused")
+            # most recently used result last
+            self.entries[key] = self.entries.pop(key)
+            if path is not None and path.exists():
+                path.touch()
+            return key, self.entries[key]
+        if path is not None and path.exists():
+            with open(path, mode="rb") as file:
+                self.entries[key] = pickle.load(file)
+            path.touch()
+            print(f"{stage} : result of a previous design reused")
+        else:
+            self.entries[key] = compute()
+            if path is not None:
+                with open(path, mode="wb") as file:
+                    pickle.dump(self.entries[key], file)
+        result = self.entries[key]
+        self.evict()
+        return key, result
+
+    def evict(self) -> None:
+        """Releases the least recently used results beyond the maximal number of entries (results
+        in memory and files of the folder)"""
+        if self.max_entries is None:
+            return
+        for key in list(self.entries)[: -self.max_entries]:
+            del self.entries[key]
+        if self.folder is not None:
+            files = sorted(
+                self.folder.glob("*.pickle"), key=lambda path: path.stat().st_mtime_ns
+            )
+            for path in files[: -self.max_entries]:
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.digests.clear()
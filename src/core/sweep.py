@@ -0,0 +1,158 @@
+import csv
+import datetime as dt
+import json
+from itertools import product
+from pathlib import Path
+
+from core.function import graph_sweep
+from core.probe_database import database_chromosome, load_chromosome_database
+from core.resource_cache import load_chromosome
+from models.library import Library
+from models.probe_set import ProbeSet
+
+SWEEP_PARAMETERS = ("start_lib", "resolution", "nbr_probe_by_locus")
+SWEEP_COLUMNS = (
+    *SWEEP_PARAMETERS,
+    "nbr_loci",
+    "nbr_probes",
+    "min",
+    "mean",
+    "max",
+    "status",
+)
+
+
+def parameter_values(values: int | list[int] | dict[str, int]) -> list[int]:
+    """Values of a swept parameter: a single value, a list of values, or a range given as
+    {"start": ..., "stop": ..., "step": ...} (stop included)"""
+    if isinstance(values, dict):
+        return list(range(values["start"], values["stop"] + 1, values["step"]))
+    if isinstance(values, list):
+        return values
+    return [values]
+
+
+def load_sweep(sweep_path: Path, parameters: dict[str, str | int | Path]) -> list[dict]:
+    """Reads the ranges of a sweep file and returns the grid of the parameters to evaluate
+
+    Args:
+        sweep_path (Path):
+            json file with the values of start_lib, resolution and/or nbr_probe_by_locus
+            (parameters not given keep their value of the input parameters)
+        parameters (dict[str, str | int | Path]):
+            input parameters of the library
+
+    Returns:
+        list[dict]: start_lib, resolution and nbr_probe_by_locus of each point of the grid
+    """
+    with open(sweep_path, mode="r", encoding="UTF-8") as file:
+        ranges = json.load(file)
+    unknown = set(ranges) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(
+            f"Parameters that cannot be swept: {', '.join(sorted(unknown))} "
+            f"(only {', '.join(SWEEP_PARAMETERS)})"
+        )
+    values = [
+        parameter_values(ranges.get(name, parameters[name]))
+        for name in SWEEP_PARAMETERS
+    ]
+    return [dict(zip(SWEEP_PARAMETERS, point)) for point in product(*values)]
+
+
+def sweep_point(
+    probe_set: ProbeSet, parameters: dict[str, str | int | Path], point: dict
+) -> dict[str, int | float | str]:
+    """Per-locus counts (locus_length design) or lengths (nbr_probes design) of one point of the
+    grid, from the coordinates of the probes only. The status of the point reports the loci
+    without probe (locus_length design) and the loci with less than nbr_probe_by_locus probes
+    (nbr_probes design, last locus of the window).
+
+    Returns:
+        dict[str, int | float | str]: row of the point in the sweep summary
+    """
+    library = Library({**parameters, **point})
+    row = {**point, "nbr_loci": 0, "nbr_probes": 0, "min": "", "mean": "", "max": ""}
+    try:
+        nbr_probes = library.loci_nbr_probes(
+            probe_set, point["resolution"], point["nbr_probe_by_locus"]
+        )
+    except ValueError:
+        # a locus without probe after start_lib (nbr_probes design)
+        row["status"] = "not enough probes"
+        return row
+    if library.design_type == "locus_length":
+        list_info = nbr_probes
+    else:
+        list_info = library.loci_length_info(
+            probe_set, point["resolution"], point["nbr_probe_by_locus"]
+        )
+    row.update(
+        nbr_loci=len(list_info),
+        nbr_probes=sum(nbr_probes),
+        min=min(list_info),
+        mean=round(sum(list_info) / len(list_info), 1),
+        max=max(list_info),
+    )
+    empty = sum(1 for nbr in nbr_probes if nbr == 0)
+    short = sum(1 for nbr in nbr_probes if 0 < nbr < point["nbr_probe_by_locus"])
+    issues = []
+    if empty:
+        issues.append(f"{empty} empty loci")
+    if short and library.design_type == "nbr_probes":
+        issues.append(f"{short} short loci")
+    row["status"] = ", ".join(issues) if issues else "ok"
+    return row
+
+
+def run_sweep(
+    parameters: dict[str, str | int | Path], sweep_path: Path, output_folder: Path
+) -> Path:
+    """Parameter sweep: evaluates the per-locus probe counts (or locus lengths) of a grid of
+    start_lib / resolution / nbr_probe_by_locus values, without designing the libraries (no
+    sequence assembled, no result file written by design). The chromosome file (or the
+    chromosome in the probe database if one is given) is loaded once.
+
+    Args:
+        parameters (dict[str, str | int | Path]):
+            input parameters of the library (chromosome, design type, number of loci...)
+        sweep_path (Path):
+            json file with the swept values (see load_sweep)
+        output_folder (Path):
+            output folder path to store results files
+
+    Returns:
+        Path: folder of the sweep results (sweep_summary.csv, sweep_plot.png)
+    """
+    grid = load_sweep(sweep_path, parameters)
+    if parameters.get("probe_database"):
+        probe_set = load_chromosome_database(
+            parameters["probe_database"],
+            database_chromosome(parameters["chromosome_file"]),
+        )
+    else:
+        probe_set = load_chromosome(parameters["genomic_path"])
+    rows = [sweep_point(probe_set, parameters, point) for point in grid]
+
+    date_now = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+    path_result_folder = output_folder.joinpath("Library_Sweep_Results", date_now)
+    path_result_folder.mkdir(parents=True)
+    info = (
+        "probes_by_locus"
+        if parameters["design_type"] == "locus_length"
+        else "locus_size"
+    )
+    header = [
+        f"{column}_{info}" if column in ("min", "mean", "max") else column
+        for column in SWEEP_COLUMNS
+    ]
+    summary_path = path_result_folder.joinpath("sweep_summary.csv")
+    with open(summary_path, mode="w", encoding="UTF-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows([row[column] for column in SWEEP_COLUMNS] for row in rows)
+    graph_sweep(rows, path_result_folder, parameters["design_type"])
+    print(
+        f"{len(rows)} parameter sets evaluated, results saved in {path_result_folder}/"
+    )
+    return path_result_folder
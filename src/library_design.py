@@ -6,7 +6,7 @@ Created on Fri Apr 16 16:07:15 2021
 @author: Christophe Houbron
 
 This script is used to design the primary probes corresponding to the genomic regions to be studied.
-Each primary probe contains a number (2 to 5) of a readout sequence specific to each locus, 
+Each primary probe contains a number (usually 2 to 5) of a readout sequence specific to each locus, 
 a sequence (30-35 bases) complementary to the genomic DNA, and sequences on either side of 
 the oligo to allow amplification of the library.  
 
@@ -30,7 +30,13 @@ universal primers.
 from pathlib import Path
 
 from core.args import parse_arguments, check_args
+from core.batch import run_batch
+from core.bed_cache import build_bed_cache
+from core.data_function import load_parameters
 from core.design_process import design_process
+from core.probe_database import build_probe_database
+from core.stage_cache import FOLDER_MAX_ENTRIES, StageCache
+from core.sweep import run_sweep
 from core.app_gui import main_gui
 
 
@@ -45,10 +51,38 @@ def main():
     check_args(args)
     print(args)
 
-    if not args.cli:
+    if args.build_database:
+        database_path = build_probe_database(args.build_database)
+        print(f"Probe database created : {database_path}")
+    elif args.batch:
+        run_batch(
+            args.batch,
+            args.output,
+            workers=args.workers,
+            stream=args.stream,
+            force=args.force,
+        )
+    elif args.sweep:
+        run_sweep(load_parameters(args.parameters), args.sweep, args.output)
+    elif not args.cli:
         json_parameters_path = args.parameters
         output_folder = args.output
-        design_process(output_folder=output_folder, json_path=json_parameters_path)
+        if args.build_cache:
+            genomic_path = load_parameters(json_parameters_path)["genomic_path"]
+            print(f"Binary cache created : {build_bed_cache(genomic_path)}")
+        design_process(
+            output_folder=output_folder,
+            json_path=json_parameters_path,
+            workers=args.workers,
+            stream=args.stream,
+            stage_cache=(
+                StageCache(args.stage_cache, max_entries=FOLDER_MAX_ENTRIES)
+                if args.stage_cache
+                else None
+            ),
+            force=args.force,
+            profile=args.profile,
+        )
     else:
         main_gui()
 
@@ -0,0 +1,11 @@
+class DesignCancelledException(Exception):
+    """Handles the cancellation of a design by its CancellationToken (between two stages or two
+    loci of the design).
+
+    Args:
+        stage (str): The stage of the design running when the design was cancelled.
+    """
+
+    def __init__(self, stage):
+        msg = f"\n{'-'*70}\n Design cancelled during the stage : {stage}"
+        super().__init__(msg)
@@ -118,6 +118,18 @@ class Interface(tk.Tk):
         button.place(x=x, y=y)
         return button
 
+    def create_label_place(self, master, text, x, y):
+        label = tk.Label(master=master, text=text, anchor=tk.W)
+        label.place(x=x, y=y)
+        return label
+
+    def create_progressbar_place(self, master, x, y, length):
+        progressbar = ttk.Progressbar(
+            master=master, orient=tk.HORIZONTAL, length=length, mode="determinate"
+        )
+        progressbar.place(x=x, y=y)
+        return progressbar
+
     def create_radiobutton(
         self,
         master,
@@ -1,17 +1,32 @@
 import random
-import copy
 import re
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from itertools import accumulate, islice, pairwise
 
-from models.locus import Locus
+from models.locus import Locus, locus_random
+from models.probe import as_batch
+from models.probe_template import ProbeTemplate
+from models.probe_set import ProbeSet
 
 
 def recover_chr_name(chr_file_path):
-    match = re.match(r"\S*(chr\w+)\.bed$", chr_file_path)
+    match = re.match(r"\S*(chr\w+)\.bed(?:\.gz)?$", chr_file_path)
     if match:
         return match.group(1)
 
 
 class Library:
+    # fixed attributes (no per-instance __dict__)
+    __slots__ = (
+        "start_lib",
+        "nbr_loci_total",
+        "max_diff_percent",
+        "design_type",
+        "loci_list",
+        "chromosome_name",
+        "seed",
+    )
 
     def __init__(self, parameters: dict[str, str | int]) -> None:
         self.start_lib = parameters["start_lib"]
@@ -21,6 +36,10 @@ class Library:
         self.loci_list = None
 
         self.chromosome_name = recover_chr_name(parameters["chromosome_file"])
+        # seed of all the random draws of the library (a new one is drawn if not given)
+        self.seed = parameters.get("seed")
+        if self.seed is None:
+            self.seed = random.SystemRandom().getrandbits(32)
 
     def add_locus(self, locus: Locus):
         """add a locus in the Locus collection (total_loci)
@@ -35,15 +54,18 @@ class Library:
 
     def reduce_list_seq(
         self,
-        seq_list: list[int, int, str],
+        seq_list: ProbeSet | list[list[int, int, str]],
         resolution: int,
         nbr_probe_by_locus: int,
-    ) -> list[list[int, int, str]]:
+    ) -> ProbeSet:
         """Reduces the list of genomic sequences to library coordinates only to avoid
         iterating over all the genomic sequences of the chosen chromosome each time.
+        The library bounds are found by binary search on the coordinates (sequences sorted by
+        coordinates, as in the OligoMiner files), and the reduced sequences are a view of the
+        original ones (no copy of the coordinates).
 
         Args:
-            seq_list (list[list[str]]):
+            seq_list (ProbeSet | list[list[int, int, str]]):
                 list of genomic sequences with coordinates, based on target chromosome.
                 [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
             resolution (int):
@@ -52,29 +74,152 @@ class Library:
                 number of probes in a Locus
 
         Returns:
-            (list[list[str]):
-                A list of sequence reduced: [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
+            (ProbeSet):
+                sequences reduced: [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
         """
-        list_seq_genomic_reduced = []
+        if not isinstance(seq_list, ProbeSet):
+            seq_list = ProbeSet.from_list(seq_list)
+        first = seq_list.locate_from(self.start_lib)
+        last = first
         if self.design_type == "locus_length":
-            for seq in seq_list:
-                if int(seq[0]) >= self.start_lib and int(seq[1]) <= (
-                    self.start_lib + (self.nbr_loci_total * resolution)
-                ):
-                    list_seq_genomic_reduced.append(seq)
+            end_lib = self.start_lib + (self.nbr_loci_total * resolution)
+            last = bisect_right(seq_list.ends, end_lib, lo=first)
         elif self.design_type == "nbr_probes":
-            for seq in seq_list:
-                if self.start_lib <= int(seq[0]) and len(list_seq_genomic_reduced) < (
-                    self.nbr_loci_total * nbr_probe_by_locus
-                ):
-                    list_seq_genomic_reduced.append(seq)
-        return list_seq_genomic_reduced
+            last = min(first + self.nbr_loci_total * nbr_probe_by_locus, len(seq_list))
+        return seq_list[first:last]
+
+    def min_nbr_sequences(self, nbr_probe_by_locus: int) -> int:
+        """Minimal number of genomic sequences in the library window: one for a design by locus
+        length (loci located in gaps of the chromosome file have no probe), one in each locus for a
+        design by number of probes (the last locus can be partly filled)
+
+        Args:
+            nbr_probe_by_locus (int):
+                number of probes in a Locus
+
+        Returns:
+            int: number of genomic sequences needed
+        """
+        if self.design_type == "nbr_probes":
+            return (self.nbr_loci_total - 1) * nbr_probe_by_locus + 1
+        return 1
+
+    def missing_locus_error(
+        self, locus_index: int, nbr_probe_by_locus: int
+    ) -> ValueError:
+        """Error of a design by number of probes whose window has no sequence for a locus"""
+        return ValueError(
+            f"Not enough genomic sequences in the library window starting at start_lib = "
+            f"{self.start_lib}: no sequence for locus {locus_index + 1} (at least "
+            f"{self.min_nbr_sequences(nbr_probe_by_locus)} sequences needed)"
+        )
+
+    def partition_loci(
+        self,
+        seq_list_reduced: ProbeSet | list[list[int, int, str]],
+        resolution: int,
+        nbr_probe_by_locus: int,
+    ) -> list[tuple[ProbeSet, int, int]]:
+        """Distributes the reduced genomic sequences between all the loci of the library in a single
+        pass over the sequences (sorted by coordinates, as returned by reduce_list_seq).
+
+        Args:
+            seq_list_reduced (ProbeSet | list[list[int, int, str]]):
+                reduced list of genomic sequences with coordinates
+            resolution (int):
+                length of the Locus
+            nbr_probe_by_locus (int):
+                number of probes in a Locus
+
+        Returns:
+            list[tuple[ProbeSet, int, int]]:
+                for each locus (in locus order), its genomic sequences, start and end coordinates
+
+        Raises:
+            ValueError: no sequence for a locus of a design by number of probes
+        """
+        if not isinstance(seq_list_reduced, ProbeSet):
+            seq_list_reduced = ProbeSet.from_list(seq_list_reduced)
+        starts = seq_list_reduced.starts
+        ends = seq_list_reduced.ends
+        nbr_seq = len(seq_list_reduced)
+
+        buckets = []
+        if self.design_type == "locus_length":
+            index = 0
+            for locus_index in range(self.nbr_loci_total):
+                start = self.start_lib + locus_index * resolution
+                end = start + resolution
+                # sequences starting before the locus (or overlapping the previous locus end)
+                while index < nbr_seq and starts[index] < start:
+                    index += 1
+                first = index
+                while index < nbr_seq and ends[index] < end:
+                    index += 1
+                buckets.append((seq_list_reduced[first:index], start, end))
+        elif self.design_type == "nbr_probes":
+            for locus_index in range(self.nbr_loci_total):
+                probes = seq_list_reduced[
+                    locus_index
+                    * nbr_probe_by_locus : (locus_index + 1)
+                    * nbr_probe_by_locus
+                ]
+                if not len(probes):
+                    raise self.missing_locus_error(locus_index, nbr_probe_by_locus)
+                buckets.append((probes, probes.starts[0], probes.ends[-1]))
+        return buckets
+
+    def iter_loci(
+        self,
+        seq_iter: Iterable[list[int, int, str]],
+        resolution: int,
+        nbr_probe_by_locus: int,
+    ) -> Iterator[tuple[ProbeSet, int, int]]:
+        """Streaming version of partition_loci: the genomic sequences of the library window (sorted
+        by coordinates, as read by data_function.seq_genomic_window) are distributed between the
+        loci as they are read, only the sequences of one locus being held in memory.
+
+        Args:
+            seq_iter (Iterable[list[int, int, str]]):
+                genomic sequences of the library window with coordinates
+            resolution (int):
+                length of the Locus
+            nbr_probe_by_locus (int):
+                number of probes in a Locus
+
+        Yields:
+            tuple[ProbeSet, int, int]:
+                for each locus (in locus order), its genomic sequences, start and end coordinates
+
+        Raises:
+            ValueError: no sequence for a locus of a design by number of probes
+        """
+        seq_iter = iter(seq_iter)
+        if self.design_type == "locus_length":
+            seq = next(seq_iter, None)
+            for locus_index in range(self.nbr_loci_total):
+                start = self.start_lib + locus_index * resolution
+                end = start + resolution
+                # sequences starting before the locus (or overlapping the previous locus end)
+                while seq is not None and seq[0] < start:
+                    seq = next(seq_iter, None)
+                locus_seq = []
+                while seq is not None and seq[1] < end:
+                    locus_seq.append(seq)
+                    seq = next(seq_iter, None)
+                yield ProbeSet.from_list(locus_seq), start, end
+        elif self.design_type == "nbr_probes":
+            for locus_index in range(self.nbr_loci_total):
+                probes = ProbeSet.from_list(islice(seq_iter, nbr_probe_by_locus))
+                if not len(probes):
+                    raise self.missing_locus_error(locus_index, nbr_probe_by_locus)
+                yield probes, probes.starts[0], probes.ends[-1]
 
     def add_rt_bcd_to_primary_seq(
         self, bcd_rt_list: list[list[str]], parameters: dict[str, str | int]
     ) -> None:
         """Add the rt/bcd sequences on either side of the genomic sequence according to the locus and the
-        number of sites for oligo imaging..
+        number of sites for oligo imaging (any number, see ProbeTemplate for the 5'/3' split).
 
         Args:
             bcd_rt_list (list[list[str]]):
@@ -82,40 +227,28 @@ class Library:
             parameters (dict[str, str | int]):
                 dictionary with parameters for library design
         """
-        count = 0
-        for locus in self.loci_list:
-            seq_with_bcd = []
-            bcd_rt_seq = bcd_rt_list[count][1]
-            locus.bcd_locus = bcd_rt_list[count][0]
-
-            for genomic_seq in locus.seq_probe:
-                if parameters["nbr_bcd_rt_by_probe"] == 2:
-                    seq_with_bcd.append(f"{bcd_rt_seq} {genomic_seq} {bcd_rt_seq}")
-                elif parameters["nbr_bcd_rt_by_probe"] == 3:
-                    seq_with_bcd.append(f"{bcd_rt_seq} {genomic_seq} {bcd_rt_seq * 2}")
-                elif parameters["nbr_bcd_rt_by_probe"] == 4:
-                    seq_with_bcd.append(
-                        f"{bcd_rt_seq * 2} {genomic_seq} {bcd_rt_seq * 2}"
-                    )
-                elif parameters["nbr_bcd_rt_by_probe"] == 5:
-                    seq_with_bcd.append(
-                        f"{bcd_rt_seq * 3} {genomic_seq} {bcd_rt_seq * 2}"
-                    )
-            count += 1
-            locus.seq_probe = seq_with_bcd
+        template = ProbeTemplate(parameters["nbr_bcd_rt_by_probe"])
+        for locus, bcd_rt in zip(self.loci_list, bcd_rt_list):
+            locus.bcd_locus = bcd_rt[0]
+            locus.seq_probe = template.assemble(locus.seq_probe, bcd_rt[1])
 
     def add_univ_primer_each_side(self) -> None:
         """Add the forward and reverse primer sequences on either side of all primary probe loci sequences ."""
         for locus in self.loci_list:
-            p_fw = copy.deepcopy(locus.primers_univ[1])
-            p_rev = copy.deepcopy(locus.primers_univ[3])
-            temp = [f"{p_fw} {x} {p_rev}" for x in locus.seq_probe]
-            locus.seq_probe = temp
+            p_fw = locus.primers_univ[1]
+            p_rev = locus.primers_univ[3]
+            locus.seq_probe = as_batch(locus.seq_probe).with_primers(p_fw, p_rev)
 
-    def check_length_seq_diff(self) -> tuple[int, int, int, int]:
+    def check_length_seq_diff(
+        self, loci: Iterable[Locus] = None
+    ) -> tuple[int, int, int, int]:
         """Evaluation of the length (min, max) of the primary probes of the entire library and
           calculation of the percentage difference
 
+        Args:
+            loci (Iterable[Locus]):
+                loci of the library, when they are streamed. Defaults to the loci of the library.
+
         Returns:
             tuple[int, int, int, int]:
                 minimal probe size
@@ -123,23 +256,22 @@ class Library:
                 difference in nucleotides between the smallest and largest probe
                 difference in size expressed as a percentage
         """
-        minimal_length = None
-        maximal_length = None
-        for locus in self.loci_list:
-            for seq in locus.seq_probe:
-                if not minimal_length and not maximal_length:
-                    minimal_length = len(seq.replace(" ", ""))
-                    maximal_length = len(seq.replace(" ", ""))
-                elif len(seq.replace(" ", "")) < minimal_length:
-                    minimal_length = len(seq.replace(" ", ""))
-                elif len(seq.replace(" ", "")) > maximal_length:
-                    maximal_length = len(seq.replace(" ", ""))
+        # probe lengths are computed by locus (no rendering of the sequences)
+        loci = self.loci_list if loci is None else loci
+        lengths_by_locus = (as_batch(locus.seq_probe).lengths() for locus in loci)
+        bounds = [
+            (min(lengths), max(lengths)) for lengths in lengths_by_locus if lengths
+        ]
+        minimal_length = min(bound[0] for bound in bounds)
+        maximal_length = max(bound[1] for bound in bounds)
         difference_percentage = 100 - (minimal_length * 100 / maximal_length)
         difference_nbr = maximal_length - minimal_length
         return minimal_length, maximal_length, difference_nbr, difference_percentage
 
     def completion(self, difference_percentage: int, max_length: int) -> None:
         """Random nucleotide completion function for sequences with too large a size difference (default=10%)
+        The nucleotides of each locus are drawn at once, from a generator seeded by the library seed
+        and the locus number (reproducible design).
 
         Args:
             difference_percentage (int):
@@ -150,14 +282,7 @@ class Library:
 
         if difference_percentage >= self.max_diff_percent:
             for locus in self.loci_list:
-                seq_completion = []
-                for seq in locus.seq_probe:
-                    diff_seq_with_max = max_length - len(seq.replace(" ", ""))
-                    seq_added = ""
-                    for i in range(diff_seq_with_max):
-                        seq_added = seq_added + random.choice("atgc")
-                    seq_completion.append(seq + " " + seq_added)
-                locus.seq_probe = seq_completion
+                self.complete_locus(locus, max_length)
             print("-" * 70)
             print("Completion finished")
             print("-" * 70)
@@ -166,16 +291,93 @@ class Library:
             print("No completion required")
             print("-" * 70)
 
+    def complete_locus(self, locus: Locus, max_length: int) -> None:
+        """Random nucleotide completion of the primary probes of a locus up to max_length
+
+        Args:
+            locus (Locus):
+                A Locus object, with its primary probes assembled
+            max_length (int):
+                maximum size between all the primary probe sequences of all Locus
+        """
+        probes = as_batch(locus.seq_probe)
+        rng = locus_random(self.seed, locus.locus_n, "completion")
+        diff_seq_with_max = [max_length - length for length in probes.lengths()]
+        nucleotides = "".join(rng.choices("atgc", k=sum(diff_seq_with_max)))
+        offsets = accumulate(diff_seq_with_max, initial=0)
+        seq_completion = [nucleotides[a:b] for a, b in pairwise(offsets)]
+        locus.seq_probe = probes.with_paddings(seq_completion)
+
+    def locus_length_info(self, locus: Locus) -> int:
+        """Number of probes of the locus, or size of the locus, depending on the design type"""
+        if self.design_type == "locus_length":
+            return len(locus.seq_probe)
+        return locus.end_seq - locus.start_seq
+
+    def loci_nbr_probes(
+        self,
+        seq_list: ProbeSet | list[list[int, int, str]],
+        resolution: int,
+        nbr_probe_by_locus: int,
+    ) -> list[int]:
+        """Number of probes kept in each locus, computed from the coordinates only (no locus built,
+        no sequence assembled).
+
+        Args:
+            seq_list (ProbeSet | list[list[int, int, str]]):
+                genomic sequences with coordinates, sorted by coordinates
+            resolution (int):
+                length of the Locus
+            nbr_probe_by_locus (int):
+                number of probes in a Locus
+
+        Returns:
+            list[int]: number of probes of each locus
+        """
+        seq_list_reduced = self.reduce_list_seq(
+            seq_list, resolution, nbr_probe_by_locus
+        )
+        loci_probes = self.partition_loci(
+            seq_list_reduced, resolution, nbr_probe_by_locus
+        )
+        # at most nbr_probe_by_locus probes are kept by locus (see Locus.check_nbr_probes)
+        return [min(len(probes), nbr_probe_by_locus) for probes, _, _ in loci_probes]
+
+    def loci_length_info(
+        self,
+        seq_list: ProbeSet | list[list[int, int, str]],
+        resolution: int,
+        nbr_probe_by_locus: int,
+    ) -> list[int]:
+        """Number of probes per locus, or size of each locus depending on the design type, as
+        recover_loci_probes_length_info would report them after the design, computed from the
+        coordinates only (no locus built, no sequence assembled).
+
+        Args:
+            seq_list (ProbeSet | list[list[int, int, str]]):
+                genomic sequences with coordinates, sorted by coordinates
+            resolution (int):
+                length of the Locus
+            nbr_probe_by_locus (int):
+                number of probes in a Locus
+
+        Returns:
+            list[int]: list of locus length or number of probes
+        """
+        if self.design_type == "locus_length":
+            return self.loci_nbr_probes(seq_list, resolution, nbr_probe_by_locus)
+        seq_list_reduced = self.reduce_list_seq(
+            seq_list, resolution, nbr_probe_by_locus
+        )
+        loci_probes = self.partition_loci(
+            seq_list_reduced, resolution, nbr_probe_by_locus
+        )
+        return [end - start for _, start, end in loci_probes]
+
     def recover_loci_probes_length_info(self) -> list[int]:
         """Retrieves the number of probes per locus, or the size of each locus depending on the drawing type.
 
         Returns:
             list_info (list[int]): list of locus length or number of probes
         """
-        list_info = []
-        for locus in self.loci_list:
-            if self.design_type == "locus_length":
-                list_info.append(len(locus.seq_probe))
-            else:
-                list_info.append((locus.end_seq - locus.start_seq))
-        return list_info
+        return [self.locus_length_info(locus) for locus in self.loci_list]
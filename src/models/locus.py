@@ -1,6 +1,7 @@
 import random
 
 from models.invalidNbrLocusException import InvalidNbrLocusException
+from models.probe_set import ProbeSet
 
 
 def check_locus_rt_bcd(
@@ -26,6 +27,26 @@ def check_locus_rt_bcd(
         )
 
 
+def locus_random(seed: int, locus_n: int, stage: str) -> random.Random:
+    """Random generator for a stage of the design of a locus, derived from the library seed.
+    The draws of a locus do not depend on the other loci (nor on the order they are processed).
+
+    Args:
+        seed (int):
+            seed of the library (None for a generator that is not reproducible)
+        locus_n (int):
+            Locus Number
+        stage (str):
+            name of the design stage (ex: 'completion')
+
+    Returns:
+        random.Random: generator seeded for this locus and stage
+    """
+    if seed is None:
+        return random.Random()
+    return random.Random(f"{seed}:{stage}:{locus_n}")
+
+
 class Locus:
     """A class for storing all the information about a specific locus
 
@@ -47,6 +68,20 @@ class Locus:
             primary probes sequences in list form. Defaults to None.
     """
 
+    # fixed attributes (no per-instance __dict__): a library can contain thousands of loci
+    __slots__ = (
+        "locus_n",
+        "chr_name",
+        "resolution",
+        "nbr_probe_by_locus",
+        "design_type",
+        "start_seq",
+        "end_seq",
+        "primers_univ",
+        "bcd_locus",
+        "seq_probe",
+    )
+
     def __init__(
         self,
         primers_univ: list[str],
@@ -93,24 +128,49 @@ class Locus:
         """
         self.seq_probe = list_seq
 
+    def fill_genomic_seq(
+        self, probes: ProbeSet, start: int, end: int, seed: int = None
+    ) -> None:
+        """Fills the locus with its genomic sequences and coordinates
+        (as distributed by Library.partition_loci).
+
+        Args:
+            probes (ProbeSet): genomic sequences of the locus, with coordinates
+            start (int): Locus start coordinates (in bp)
+            end (int): Locus end coordinates (in bp)
+            seed (int): seed of the library, for the subsampling of the probes. Defaults to None.
+        """
+        if self.design_type == "locus_length":
+            probes = self.check_nbr_probes(probes, seed)
+        self.start_seq = start
+        self.end_seq = end
+        self.seq_probe = [x[2] for x in probes]
+
     def check_nbr_probes(
-        self, list_seq: list[list[int, int, str]]
+        self, list_seq: ProbeSet | list[list[int, int, str]], seed: int = None
     ) -> list[list[int, int, str]]:
         """Checks the number of primary sequences for the locus,
-        and mixes and reduces the number of sequences if the maximum limit is reached.
+        and randomly reduces the number of sequences if the maximum limit is reached.
+        Only the indices of the kept sequences are drawn (the list is neither shuffled nor
+        modified), with a generator seeded by the library seed and the locus number.
 
         Args:
-            list_seq (list[list[str]):
-                A list of sequence : [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
+            list_seq (ProbeSet | list[list[str]):
+                A list of sequence sorted by coordinates:
+                [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
+            seed (int):
+                seed of the library (None for a draw that is not reproducible). Defaults to None.
 
         Returns:
             (list[list[str]):
-                A list of sequence reduced: [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
+                A list of sequence reduced, sorted by coordinates:
+                [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
         """
+        indices = range(len(list_seq))
         if len(list_seq) > self.nbr_probe_by_locus:
-            random.shuffle(list_seq)
-            list_seq = list_seq[: self.nbr_probe_by_locus]
-        return sorted(list_seq)
+            rng = locus_random(seed, self.locus_n, "subsampling")
+            indices = sorted(rng.sample(indices, self.nbr_probe_by_locus))
+        return [list_seq[i] for i in indices]
 
     def recover_genomic_seq(
         self,
@@ -118,40 +178,31 @@ class Locus:
         nbr_loci_total: int,
         start_lib: int,
         seq_list_reduced: list[list[str]],
+        seed: int = None,
     ) -> tuple[list[str], int, int]:
         """Recover genomic sequences based on locus number ( = coordinates)
 
         Args:
             locus (int):
                 Locus number
-            seq_list_reduced (list[list[str]]):
-                list of all sequences for the librairy
+            seq_list_reduced (list[list[str]] | ProbeSet):
+                list of all sequences for the librairy, sorted by coordinates.
+                A ProbeSet avoids rebuilding the coordinates index for each locus.
+            seed (int):
+                seed of the library, for the subsampling of the probes. Defaults to None.
 
         Returns:
             tuple[list[str], int, int]: list sequence for the specific Locus, Locus start coordinates, Locus end coordinates
         """
         if self.design_type == "locus_length":
-            # Calculation of start and end coordinates for each locus
-            start_positions = [
-                start_lib + x * self.resolution for x in range(nbr_loci_total)
-            ]
-            end_positions = [
-                start_lib + (x + 1) * self.resolution for x in range(nbr_loci_total)
-            ]
-            temp = []
-            for seq in seq_list_reduced:
-                if (start_positions[locus - 1] <= seq[0]) and (
-                    seq[1] < end_positions[locus - 1]
-                ):
-                    temp.append(seq)
-                else:
-                    pass
-
-            final_seq_list = self.check_nbr_probes(temp)
-            start = start_positions[
-                locus - 1
-            ]  # to be more precise : final_seq_list[0][0]
-            end = end_positions[locus - 1]  # to be more precise : final_seq_list[-1][1]
+            # Calculation of start and end coordinates of the locus
+            start = start_lib + (locus - 1) * self.resolution
+            end = start + self.resolution
+            # Binary search of the locus sequences instead of a scan of the whole list
+            if not isinstance(seq_list_reduced, ProbeSet):
+                seq_list_reduced = ProbeSet.from_list(seq_list_reduced)
+            first, last = seq_list_reduced.locate(start, end)
+            final_seq_list = self.check_nbr_probes(seq_list_reduced[first:last], seed)
             return [x[2] for x in final_seq_list], start, end
 
         elif self.design_type == "nbr_probes":
@@ -0,0 +1,225 @@
+import re
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+
+# 2 bits per base (A=0, C=1, G=2, T=3), 4 bases per byte (first base in the lowest bits)
+BASES = "ACGT"
+# translation tables of the bases at positions 0, 1, 2 and 3 of a byte to their shifted code
+ENCODE = [
+    bytes.maketrans(b"ACGT", bytes(code << (2 * i) for code in range(4)))
+    for i in range(4)
+]
+DECODE = [
+    "".join(BASES[(byte >> (2 * i)) & 3] for i in range(4)) for byte in range(256)
+]
+LOWER_CASE = re.compile(rb"[a-z]+")
+# bases other than A, C, G, T (N, IUPAC codes...) are stored apart and packed as 'A'
+NOT_ACGT = re.compile(rb"[^ACGT]+")
+# number of bases packed at once (multiple of 4) while the sequences are read
+BLOCK_SIZE = 1 << 20
+
+
+def encode_bases(bases: bytes) -> bytes:
+    """Packs upper case A/C/G/T bases with 2 bits per base
+
+    Args:
+        bases (bytes): bases (A, C, G, T only)
+
+    Returns:
+        bytes: 4 bases per byte, the last byte padded with 'A'
+    """
+    # the bases of each position in a byte are translated to their shifted code and combined
+    # as (arbitrary size) integers, instead of encoding each byte in Python
+    packed = 0
+    for i in range(4):
+        packed |= int.from_bytes(bases[i::4].translate(ENCODE[i]), "little")
+    return packed.to_bytes((len(bases) + 3) // 4, "little")
+
+
+def pack_block(
+    bases: bytes,
+    position: int,
+    packed: bytearray,
+    lower_runs: tuple[array, array],
+    other_runs: tuple[array, array, list[str]],
+) -> None:
+    """Packs a block of bases at the end of the packed data, recording its lower case runs and
+    runs of bases other than A/C/G/T
+
+    Args:
+        bases (bytes): bases of the block (multiple of 4, except for the last block)
+        position (int): position of the first base of the block
+        packed (bytearray): packed data, extended with the block
+        lower_runs (tuple[array, array]): lower case runs, extended with those of the block
+        other_runs (tuple[array, array, list[str]]): runs of bases other than A/C/G/T, extended
+            with those of the block
+    """
+    for match in LOWER_CASE.finditer(bases):
+        lower_runs[0].append(position + match.start())
+        lower_runs[1].append(position + match.end())
+    bases = bases.upper()
+
+    other = False
+    for match in NOT_ACGT.finditer(bases):
+        other_runs[0].append(position + match.start())
+        other_runs[1].append(position + match.end())
+        other_runs[2].append(match.group().decode("ascii"))
+        other = True
+    if other:
+        bases = NOT_ACGT.sub(lambda match: b"A" * len(match.group()), bases)
+    packed += encode_bases(bases)
+
+
+def overlapping_runs(
+    starts: array, ends: array, first: int, last: int
+) -> Iterator[int]:
+    """Index of the runs (sorted, non-overlapping) overlapping the [first, last[ positions"""
+    run = max(bisect_right(starts, first) - 1, 0)
+    while run < len(starts) and starts[run] < last:
+        if ends[run] > first:
+            yield run
+        run += 1
+
+
+class PackedSequences:
+    """Read-only sequence container storing genomic sequences with 2 bits per base.
+
+    Lower case regions (case mask) and bases other than A/C/G/T (N mask) are stored as runs, so
+    sequences are decoded exactly as they were given. Slicing returns a view sharing the packed data.
+
+    Attributes:
+    -----------
+        packed (bytes):
+            all the bases of all the sequences, 2 bits per base
+        offsets (memoryview):
+            position of the first base of each sequence (n + 1 values)
+        lower_runs (tuple[array, array]):
+            start and end positions of the lower case runs
+        other_runs (tuple[array, array, list[str]]):
+            start and end positions and content of the runs of bases other than A/C/G/T
+    """
+
+    __slots__ = ("packed", "offsets", "lower_runs", "other_runs")
+
+    def __init__(
+        self,
+        packed: bytes,
+        offsets: memoryview,
+        lower_runs: tuple[array, array],
+        other_runs: tuple[array, array, list[str]],
+    ) -> None:
+        self.packed = packed
+        self.offsets = offsets
+        self.lower_runs = lower_runs
+        self.other_runs = other_runs
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[str | bytes]) -> "PackedSequences":
+        """Packs genomic sequences, by blocks of bases as the sequences are read
+
+        Args:
+            sequences (Iterable[str | bytes]): genomic sequences
+
+        Returns:
+            PackedSequences: the same sequences, 2 bits per base
+        """
+        offsets = array("q", [0])
+        packed = bytearray()
+        lower_runs = (array("q"), array("q"))
+        other_runs = (array("q"), array("q"), [])
+        block = bytearray()
+        for seq in sequences:
+            block += seq.encode("ascii") if isinstance(seq, str) else seq
+            offsets.append(offsets[-1] + len(seq))
+            if len(block) >= BLOCK_SIZE:
+                size = len(block) - len(block) % 4
+                pack_block(
+                    bytes(block[:size]), len(packed) * 4, packed, lower_runs, other_runs
+                )
+                del block[:size]
+        pack_block(bytes(block), len(packed) * 4, packed, lower_runs, other_runs)
+        return cls(bytes(packed), memoryview(offsets), lower_runs, other_runs)
+
+    @classmethod
+    def from_packed(
+        cls,
+        packed: bytes,
+        offsets: array,
+        lower_runs: tuple[array, array],
+        other_runs: tuple[array, array, list[str]],
+    ) -> "PackedSequences":
+        """PackedSequences of bases already packed (see __reduce__)"""
+        return cls(packed, memoryview(offsets), lower_runs, other_runs)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, item: int | slice) -> "str | PackedSequences":
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return PackedSequences(
+                self.packed,
+                self.offsets[start : max(start, stop) + 1],
+                self.lower_runs,
+                self.other_runs,
+            )
+        if item < 0:
+            item += len(self)
+        return self.decode(self.offsets[item], self.offsets[item + 1])
+
+    def __reduce__(self) -> tuple:
+        # pickled with the packed bases and runs of the sequences of the view only
+        first, last = self.offsets[0], self.offsets[-1]
+        base = first - first % 4
+        offsets = array("q", (offset - base for offset in self.offsets))
+        lower_runs = (array("q"), array("q"))
+        starts, ends = self.lower_runs
+        for run in overlapping_runs(starts, ends, first, last):
+            lower_runs[0].append(starts[run] - base)
+            lower_runs[1].append(ends[run] - base)
+        other_runs = (array("q"), array("q"), [])
+        starts, ends, contents = self.other_runs
+        for run in overlapping_runs(starts, ends, first, last):
+            other_runs[0].append(starts[run] - base)
+            other_runs[1].append(ends[run] - base)
+            other_runs[2].append(contents[run])
+        packed = bytes(self.packed[base // 4 : (last + 3) // 4])
+        return PackedSequences.from_packed, (packed, offsets, lower_runs, other_runs)
+
+    def decode(self, first: int, last: int) -> str:
+        """Decodes the bases located between two positions of the packed data
+
+        Args:
+            first (int): position of the first base
+            last (int): position after the last base
+
+        Returns:
+            str: the bases, with their original case and N
+        """
+        shift = first % 4
+        seq = "".join(
+            DECODE[byte] for byte in self.packed[first // 4 : (last + 3) // 4]
+        )
+        seq = seq[shift : shift + last - first]
+
+        starts, ends, contents = self.other_runs
+        for run in overlapping_runs(starts, ends, first, last):
+            begin = max(starts[run], first)
+            end = min(ends[run], last)
+            content = contents[run][begin - starts[run] : end - starts[run]]
+            seq = seq[: begin - first] + content + seq[end - first :]
+
+        starts, ends = self.lower_runs
+        for run in overlapping_runs(starts, ends, first, last):
+            begin = max(starts[run], first) - first
+            end = min(ends[run], last) - first
+            seq = seq[:begin] + seq[begin:end].lower() + seq[end:]
+        return seq
+
+    @property
+    def nbytes(self) -> int:
+        """Memory size of the packed bases and offsets (in bytes)"""
+        return len(self.packed) + self.offsets.nbytes
@@ -0,0 +1,230 @@
+from collections.abc import Iterator
+
+
+class Probe:
+    """A primary probe stored as its different parts instead of one string
+    (the parts are references to the original sequences, not copies).
+
+    The probe is rendered only when the result files are written: with a space between each part
+    (str(probe)) or as the raw sequence to order (probe.sequence). Parts not yet added are None.
+
+    Attributes:
+    -----------
+        genomic (str):
+            sequence complementary to the genomic DNA
+        bcd_5 (str):
+            barcode/RT block on the 5' side of the genomic sequence. Defaults to None.
+        bcd_3 (str):
+            barcode/RT block on the 3' side of the genomic sequence. Defaults to None.
+        primer_fw (str):
+            forward universal primer sequence. Defaults to None.
+        primer_rev (str):
+            reverse universal primer sequence. Defaults to None.
+        padding (str):
+            random nucleotides added in 3' to standardise the probes length. Defaults to None.
+        length (int):
+            length of the probe (in nucleotides), without spaces
+    """
+
+    __slots__ = (
+        "primer_fw",
+        "bcd_5",
+        "genomic",
+        "bcd_3",
+        "primer_rev",
+        "padding",
+        "length",
+    )
+
+    def __init__(
+        self,
+        genomic: str,
+        bcd_5: str = None,
+        bcd_3: str = None,
+        primer_fw: str = None,
+        primer_rev: str = None,
+        padding: str = None,
+    ) -> None:
+        self.primer_fw = primer_fw
+        self.bcd_5 = bcd_5
+        self.genomic = genomic
+        self.bcd_3 = bcd_3
+        self.primer_rev = primer_rev
+        self.padding = padding
+        self.length = sum(len(part) for part in self.parts())
+
+    def parts(self) -> list[str]:
+        """Returns the parts of the probe from 5' to 3' (parts not yet added are skipped)"""
+        if self.bcd_5 is None and self.bcd_3 is None:
+            middle = [self.genomic]
+        else:
+            middle = [self.bcd_5, self.genomic, self.bcd_3]
+        parts = [self.primer_fw, *middle, self.primer_rev, self.padding]
+        return [part for part in parts if part is not None]
+
+    def with_primers(self, primer_fw: str, primer_rev: str) -> "Probe":
+        """Returns a new probe with universal primers on each side"""
+        return Probe(
+            self.genomic,
+            bcd_5=self.bcd_5,
+            bcd_3=self.bcd_3,
+            primer_fw=primer_fw,
+            primer_rev=primer_rev,
+            padding=self.padding,
+        )
+
+    def with_padding(self, padding: str) -> "Probe":
+        """Returns a new probe completed in 3' with the padding nucleotides"""
+        return Probe(
+            self.genomic,
+            bcd_5=self.bcd_5,
+            bcd_3=self.bcd_3,
+            primer_fw=self.primer_fw,
+            primer_rev=self.primer_rev,
+            padding=padding,
+        )
+
+    @property
+    def sequence(self) -> str:
+        """Raw sequence of the probe (without spaces)"""
+        return "".join(self.parts())
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        return " ".join(self.parts())
+
+    def __repr__(self) -> str:
+        return f"Probe({str(self)!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Probe):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+class ProbeBatch:
+    """All the primary probes of a locus. The parts shared by the probes of the locus (barcode/RT
+    blocks, universal primers) are stored once, only the genomic sequences and the paddings are
+    stored by probe, so each assembly stage is a single call for the whole locus.
+
+    A ProbeBatch behaves like a list of Probe (len, indexing, iteration), the Probe records being
+    built on access. The probes are rendered as strings only by spaced() and raw().
+
+    Attributes:
+    -----------
+        genomic (list[str]):
+            sequences complementary to the genomic DNA
+        bcd_5 (str):
+            barcode/RT block on the 5' side of the genomic sequences. Defaults to None.
+        bcd_3 (str):
+            barcode/RT block on the 3' side of the genomic sequences. Defaults to None.
+        primer_fw (str):
+            forward universal primer sequence. Defaults to None.
+        primer_rev (str):
+            reverse universal primer sequence. Defaults to None.
+        paddings (list[str]):
+            random nucleotides added in 3' of each probe. Defaults to None.
+    """
+
+    __slots__ = ("genomic", "bcd_5", "bcd_3", "primer_fw", "primer_rev", "paddings")
+
+    def __init__(
+        self,
+        genomic: list[str],
+        bcd_5: str = None,
+        bcd_3: str = None,
+        primer_fw: str = None,
+        primer_rev: str = None,
+        paddings: list[str] = None,
+    ) -> None:
+        self.genomic = genomic
+        self.bcd_5 = bcd_5
+        self.bcd_3 = bcd_3
+        self.primer_fw = primer_fw
+        self.primer_rev = primer_rev
+        self.paddings = paddings
+
+    def __len__(self) -> int:
+        return len(self.genomic)
+
+    def __getitem__(self, item: int | slice) -> "Probe | ProbeBatch":
+        paddings = self.paddings[item] if self.paddings is not None else None
+        if isinstance(item, slice):
+            return self.replace(genomic=self.genomic[item], paddings=paddings)
+        return Probe(
+            self.genomic[item],
+            bcd_5=self.bcd_5,
+            bcd_3=self.bcd_3,
+            primer_fw=self.primer_fw,
+            primer_rev=self.primer_rev,
+            padding=paddings,
+        )
+
+    def __iter__(self) -> Iterator[Probe]:
+        return (self[i] for i in range(len(self)))
+
+    def replace(self, **parts) -> "ProbeBatch":
+        """Returns a new batch with some parts replaced (the other parts are shared)"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(parts)
+        return ProbeBatch(**values)
+
+    def with_primers(self, primer_fw: str, primer_rev: str) -> "ProbeBatch":
+        """Returns the batch with universal primers on each side of all the probes"""
+        return self.replace(primer_fw=primer_fw, primer_rev=primer_rev)
+
+    def with_paddings(self, paddings: list[str]) -> "ProbeBatch":
+        """Returns the batch with the probes completed in 3' (one padding by probe)"""
+        return self.replace(paddings=paddings)
+
+    def shared_length(self) -> int:
+        """Length of the parts shared by all the probes of the batch"""
+        shared = (self.primer_fw, self.bcd_5, self.bcd_3, self.primer_rev)
+        return sum(len(part) for part in shared if part is not None)
+
+    def lengths(self) -> list[int]:
+        """Length of each probe (in nucleotides), without rendering the probes"""
+        shared = self.shared_length()
+        if self.paddings is None:
+            return [shared + length for length in map(len, self.genomic)]
+        return [
+            shared + length + len(padding)
+            for length, padding in zip(map(len, self.genomic), self.paddings)
+        ]
+
+    def render(self, separator: str) -> Iterator[str]:
+        """Renders the probes with a separator between their parts"""
+        prefix = "".join(
+            part + separator
+            for part in (self.primer_fw, self.bcd_5)
+            if part is not None
+        )
+        suffix = "".join(
+            separator + part
+            for part in (self.bcd_3, self.primer_rev)
+            if part is not None
+        )
+        if self.paddings is None:
+            return (f"{prefix}{genomic}{suffix}" for genomic in self.genomic)
+        return (
+            f"{prefix}{genomic}{suffix}{separator}{padding}"
+            for genomic, padding in zip(self.genomic, self.paddings)
+        )
+
+    def spaced(self) -> Iterator[str]:
+        """Probes with a space between each part (same as str(probe))"""
+        return self.render(" ")
+
+    def raw(self) -> Iterator[str]:
+        """Raw sequences of the probes (same as probe.sequence)"""
+        return self.render("")
+
+
+def as_batch(seq_probe: "ProbeBatch | list[str]") -> ProbeBatch:
+    """Returns the probes of a locus as a ProbeBatch (a list of strings is the list of the
+    genomic sequences of the locus)"""
+    return seq_probe if isinstance(seq_probe, ProbeBatch) else ProbeBatch(seq_probe)
@@ -0,0 +1,132 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+
+from models.packed_sequences import PackedSequences
+from models.sequence_buffer import SequenceBuffer
+
+
+class ProbeSet:
+    """A column-oriented collection of genomic probes.
+
+    Probes are stored as two typed arrays of coordinates and a sequence container (a single
+    buffer of bases, see SequenceBuffer) instead of one [start, end, sequence] list per probe. Indexing a ProbeSet still returns a
+    [start, end, sequence] list, so it can be used anywhere a list of genomic sequences is expected.
+    Slicing a ProbeSet returns a view sharing the coordinates of the original ProbeSet.
+
+    Attributes:
+    -----------
+        starts (Sequence[int]):
+            start coordinates of the probes (in bp)
+        ends (Sequence[int]):
+            end coordinates of the probes (in bp)
+        sequences (Sequence[str]):
+            genomic sequences of the probes
+    """
+
+    __slots__ = ("starts", "ends", "sequences")
+
+    def __init__(
+        self, starts: Sequence[int], ends: Sequence[int], sequences: Sequence[str]
+    ) -> None:
+        if not len(starts) == len(ends) == len(sequences):
+            raise ValueError("starts, ends and sequences must have the same length")
+        self.starts = starts
+        self.ends = ends
+        self.sequences = sequences
+
+    @classmethod
+    def from_list(cls, seq_list: Iterable[list[int, int, str]]) -> "ProbeSet":
+        """Build a ProbeSet from a list of genomic sequences with coordinates
+
+        Args:
+            seq_list (Iterable[list[int, int, str]]):
+                [[80000, 80020, 'CGATCGTGATGCTAGCATGT'], ...]
+
+        Returns:
+            ProbeSet: the same probes stored column-wise
+        """
+        starts = array("q")
+        ends = array("q")
+        blob = bytearray()
+        offsets = array("q", [0])
+        for start, end, seq in seq_list:
+            starts.append(start)
+            ends.append(end)
+            blob += seq.encode("ascii")
+            offsets.append(len(blob))
+        # memoryviews: slices of the coordinates and sequences are views instead of copies
+        return cls(
+            memoryview(starts),
+            memoryview(ends),
+            SequenceBuffer(memoryview(blob), memoryview(offsets)),
+        )
+
+    @classmethod
+    def from_columns(
+        cls, starts: array, ends: array, sequences: Sequence[str]
+    ) -> "ProbeSet":
+        """ProbeSet of coordinates arrays and sequences (see __reduce__)"""
+        return cls(memoryview(starts), memoryview(ends), sequences)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, item: int | slice) -> "list[int, int, str] | ProbeSet":
+        if isinstance(item, slice):
+            return ProbeSet(self.starts[item], self.ends[item], self.sequences[item])
+        return [self.starts[item], self.ends[item], self.sequences[item]]
+
+    def __iter__(self) -> Iterator[list[int, int, str]]:
+        for start, end, seq in zip(self.starts, self.ends, self.sequences):
+            yield [start, end, seq]
+
+    def __reduce__(self) -> tuple:
+        # pickled with the probes of the set only (not the whole arrays a view refers to), the
+        # sequences in their container (single buffer, packed bases)
+        return ProbeSet.from_columns, (
+            array("q", self.starts),
+            array("q", self.ends),
+            self.sequences,
+        )
+
+    def locate(self, start: int, end: int) -> tuple[int, int]:
+        """Binary search of the probes located in the [start, end[ interval.
+        Probes must be sorted by coordinates, as in the OligoMiner files (non-overlapping probes).
+
+        Args:
+            start (int): start coordinate of the interval (in bp)
+            end (int): end coordinate of the interval (in bp), excluded
+
+        Returns:
+            tuple[int, int]: index of the first probe and index after the last probe of the interval
+        """
+        first = bisect_left(self.starts, start)
+        last = bisect_left(self.ends, end, lo=first)
+        return first, last
+
+    def locate_from(self, start: int) -> int:
+        """Binary search of the first probe starting at `start` or after
+
+        Args:
+            start (int): coordinate (in bp)
+
+        Returns:
+            int: index of the first probe starting at `start` or after
+        """
+        return bisect_left(self.starts, start)
+
+    def pack(self) -> "ProbeSet":
+        """Returns the same probes with sequences packed with 2 bits per base
+        (decoded when accessed, see PackedSequences)"""
+        sequences = self.sequences
+        if isinstance(sequences, SequenceBuffer):
+            # bases packed from the buffer, without decoding them
+            sequences = sequences.raw()
+        return ProbeSet(
+            self.starts, self.ends, PackedSequences.from_sequences(sequences)
+        )
+
+    def to_list(self) -> list[list[int, int, str]]:
+        """Returns the probes as a list of [start, end, sequence]"""
+        return list(self)
@@ -0,0 +1,86 @@
+from collections.abc import Iterable
+
+from models.probe import ProbeBatch
+
+# Number of barcodes/RTs in 5' and in 3' of the genomic sequence, for the historical numbers of
+# barcodes/RTs by probe. Other numbers are split evenly, with the extra one in 5'.
+READOUT_SPLITS = {2: (1, 1), 3: (1, 2), 4: (2, 2), 5: (3, 2)}
+
+
+def readout_split(nbr_bcd_rt_by_probe: int) -> tuple[int, int]:
+    """Number of barcode/RT repeats on the 5' side and on the 3' side of the genomic sequence
+
+    Args:
+        nbr_bcd_rt_by_probe (int): number of barcodes/RTs by probe
+
+    Returns:
+        tuple[int, int]: repeats in 5', repeats in 3'
+    """
+    if nbr_bcd_rt_by_probe < 1:
+        raise ValueError(
+            f"Number of barcodes/RTs by probe must be at least 1 ({nbr_bcd_rt_by_probe})"
+        )
+    if nbr_bcd_rt_by_probe in READOUT_SPLITS:
+        return READOUT_SPLITS[nbr_bcd_rt_by_probe]
+    repeats_3 = nbr_bcd_rt_by_probe // 2
+    return nbr_bcd_rt_by_probe - repeats_3, repeats_3
+
+
+class ProbeTemplate:
+    """Compiled layout of the primary probes of a library:
+    PU.fw | RT x k5' | genomic | RT x k3' | PU.rev | pad
+
+    The barcode/RT blocks of a locus are built once and shared by all the probes of the locus.
+
+    Attributes:
+    -----------
+        repeats_5 (int):
+            number of barcode/RT repeats in 5' of the genomic sequence
+        repeats_3 (int):
+            number of barcode/RT repeats in 3' of the genomic sequence
+    """
+
+    __slots__ = ("repeats_5", "repeats_3")
+
+    def __init__(self, nbr_bcd_rt_by_probe: int) -> None:
+        self.repeats_5, self.repeats_3 = readout_split(nbr_bcd_rt_by_probe)
+
+    def readout_blocks(self, bcd_rt_seq: str) -> tuple[str, str | None]:
+        """Barcode/RT blocks of a locus
+
+        Args:
+            bcd_rt_seq (str): barcode/RT sequence of the locus
+
+        Returns:
+            tuple[str, str | None]: block in 5', block in 3' (None without repeat in 3')
+        """
+        bcd_3 = bcd_rt_seq * self.repeats_3 if self.repeats_3 else None
+        return bcd_rt_seq * self.repeats_5, bcd_3
+
+    def assemble(
+        self,
+        genomic_seqs: Iterable[str],
+        bcd_rt_seq: str,
+        primers_univ: list[str] = None,
+    ) -> ProbeBatch:
+        """Assembles all the probes of a locus in one call
+
+        Args:
+            genomic_seqs (Iterable[str]):
+                genomic sequences of the locus
+            bcd_rt_seq (str):
+                barcode/RT sequence of the locus
+            primers_univ (list[str]):
+                names and sequences of the universal primers (added if given). Defaults to None.
+
+        Returns:
+            ProbeBatch: primary probes of the locus
+        """
+        bcd_5, bcd_3 = self.readout_blocks(bcd_rt_seq)
+        batch = ProbeBatch(list(genomic_seqs), bcd_5=bcd_5, bcd_3=bcd_3)
+        if primers_univ:
+            batch = batch.with_primers(primers_univ[1], primers_univ[3])
+        return batch
+
+    def __str__(self) -> str:
+        return f"PU.fw | RT x {self.repeats_5} | genomic | RT x {self.repeats_3} | PU.rev | pad"
@@ -0,0 +1,81 @@
+from array import array
+from collections.abc import Iterable, Iterator
+
+
+class SequenceBuffer:
+    """Read-only sequence container storing genomic sequences in a single ascii buffer, with the
+    offset of each sequence (one byte per base instead of one str object per sequence).
+    Slicing returns a view sharing the buffer.
+
+    Attributes:
+    -----------
+        blob (memoryview):
+            all the sequences concatenated (ascii)
+        offsets (memoryview):
+            position of the first base of each sequence in the blob (n + 1 values)
+    """
+
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob: memoryview, offsets: memoryview) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[str | bytes]) -> "SequenceBuffer":
+        """Stores genomic sequences in a single buffer
+
+        Args:
+            sequences (Iterable[str | bytes]): genomic sequences
+
+        Returns:
+            SequenceBuffer: the same sequences
+        """
+        blob = bytearray()
+        offsets = array("q", [0])
+        for seq in sequences:
+            blob += seq.encode("ascii") if isinstance(seq, str) else seq
+            offsets.append(len(blob))
+        return cls(memoryview(blob), memoryview(offsets))
+
+    @classmethod
+    def from_buffer(cls, blob: bytes, offsets: array) -> "SequenceBuffer":
+        """SequenceBuffer of sequences already concatenated (see __reduce__)"""
+        return cls(memoryview(blob), memoryview(offsets))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, item: int | slice) -> "str | SequenceBuffer":
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return SequenceBuffer(self.blob, self.offsets[start : max(start, stop) + 1])
+        if item < 0:
+            item += len(self)
+        return str(self.blob[self.offsets[item] : self.offsets[item + 1]], "ascii")
+
+    def __iter__(self) -> Iterator[str]:
+        blob = self.blob
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield str(blob[offsets[i] : offsets[i + 1]], "ascii")
+
+    def raw(self) -> Iterator[memoryview]:
+        """Iterates over the bases of the sequences, without decoding them"""
+        blob = self.blob
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield blob[offsets[i] : offsets[i + 1]]
+
+    def __reduce__(self) -> tuple:
+        # pickled with the bases of the sequences of the view only
+        first, last = self.offsets[0], self.offsets[-1]
+        offsets = array("q", (offset - first for offset in self.offsets))
+        return SequenceBuffer.from_buffer, (bytes(self.blob[first:last]), offsets)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory size of the bases and offsets (in bytes)"""
+        return (self.offsets[-1] - self.offsets[0]) + self.offsets.nbytes
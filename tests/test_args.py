@@ -23,3 +23,21 @@ def test_check_param_bad_output_folder():
     wrong_output_folder = parse_arguments(["-o", "path/not/exist/output"])
     with pytest.raises(SystemExit, match=r".*path/not/exist/output.*"):
         check_args(wrong_output_folder)
+
+
+def test_check_bad_genome_folder():
+    wrong_genome_folder = parse_arguments(["-d", "genome/not/exist"])
+    with pytest.raises(SystemExit, match=r".*genome/not/exist.*"):
+        check_args(wrong_genome_folder)
+
+
+def test_check_bad_number_of_workers():
+    no_worker = parse_arguments(["-w", "0"])
+    with pytest.raises(SystemExit, match=r".*workers.*"):
+        check_args(no_worker)
+
+
+def test_check_stream_with_workers():
+    stream_with_workers = parse_arguments(["-s", "-w", "2"])
+    with pytest.raises(SystemExit, match=r".*--stream.*"):
+        check_args(stream_with_workers)
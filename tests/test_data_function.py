@@ -1,7 +1,22 @@
 import pytest
 import os
+import gzip
+import shutil
 from pathlib import Path
 import core.data_function as df
+from core import bgzf
+from core.bed_cache import build_bed_cache, load_bed_cache
+from core import bed_index
+from core.bed_index import build_bed_index, load_bed_index
+from core.probe_database import (
+    build_probe_database,
+    chromosome_range_database,
+    database_chromosome,
+    load_chromosome_database,
+    seq_genomic_database,
+)
+from core.resource_cache import ResourceCache, load_chromosome_packed
+from models.library import Library
 
 
 @pytest.fixture
@@ -58,3 +73,221 @@ def test_seq_genomic_format_output_type(file_path):
     assert isinstance(seq_genomic_output_0[0], int)
     assert isinstance(seq_genomic_output_0[1], int)
     assert isinstance(seq_genomic_output_0[2], str)
+
+
+def test_bed_cache_same_probes_as_bed_file(file_path, tmp_path):
+    """Test whether the binary cache returns the same probes as the parsing of the BED file"""
+    bed_path = tmp_path / "chr3L.bed"
+    shutil.copy(file_path["exemple_genomic_seq"], bed_path)
+    assert load_bed_cache(bed_path) is None
+
+    build_bed_cache(bed_path)
+    probes = load_bed_cache(bed_path)
+    seq_genomic = df.seq_genomic_format(bed_path)
+    assert len(probes) == len(seq_genomic)
+    assert probes[0] == seq_genomic[0] and probes[-1] == seq_genomic[-1]
+    assert probes[10:20].to_list() == seq_genomic[10:20]
+
+
+def test_bed_cache_records_mtime_of_touched_bed_file(file_path, tmp_path, monkeypatch):
+    """Test that a touched BED file with the same content keeps its cache, and is only hashed
+    once"""
+    bed_path = tmp_path / "chr3L.bed"
+    shutil.copy(file_path["exemple_genomic_seq"], bed_path)
+    build_bed_cache(bed_path)
+    stat = os.stat(bed_path)
+    os.utime(bed_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert len(load_bed_cache(bed_path)) == len(df.seq_genomic_format(bed_path))
+
+    def fail_sha256(path):
+        raise AssertionError(f"{path} hashed again")
+
+    monkeypatch.setattr("core.bed_cache.file_sha256", fail_sha256)
+    assert load_bed_cache(bed_path) is not None
+
+
+def test_bed_cache_invalidated_when_bed_file_changes(file_path, tmp_path):
+    """Test that the cache is no longer used once the BED file has been modified"""
+    bed_path = tmp_path / "chr3L.bed"
+    shutil.copy(file_path["exemple_genomic_seq"], bed_path)
+    build_bed_cache(bed_path)
+    with open(bed_path, mode="a", encoding="UTF-8") as file:
+        file.write("chr3L\t9999990\t9999999\tACGTACGTA\t40.00\n")
+    assert load_bed_cache(bed_path) is None
+
+
+@pytest.mark.parametrize("design_type", ["locus_length", "nbr_probes"])
+def test_seq_genomic_window_same_as_reduced_list(file_path, tmp_path, design_type):
+    """Test whether streaming the library window gives the same sequences as the reduction of
+    the whole chromosome list"""
+    # copy of the chromosome file: its index is written next to it
+    bed_path = tmp_path / "chr3L.bed"
+    shutil.copy(file_path["exemple_genomic_seq"], bed_path)
+    parameters = {
+        "chromosome_file": "chr3L.bed",
+        "start_lib": 8_900_000,
+        "nbr_loci_total": 5,
+        "max_diff_percent": 10,
+        "design_type": design_type,
+    }
+    library = Library(parameters)
+    seq_genomic = df.seq_genomic_format(file_path["exemple_genomic_seq"])
+    reduced = library.reduce_list_seq(
+        seq_genomic, resolution=10_000, nbr_probe_by_locus=50
+    )
+    window = df.seq_genomic_window(
+        bed_path,
+        start_lib=8_900_000,
+        end_lib=8_950_000,
+        design_type=design_type,
+        nbr_probes_max=250,
+    )
+    assert list(window) == reduced.to_list()
+
+
+def test_seq_genomic_window_with_sidecar_index(file_path, tmp_path):
+    """Test that the sidecar index is built on first use and gives the same window"""
+    bed_path = tmp_path / "chr3L.bed"
+    shutil.copy(file_path["exemple_genomic_seq"], bed_path)
+    window_args = {
+        "start_lib": 8_900_000,
+        "end_lib": 8_950_000,
+        "design_type": "locus_length",
+    }
+    expected = list(df.seq_genomic_window(bed_path, use_index=False, **window_args))
+    assert list(df.seq_genomic_window(bed_path, **window_args)) == expected
+    assert load_bed_index(bed_path) is not None
+    index = build_bed_index(bed_path, step=100)
+    assert index.offset_before(8_900_000) > 0
+    assert index.offset_before(0) == 0
+
+
+def test_index_of_package_chromosome_in_user_cache(file_path, tmp_path, monkeypatch):
+    """Test that the index of a chromosome file of the package resources is saved in the user
+    cache folder instead of the resources folder"""
+    resources_folder = tmp_path / "resources"
+    resources_folder.mkdir()
+    bed_path = resources_folder / "chr3L.bed"
+    shutil.copy(file_path["exemple_genomic_seq"], bed_path)
+    monkeypatch.setattr(bed_index, "RESOURCES_FOLDER", resources_folder)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    window_args = {
+        "start_lib": 8_900_000,
+        "end_lib": 8_950_000,
+        "design_type": "locus_length",
+    }
+    expected = list(df.seq_genomic_window(bed_path, use_index=False, **window_args))
+    assert list(df.seq_genomic_window(bed_path, **window_args)) == expected
+    assert list(resources_folder.iterdir()) == [bed_path]
+    assert bed_index.index_path_for(bed_path).is_relative_to(tmp_path / "cache")
+    assert load_bed_index(bed_path) is not None
+
+
+def test_seq_genomic_window_compressed_files(file_path, tmp_path):
+    """Test whether gzip and block gzip compressed BED files give the same window as the BED file"""
+    bed_path = file_path["exemple_genomic_seq"]
+    gzip_path = tmp_path / "chr3L.bed.gz"
+    with open(bed_path, mode="rb") as source, gzip.open(gzip_path, mode="wb") as dest:
+        shutil.copyfileobj(source, dest)
+    bgzf_path = bgzf.compress_file(bed_path, tmp_path / "chr3L_bgzf.bed.gz")
+    window_args = {
+        "start_lib": 9_100_000,
+        "end_lib": 9_150_000,
+        "design_type": "locus_length",
+    }
+    expected = list(df.seq_genomic_window(bed_path, use_index=False, **window_args))
+    assert list(df.seq_genomic_window(gzip_path, **window_args)) == expected
+    assert list(df.seq_genomic_window(bgzf_path, **window_args)) == expected
+    assert load_bed_index(bgzf_path).offset_before(9_100_000) >> 16 > 0
+    assert df.seq_genomic_format(bgzf_path) == df.seq_genomic_format(bed_path)
+
+
+@pytest.mark.parametrize("design_type", ["locus_length", "nbr_probes"])
+def test_probe_database_same_window_as_bed_file(file_path, tmp_path, design_type):
+    """Test whether the probe database built from a genome folder gives the same window as
+    the BED file"""
+    shutil.copy(file_path["exemple_genomic_seq"], tmp_path / "chr3L.bed")
+    database_path = build_probe_database(tmp_path)
+    window_args = {
+        "start_lib": 9_100_000,
+        "end_lib": 9_150_000,
+        "design_type": design_type,
+        "nbr_probes_max": 250,
+    }
+    expected = list(df.seq_genomic_window(tmp_path / "chr3L.bed", **window_args))
+    probes = seq_genomic_database(database_path, "chr3L", **window_args)
+    assert probes.to_list() == expected
+    with pytest.raises(ValueError, match="chr2R is not in the probe database"):
+        seq_genomic_database(database_path, "chr2R", **window_args)
+
+
+def test_probe_database_checks_chromosome_files(file_path, tmp_path):
+    """Test that the probe database is not queried once a chromosome file changed, nor with a
+    chromosome file without chromosome name"""
+    bed_path = tmp_path / "chr3L.bed"
+    shutil.copy(file_path["exemple_genomic_seq"], bed_path)
+    database_path = build_probe_database(tmp_path)
+    assert len(load_chromosome_database(database_path, "chr3L")) > 0
+    # same content, new modification time: still valid
+    os.utime(bed_path, ns=(0, 0))
+    assert len(load_chromosome_database(database_path, "chr3L")) > 0
+    with open(bed_path, mode="a", encoding="UTF-8") as file:
+        file.write("chr3L\t9999000\t9999030\tACGTACGTACGTACGTACGTACGTACGTAC\n")
+    with pytest.raises(ValueError, match="changed since the probe database"):
+        load_chromosome_database(database_path, "chr3L")
+    with pytest.raises(ValueError, match="No chromosome name"):
+        database_chromosome("genome.bed")
+
+
+def test_chromosome_range_of_file_and_database(file_path, tmp_path):
+    """Test the coordinates covered by a chromosome, reported when the library window is empty"""
+    shutil.copy(file_path["exemple_genomic_seq"], tmp_path / "chr3L.bed")
+    database_path = build_probe_database(tmp_path)
+    records = df.seq_genomic_format(file_path["exemple_genomic_seq"])
+    expected = (records[0][0], records[-1][1])
+    assert df.chromosome_range(file_path["exemple_genomic_seq"]) == expected
+    assert chromosome_range_database(database_path, "chr3L") == expected
+    assert chromosome_range_database(database_path, "chr2R") is None
+
+
+def test_resource_cache_shared_until_file_changes(file_path, tmp_path):
+    """Test that a parsed file is shared between designs and parsed again once modified"""
+    rt_path = tmp_path / "List_RT.csv"
+    shutil.copy(file_path["rt_file_path"], rt_path)
+    resources = ResourceCache()
+    rt_list = resources.get(rt_path, df.bcd_rt_format)
+    assert resources.get(rt_path, df.bcd_rt_format) is rt_list
+    with open(rt_path, mode="a", encoding="UTF-8") as file:
+        file.write("revMer7,acgtacgtacgtacgtacgt\n")
+    assert resources.get(rt_path, df.bcd_rt_format)[-1] == [
+        "revMer7",
+        "acgtacgtacgtacgtacgt",
+    ]
+    chromosome = resources.chromosome(file_path["exemple_genomic_seq"])
+    assert chromosome.to_list() == df.seq_genomic_format(
+        file_path["exemple_genomic_seq"]
+    )
+
+
+def test_resource_cache_keeps_last_chromosomes(file_path, tmp_path):
+    """Test that only the last chromosomes used are kept in a bounded cache"""
+    chr_paths = [tmp_path / "chr3L.bed", tmp_path / "chr2R.bed"]
+    for chr_path in chr_paths:
+        shutil.copy(file_path["exemple_genomic_seq"], chr_path)
+    resources = ResourceCache(max_chromosomes=1)
+    rt_list = resources.get(file_path["rt_file_path"], df.bcd_rt_format)
+    chr3l = resources.chromosome(chr_paths[0])
+    assert resources.chromosome(chr_paths[0]) is chr3l
+    resources.chromosome(chr_paths[1])
+    assert resources.chromosome(chr_paths[0]) is not chr3l
+    assert len(resources.entries) == 2
+    # the other input files are kept
+    assert resources.get(file_path["rt_file_path"], df.bcd_rt_format) is rt_list
+
+
+def test_chromosome_packed_as_read(file_path):
+    """Test that a chromosome packed as it is read decodes as the chromosome file"""
+    chromosome = load_chromosome_packed(file_path["exemple_genomic_seq"])
+    assert chromosome.to_list() == df.seq_genomic_format(
+        file_path["exemple_genomic_seq"]
+    )
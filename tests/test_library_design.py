@@ -1,8 +1,43 @@
+import csv
+import json
 import pytest
 import re
+import shutil
+import time
+import tracemalloc
 from pathlib import Path
 
 import core.data_function as df
+from core.batch import BATCH_SUMMARY_HEADER, design_name, load_manifest, run_batch
+from core.design_events import (
+    LOCUS_DONE,
+    STAGE_FINISHED,
+    STAGE_STARTED,
+    CancellationToken,
+    DesignMonitor,
+)
+from core.design_worker import DesignWorker
+from core.locus_design import (
+    add_primers,
+    add_readouts,
+    design_loci,
+    design_loci_parallel,
+    iter_design_loci,
+    select_loci,
+)
+from core.result_index import (
+    RESULT_FILES,
+    design_digest,
+    file_digest,
+    find_result,
+    load_file_digests,
+    record_result,
+    save_file_digests,
+)
+from core.run_profile import PROFILE_FILE, RunProfile
+from core.stage_cache import StageCache
+from core.sweep import SWEEP_COLUMNS, load_sweep, parameter_values, run_sweep
+from models.designCancelledException import DesignCancelledException
 from models.library import Library
 from models.locus import Locus
 
@@ -26,7 +61,7 @@ def setup(tmp_path_factory):
         "resources/design_by_probe_nbr_rt/IN/input_parameters.json",
     ]
     # Creation of 4 libraries based on different scenarios by iterating on input_parameters files
-    genomic_probes = script_folder.joinpath('src', 'resources')
+    genomic_probes = script_folder.joinpath("src", "resources")
     for json_path in input_param_folder:
         full_path = test_folder.joinpath(json_path)
         input_parameters = df.load_parameters(full_path)
@@ -179,3 +214,442 @@ def test_summary_locus_nbr_probe_with_rt(setup):
         with open(summary_test, mode="r", encoding="UTF-8") as test_file:
             test_text = test_file.read()
             assert len(reference_text) == len(test_text)
+
+
+@pytest.fixture
+def small_design():
+    parameters = {
+        "chromosome_file": "chr3L.bed",
+        "start_lib": 8000,
+        "nbr_loci_total": 6,
+        "max_diff_percent": 10,
+        "design_type": "locus_length",
+        "resolution": 1000,
+        "nbr_probe_by_locus": 8,
+        "nbr_bcd_rt_by_probe": 3,
+    }
+    sequences = [[start, start + 30, f"seq{start}"] for start in range(8000, 15000, 50)]
+    primer = ["BB297.Fw", "GACTGG", "BB299.Rev", "CCAGTC"]
+    bcd_rt_list = [[f"RT{i}", f"ac{i}"] for i in range(1, 7)]
+    library = Library(parameters)
+    reduced = library.reduce_list_seq(sequences, resolution=1000, nbr_probe_by_locus=8)
+    loci_probes = library.partition_loci(reduced, resolution=1000, nbr_probe_by_locus=8)
+    return parameters, primer, bcd_rt_list, sequences, loci_probes
+
+
+def loci_content(loci):
+    return [
+        (
+            locus.locus_n,
+            locus.start_seq,
+            locus.bcd_locus,
+            list(locus.seq_probe.spaced()),
+        )
+        for locus in loci
+    ]
+
+
+def test_design_loci_parallel_same_as_serial(small_design):
+    parameters, primer, bcd_rt_list, _, loci_probes = small_design
+    serial = design_loci(parameters, primer, bcd_rt_list, loci_probes, 1, seed=3)
+    parallel = design_loci_parallel(
+        parameters, primer, bcd_rt_list, loci_probes, seed=3, workers=2
+    )
+    assert len(serial) == 6
+    assert loci_content(parallel) == loci_content(serial)
+
+
+def test_iter_design_loci_same_as_design_loci(small_design):
+    parameters, primer, bcd_rt_list, sequences, loci_probes = small_design
+    serial = design_loci(parameters, primer, bcd_rt_list, loci_probes, 1, seed=3)
+    streamed = iter_design_loci(
+        parameters, primer, bcd_rt_list, iter(sequences), seed=3
+    )
+    assert loci_content(streamed) == loci_content(serial)
+
+
+@pytest.mark.parametrize("design_type", ["locus_length", "nbr_probes"])
+def test_loci_length_info_same_as_design(small_design, design_type):
+    parameters, primer, bcd_rt_list, sequences, _ = small_design
+    parameters["design_type"] = design_type
+    library = Library(parameters)
+    reduced = library.reduce_list_seq(sequences, resolution=1000, nbr_probe_by_locus=8)
+    loci_probes = library.partition_loci(reduced, resolution=1000, nbr_probe_by_locus=8)
+    for locus in design_loci(parameters, primer, bcd_rt_list, loci_probes, 1, seed=3):
+        library.add_locus(locus)
+    assert (
+        Library(parameters).loci_length_info(sequences, 1000, 8)
+        == library.recover_loci_probes_length_info()
+    )
+
+
+def test_stages_same_as_design_loci(small_design):
+    parameters, primer, bcd_rt_list, _, loci_probes = small_design
+    serial = design_loci(parameters, primer, bcd_rt_list, loci_probes, 1, seed=3)
+    selected = select_loci(parameters, loci_probes, 1, seed=3)
+    with_readouts = add_readouts(parameters, selected, bcd_rt_list)
+    loci = add_primers(parameters, with_readouts, primer)
+    assert loci_content(loci) == loci_content(serial)
+    # the loci of the previous stages are not modified
+    assert selected[0].bcd_locus is None and with_readouts[0].primers_univ is None
+
+
+def test_stage_cache_reuses_unchanged_stages(tmp_path):
+    input_file = tmp_path.joinpath("input.csv")
+    input_file.write_text("a,b\n")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return ["result"]
+
+    stages = StageCache(tmp_path.joinpath("cache"))
+    inputs = {"value": 1, "file": stages.file_digest(input_file)}
+    key, result = stages.run("stage", inputs, compute)
+    assert stages.run("stage", inputs, compute) == (key, result) and len(calls) == 1
+    # results pickled in the cache folder are reused by a new cache
+    assert StageCache(stages.folder).run("stage", inputs, compute)[1] == ["result"]
+    assert len(calls) == 1
+    input_file.write_text("a,c\n")
+    inputs["file"] = stages.file_digest(input_file)
+    assert stages.run("stage", inputs, compute)[0] != key and len(calls) == 2
+
+
+def test_stage_cache_releases_least_recently_used(tmp_path):
+    stages = StageCache(tmp_path, max_entries=2)
+    keys = [
+        stages.run("stage", {"value": value}, lambda: [value])[0] for value in range(3)
+    ]
+    assert list(stages.entries) == keys[1:]
+    assert len(list(tmp_path.glob("*.pickle"))) == 2
+    # a reused result becomes the most recently used one
+    stages.run("stage", {"value": 1}, list)
+    stages.run("stage", {"value": 3}, list)
+    assert list(stages.entries) == [keys[1], stages.key("stage", {"value": 3})]
+
+
+def test_result_index_finds_identical_design(tmp_path):
+    files = {}
+    for name in ("genomic_path", "bcd_rt_path", "primer_univ_path"):
+        files[name] = tmp_path.joinpath(name)
+        files[name].write_text(name)
+    parameters = {"start_lib": 8000, "output_folder": tmp_path, **files}
+    digest = design_digest(parameters, seed=3)
+    path_result_folder = tmp_path.joinpath("20240101_120000")
+    path_result_folder.mkdir()
+    for file in RESULT_FILES:
+        path_result_folder.joinpath(file).write_text("")
+    record_result(tmp_path, digest, path_result_folder)
+    moved = {**parameters, "output_folder": tmp_path.joinpath("other")}
+    assert find_result(tmp_path, design_digest(moved, seed=3)) == path_result_folder
+    assert design_digest(parameters, seed=4) != digest
+    files["bcd_rt_path"].write_text("other barcodes")
+    assert design_digest(parameters, seed=3) != digest
+    # results deleted since the design
+    path_result_folder.joinpath("plot.png").unlink()
+    assert find_result(tmp_path, digest) is None
+
+
+def test_file_digests_saved_for_the_next_runs(tmp_path):
+    input_file = tmp_path.joinpath("chr3L.bed")
+    input_file.write_text("chr3L\t1\t3\tACG\n")
+    digests = {}
+    digest = file_digest(input_file, digests)
+    save_file_digests(tmp_path, digests)
+    # next run: the digest is not computed again while the file is unchanged
+    next_digests = {}
+    load_file_digests(tmp_path, next_digests)
+    assert next_digests == digests
+    input_file.write_text("chr3L\t1\t4\tACGT\n")
+    assert file_digest(input_file, next_digests) != digest
+    assert len(next_digests) == 2
+
+
+def test_run_profile_records_stages(tmp_path):
+    run_profile = RunProfile()
+    with run_profile.stage("allocation") as record:
+        data = [bytes(1 << 20) for _ in range(4)]
+        record["items"] = len(data)
+    profile_path = run_profile.save(tmp_path)
+    assert profile_path == tmp_path.joinpath(PROFILE_FILE)
+    with open(profile_path, mode="r", encoding="UTF-8") as file:
+        profile = json.load(file)
+    stage = profile["stages"][0]
+    assert stage["stage"] == "allocation" and stage["items"] == 4
+    assert (
+        stage["peak_memory_mb"] >= 4 and profile["total"]["wall_s"] >= stage["wall_s"]
+    )
+    # a disabled profile records nothing
+    disabled = RunProfile(enabled=False)
+    with disabled.stage("allocation"):
+        pass
+    assert disabled.stages == [] and disabled.save(tmp_path) is None
+    # tracing stopped by a profile closed without being saved (failed or cancelled design)
+    unsaved = RunProfile()
+    unsaved.close()
+    assert not tracemalloc.is_tracing()
+
+
+def test_design_monitor_events_and_cancellation(small_design, tmp_path):
+    parameters, _, _, _, loci_probes = small_design
+    events = []
+    token = CancellationToken()
+
+    def on_event(event):
+        events.append(event)
+        if event.kind == LOCUS_DONE and event.current == 2:
+            token.cancel()
+
+    monitor = DesignMonitor(RunProfile(enabled=False), on_event, token, nbr_loci=6)
+    path_result_folder = tmp_path.joinpath("20240101_120000")
+    path_result_folder.mkdir()
+    with pytest.raises(DesignCancelledException):
+        with monitor.results(path_result_folder):
+            with monitor.stage("locus fill"):
+                select_loci(
+                    parameters, loci_probes, 1, seed=3, on_locus=monitor.locus_done
+                )
+    assert [(event.kind, event.current, event.total) for event in events] == [
+        (STAGE_STARTED, None, None),
+        (LOCUS_DONE, 1, 6),
+        (LOCUS_DONE, 2, 6),
+    ]
+    # no partial results are left
+    assert not path_result_folder.exists()
+    # the following stages are not started
+    with pytest.raises(DesignCancelledException):
+        with monitor.stage("readout assembly"):
+            pass
+    monitor = DesignMonitor(RunProfile(enabled=False), events.append)
+    with monitor.stage("readout assembly") as record:
+        record["items"] = 6
+    assert (events[-1].kind, events[-1].stage, events[-1].total) == (
+        STAGE_FINISHED,
+        "readout assembly",
+        6,
+    )
+
+
+def test_design_worker_runs_design_in_background(small_design, tmp_path):
+    parameters, _, _, _, loci_probes = small_design
+
+    def design(on_event, cancel_token, wait):
+        monitor = DesignMonitor(RunProfile(enabled=False), on_event, cancel_token, 6)
+        with monitor.stage("locus fill"):
+            for locus in select_loci(parameters, loci_probes, 1, seed=3):
+                # the GUI cancels the design while it is running
+                while wait and not cancel_token.cancelled:
+                    time.sleep(0.01)
+                monitor.locus_done(locus)
+        return tmp_path
+
+    def wait_end(worker):
+        events = []
+        over = False
+        while not over:
+            new_events, over = worker.poll()
+            events.extend(new_events)
+        return events
+
+    worker = DesignWorker()
+    worker.start(design, wait=False)
+    events = wait_end(worker)
+    assert worker.result_folder == tmp_path and not worker.cancelled
+    loci_done = [event.current for event in events if event.kind == LOCUS_DONE]
+    assert loci_done == [1, 2, 3, 4, 5, 6]
+    worker.start(design, wait=True)
+    assert worker.running
+    worker.cancel()
+    wait_end(worker)
+    assert worker.cancelled and worker.result_folder is None and worker.error is None
+    worker.start(design)
+    wait_end(worker)
+    assert isinstance(worker.error, TypeError)
+
+
+@pytest.fixture
+def batch_parameters(tmp_path):
+    """Parameters of a small design, with a copy of the chromosome file (its index is not written
+    in the repository)"""
+    test_folder = Path(__file__).absolute().parent
+    chromosome_folder = tmp_path.joinpath("chromosomes")
+    chromosome_folder.mkdir()
+    shutil.copy(test_folder.joinpath("resources", "chr3L.bed"), chromosome_folder)
+    with open(
+        test_folder.joinpath("resources/design_by_length_bcd/IN/input_parameters.json"),
+        mode="r",
+        encoding="UTF-8",
+    ) as file:
+        parameters = json.load(file)
+    parameters.update(
+        chromosome_folder=chromosome_folder.as_posix(), nbr_loci_total=5, seed=3
+    )
+    return parameters
+
+
+def read_batch_summary(summary_path):
+    with open(summary_path, mode="r", encoding="UTF-8", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == BATCH_SUMMARY_HEADER
+    return {row[0]: dict(zip(BATCH_SUMMARY_HEADER, row)) for row in rows[1:]}
+
+
+def test_batch_json_manifest_with_failing_entries(batch_parameters, tmp_path):
+    manifest = tmp_path.joinpath("manifest")
+    manifest.mkdir()
+    for name, primer in (("lib_a", "primer1"), ("lib_b", "primer2")):
+        manifest.joinpath(f"{name}.json").write_text(
+            json.dumps({**batch_parameters, "primer_univ": primer})
+        )
+    manifest.joinpath("broken.json").write_text("{not json")
+    missing = {
+        key: value for key, value in batch_parameters.items() if key != "resolution"
+    }
+    manifest.joinpath("missing.json").write_text(json.dumps(missing))
+    output = tmp_path.joinpath("output")
+    output.mkdir()
+
+    summary = read_batch_summary(run_batch(manifest, output))
+    assert sorted(summary) == ["broken", "lib_a", "lib_b", "missing"]
+    for name in ("lib_a", "lib_b"):
+        assert summary[name]["Status"] == "done"
+        assert summary[name]["Nbr_Loci"] == "5"
+        result_folder = Path(summary[name]["Result_Folder"])
+        assert result_folder.is_relative_to(output.joinpath(name))
+        assert all(result_folder.joinpath(file).exists() for file in RESULT_FILES)
+    assert summary["broken"]["Status"] == "failed"
+    assert summary["broken"]["Error"].startswith("JSONDecodeError")
+    assert summary["missing"]["Status"] == "failed"
+    assert summary["missing"]["Error"] == "KeyError: 'resolution'"
+
+
+def test_batch_csv_manifest_with_unsafe_names(batch_parameters, tmp_path):
+    manifest = tmp_path.joinpath("manifest.csv")
+    names = ["../lib one", "", "lib/two"]
+    with open(manifest, mode="w", encoding="UTF-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["design", *batch_parameters])
+        writer.writeheader()
+        for name in names:
+            row = {key: json.dumps(value) for key, value in batch_parameters.items()}
+            # strings written as plain strings, as in a spreadsheet
+            row.update(chromosome_file="chr3L.bed", design=name)
+            writer.writerow(row)
+    assert [name for name, _ in load_manifest(manifest)] == [
+        "_lib_one",
+        "design_2",
+        "lib_two",
+    ]
+    output = tmp_path.joinpath("output")
+    output.mkdir()
+
+    summary = read_batch_summary(run_batch(manifest, output))
+    assert sorted(summary) == ["_lib_one", "design_2", "lib_two"]
+    assert all(row["Status"] == "done" for row in summary.values())
+    assert sorted(path.name for path in output.iterdir() if path.is_dir()) == sorted(
+        summary
+    )
+    # same design and seed in the same folder: same library
+    details = [
+        Path(row["Result_Folder"]).joinpath("1_Library_details.txt").read_text()
+        for row in summary.values()
+    ]
+    assert details[0] == details[1] == details[2]
+
+
+def test_batch_manifest_rejects_duplicate_names(tmp_path):
+    assert design_name(" ../a b ") == "_a_b"
+    manifest = tmp_path.joinpath("manifest.csv")
+    manifest.write_text("design,start_lib\nlib a,1\nlib_a,2\nlib b,3\n")
+    with pytest.raises(ValueError, match="several designs named lib_a"):
+        load_manifest(manifest)
+
+
+def test_sweep_parameter_values(tmp_path):
+    assert parameter_values({"start": 5000, "stop": 15000, "step": 5000}) == [
+        5000,
+        10000,
+        15000,
+    ]
+    assert parameter_values([50, 100]) == [50, 100] and parameter_values(7) == [7]
+    sweep_path = tmp_path.joinpath("sweep.json")
+    sweep_path.write_text(
+        json.dumps({"resolution": {"start": 5000, "stop": 10000, "step": 5000}})
+    )
+    parameters = {"start_lib": 8000, "resolution": 1000, "nbr_probe_by_locus": 20}
+    assert load_sweep(sweep_path, parameters) == [
+        {"start_lib": 8000, "resolution": 5000, "nbr_probe_by_locus": 20},
+        {"start_lib": 8000, "resolution": 10000, "nbr_probe_by_locus": 20},
+    ]
+    sweep_path.write_text(json.dumps({"nbr_loci_total": [5, 10]}))
+    with pytest.raises(ValueError, match="nbr_loci_total"):
+        load_sweep(sweep_path, parameters)
+
+
+def read_sweep_summary(result_folder):
+    with open(
+        result_folder.joinpath("sweep_summary.csv"), mode="r", encoding="UTF-8"
+    ) as file:
+        return list(csv.DictReader(file))
+
+
+def test_sweep_by_locus_length_range(batch_parameters, tmp_path):
+    parameters = df.format_parameters(batch_parameters)
+    sweep_path = tmp_path.joinpath("sweep.json")
+    sweep_path.write_text(
+        json.dumps(
+            {
+                "start_lib": [8883000, 9270480],
+                "resolution": {"start": 5000, "stop": 10000, "step": 5000},
+            }
+        )
+    )
+    result_folder = run_sweep(parameters, sweep_path, tmp_path)
+    rows = read_sweep_summary(result_folder)
+    assert list(rows[0]) == [
+        f"{column}_probes_by_locus" if column in ("min", "mean", "max") else column
+        for column in SWEEP_COLUMNS
+    ]
+    assert [(row["start_lib"], row["resolution"]) for row in rows] == [
+        ("8883000", "5000"),
+        ("8883000", "10000"),
+        ("9270480", "5000"),
+        ("9270480", "10000"),
+    ]
+    sequences = df.seq_genomic_format(parameters["genomic_path"])
+    for row in rows:
+        start_lib, resolution = int(row["start_lib"]), int(row["resolution"])
+        counts = [
+            sum(
+                1
+                for start, end, _ in sequences
+                if start >= start_lib + locus * resolution
+                and end < start_lib + (locus + 1) * resolution
+            )
+            for locus in range(5)
+        ]
+        counts = [min(count, parameters["nbr_probe_by_locus"]) for count in counts]
+        assert int(row["nbr_probes"]) == sum(counts) and row["nbr_loci"] == "5"
+        assert int(row["min_probes_by_locus"]) == min(counts)
+    # the first locus of 5 kb is located in a gap of the chromosome file
+    assert [row["status"] for row in rows] == ["ok", "ok", "1 empty loci", "ok"]
+    assert result_folder.joinpath("sweep_plot.png").exists()
+
+
+def test_sweep_by_nbr_probes_short_and_out_of_range(batch_parameters, tmp_path):
+    parameters = df.format_parameters({**batch_parameters, "design_type": "nbr_probes"})
+    sequences = df.seq_genomic_format(parameters["genomic_path"])
+    # window of 470 probes for 5 loci of 100 probes
+    start_short = sequences[-470][0]
+    sweep_path = tmp_path.joinpath("sweep.json")
+    sweep_path.write_text(
+        json.dumps(
+            {"start_lib": [8883000, start_short, 9700000], "nbr_probe_by_locus": 100}
+        )
+    )
+    rows = read_sweep_summary(run_sweep(parameters, sweep_path, tmp_path))
+    assert [(row["status"], row["nbr_loci"], row["nbr_probes"]) for row in rows] == [
+        ("ok", "5", "500"),
+        ("1 short loci", "5", "470"),
+        ("not enough probes", "0", "0"),
+    ]
+    assert rows[2]["min_locus_size"] == ""
@@ -1,8 +1,14 @@
+import pickle
 import pytest
 import random
 
-from models.library import Library
+from models.library import Library, recover_chr_name
 from models.locus import Locus
+from models.probe import Probe, ProbeBatch
+from models.probe_template import ProbeTemplate
+from models.probe_set import ProbeSet
+from models import packed_sequences
+from models.packed_sequences import PackedSequences
 
 
 @pytest.fixture
@@ -98,3 +104,177 @@ def test_completion_with_threshold_exceeded(sequences, library_filled, capsys):
     assert (
         captured_stdout == "-" * 70 + "\n" + "Completion finished\n" + "-" * 70 + "\n"
     )
+
+
+def test_partition_loci_type_locus_length(sequences, library_empty):
+    library_empty.start_lib = 8510
+    buckets = library_empty.partition_loci(
+        sequences, resolution=1000, nbr_probe_by_locus=20
+    )
+    assert len(buckets) == library_empty.nbr_loci_total
+    assert [(start, end) for _, start, end in buckets][:2] == [
+        (8510, 9510),
+        (9510, 10510),
+    ]
+    # probes overlapping two loci are not assigned to any locus
+    assert [len(probes) for probes, _, _ in buckets] == [19, 19, 19, 19, 19]
+
+
+def test_partition_loci_type_nbr_probes(sequences, library_empty):
+    library_empty.design_type = "nbr_probes"
+    buckets = library_empty.partition_loci(
+        sequences[10:], resolution=1000, nbr_probe_by_locus=30
+    )
+    probes, start, end = buckets[1]
+    assert len(buckets) == 5 and len(probes) == 30
+    assert start == sequences[40][0] and end == sequences[69][1]
+
+
+def test_partition_loci_nbr_probes_window_too_short(sequences, library_empty):
+    library_empty.design_type = "nbr_probes"
+    # the last locus can be partly filled
+    assert library_empty.min_nbr_sequences(nbr_probe_by_locus=30) == 121
+    buckets = library_empty.partition_loci(
+        sequences[:121], resolution=1000, nbr_probe_by_locus=30
+    )
+    assert [len(probes) for probes, _, _ in buckets] == [30, 30, 30, 30, 1]
+    with pytest.raises(ValueError, match="no sequence for locus 4"):
+        library_empty.partition_loci(
+            sequences[:80], resolution=1000, nbr_probe_by_locus=30
+        )
+    with pytest.raises(ValueError, match="no sequence for locus 4"):
+        list(
+            library_empty.iter_loci(
+                iter(sequences[:80]), resolution=1000, nbr_probe_by_locus=30
+            )
+        )
+
+
+@pytest.mark.parametrize(
+    "file_name", ["chr3L.bed", "/data/dm6/chr3L.bed", "chr3L.bed.gz"]
+)
+def test_recover_chr_name(file_name):
+    assert recover_chr_name(file_name) == "chr3L"
+
+
+def test_reduce_list_seq_returns_view(sequences, library_empty):
+    probe_set = ProbeSet.from_list(sequences)
+    seq_list_reduced = library_empty.reduce_list_seq(
+        probe_set, resolution=1000, nbr_probe_by_locus=20
+    )
+    assert (
+        seq_list_reduced[0] == sequences[10] and seq_list_reduced[-1] == sequences[109]
+    )
+    assert seq_list_reduced.starts.obj is probe_set.starts.obj
+
+
+def test_probe_set_sequences_in_single_buffer(sequences):
+    probe_set = ProbeSet.from_list(sequences)
+    view = probe_set[10:20]
+    assert view.sequences.blob.obj is probe_set.sequences.blob.obj
+    assert view.to_list() == sequences[10:20]
+    assert pickle.loads(pickle.dumps(view.sequences))[-1] == sequences[19][2]
+
+
+def test_packed_sequences_decode_as_original():
+    sequences = ["ACGTTGCA", "acgtNNNNagcT", "GATTACA", "", "TTRYKMAC", "ggg"]
+    packed = ProbeSet.from_list(
+        [[i * 100, i * 100 + 20, seq] for i, seq in enumerate(sequences)]
+    ).pack()
+    assert list(packed.sequences) == sequences
+    assert list(packed[1:3].sequences) == sequences[1:3]
+
+
+def test_packed_sequences_by_blocks_and_pickled(sequences, monkeypatch):
+    monkeypatch.setattr(packed_sequences, "BLOCK_SIZE", 8)
+    sequences = [
+        [start, end, seq[:5] + "nnRY" + seq[9:].lower()]
+        for start, end, seq in sequences
+    ]
+    packed = ProbeSet.from_list(sequences).pack()
+    assert packed.to_list() == sequences
+    view = pickle.loads(pickle.dumps(packed[33:71]))
+    assert isinstance(view.sequences, PackedSequences)
+    assert view.to_list() == sequences[33:71]
+
+
+def test_probe_record_renderings():
+    probe = Probe("GATTACA", bcd_5="tt", bcd_3="cccc").with_primers("AAA", "GGG")
+    assert str(probe) == "AAA tt GATTACA cccc GGG"
+    assert probe.sequence == "AAAttGATTACAccccGGG" and len(probe) == 19
+    completed = probe.with_padding("at")
+    assert str(completed) == "AAA tt GATTACA cccc GGG at" and len(completed) == 21
+    assert str(probe.with_padding("")) == "AAA tt GATTACA cccc GGG "
+
+
+@pytest.mark.parametrize(
+    "nbr_bcd_rt, expected_split",
+    [(1, (1, 0)), (2, (1, 1)), (3, (1, 2)), (4, (2, 2)), (5, (3, 2)), (7, (4, 3))],
+)
+def test_probe_template_readout_split(nbr_bcd_rt, expected_split):
+    template = ProbeTemplate(nbr_bcd_rt)
+    assert (template.repeats_5, template.repeats_3) == expected_split
+    probe = template.assemble(["GATTACA"], "ac", ["fw", "AAA", "rev", "GGG"])[0]
+    assert (
+        probe.sequence
+        == "AAA"
+        + "ac" * expected_split[0]
+        + "GATTACA"
+        + ("ac" * expected_split[1])
+        + "GGG"
+    )
+
+
+def test_add_rt_bcd_to_primary_seq_beyond_five(library_filled):
+    bcd_rt_list = [["RT1", "ac"], ["RT2", "gt"]]
+    library_filled.add_rt_bcd_to_primary_seq(bcd_rt_list, {"nbr_bcd_rt_by_probe": 8})
+    probe = library_filled.loci_list[1].seq_probe[0]
+    assert probe.bcd_5 == "gt" * 4 and probe.bcd_3 == "gt" * 4
+    assert library_filled.loci_list[1].bcd_locus == "RT2"
+
+
+def test_probe_batch_renders_as_probe_records():
+    batch = ProbeBatch(["GATTACA", "CAT"], bcd_5="tt", bcd_3="cccc")
+    batch = batch.with_primers("AAA", "GGG").with_paddings(["at", "gatt"])
+    assert list(batch.spaced()) == [str(probe) for probe in batch]
+    assert list(batch.raw()) == [probe.sequence for probe in batch]
+    assert batch.lengths() == [len(probe) for probe in batch] == [21, 19]
+    assert batch[1] == Probe("CAT", "tt", "cccc", "AAA", "GGG", "gatt")
+
+
+def test_completion_reproducible_with_seed(library_filled):
+    library_filled.seed = 7
+    genomic = []
+    for n, locus in enumerate(library_filled.loci_list, start=1):
+        locus.locus_n = n
+        genomic.append(locus.seq_probe)
+    completed = []
+    for _ in range(2):
+        for locus, seq_probe in zip(library_filled.loci_list, genomic):
+            locus.seq_probe = seq_probe
+        library_filled.completion(14, 40)
+        completed.append(
+            [list(locus.seq_probe.raw()) for locus in library_filled.loci_list]
+        )
+    assert completed[0] == completed[1]
+    assert all(len(probe) == 40 for locus in completed[0] for probe in locus)
+    # each locus has its own draws
+    assert completed[0][0][0][30:] != completed[0][1][0][30:]
+
+
+@pytest.mark.parametrize("design_type", ["locus_length", "nbr_probes"])
+def test_iter_loci_same_as_partition_loci(sequences, library_empty, design_type):
+    library_empty.start_lib = 8510
+    library_empty.design_type = design_type
+    reduced = library_empty.reduce_list_seq(
+        sequences, resolution=1000, nbr_probe_by_locus=20
+    )
+    buckets = library_empty.partition_loci(
+        reduced, resolution=1000, nbr_probe_by_locus=20
+    )
+    streamed = library_empty.iter_loci(
+        iter(reduced.to_list()), resolution=1000, nbr_probe_by_locus=20
+    )
+    assert [(p.to_list(), s, e) for p, s, e in streamed] == [
+        (p.to_list(), s, e) for p, s, e in buckets
+    ]
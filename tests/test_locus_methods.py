@@ -4,6 +4,7 @@ import pytest
 import random
 
 from models.locus import Locus
+from models.probe_set import ProbeSet
 
 
 @pytest.fixture
@@ -47,3 +48,31 @@ def test_recover_genomic_seq_nbr_probes_strategy(locus, sequences):
 def test_check_nbr_probes_overtaking(locus, sequences):
     seq_list = sequences[:400]
     assert len(locus.check_nbr_probes(seq_list)) == locus.nbr_probe_by_locus
+
+
+def test_recover_genomic_seq_same_result_with_probe_set(locus, sequences):
+    locus.design_type = "locus_length"
+    locus.nbr_probe_by_locus = 1000
+    probe_set = ProbeSet.from_list(sequences)
+    from_list = locus.recover_genomic_seq(2, 3, 10000, sequences)
+    from_probe_set = locus.recover_genomic_seq(2, 3, 10000, probe_set)
+    assert from_list == from_probe_set
+    assert probe_set.locate(30000, 50000) == (440, 840)
+
+
+def test_locus_has_fixed_attributes(locus):
+    assert not hasattr(locus, "__dict__")
+    with pytest.raises(AttributeError):
+        locus.unknown_attribute = 1
+
+
+def test_check_nbr_probes_reproducible_with_seed(locus, sequences):
+    seq_list = sequences[:400]
+    original = [list(x) for x in seq_list]
+    locus.locus_n = 2
+    selected = locus.check_nbr_probes(seq_list, seed=11)
+    assert selected == locus.check_nbr_probes(ProbeSet.from_list(seq_list), seed=11)
+    assert selected == sorted(selected) and len(selected) == locus.nbr_probe_by_locus
+    assert all(x in original for x in selected)
+    # the candidate list is not modified
+    assert seq_list == original